@@ -0,0 +1,428 @@
+"""Time every registered XiaoYuan and FMP-extension fetcher on local stand-ins.
+
+The XiaoYuan fetchers read a synthetic dataset (``openbb_xiaoyuan.utils.synthetic``)
+through an in-process DuckDB backend; the FMP-extension fetchers, when
+``openbb_fmp`` is installed, receive canned responses shaped like their data
+models in place of HTTP requests. Each fetcher runs at every scale of symbol
+count and period, and the best time of ``transform_query``, ``aextract_data`` and
+``transform_data`` is recorded with the output rows, rows per second and the
+peak Python heap of a separate traced run. Timings are of warm runs: the
+trading calendar and symbol universe are loaded once by the first run. The
+dividend fetchers' periods end at the last dividend of their symbols instead,
+since dividends are paid once a year and a short period ending elsewhere would
+usually be empty.
+
+Results are written as JSON; with ``--baseline`` they are compared with an
+earlier results file and the run exits with status 1 when a scenario got slower
+or used more memory than the threshold allows, or was timed in the baseline but
+is empty, failed or missing now.
+
+Usage::
+
+    PYTHONPATH=xiaoyuan:fmp-extension python benchmarks/fetchers.py --output results.json
+    PYTHONPATH=xiaoyuan python benchmarks/fetchers.py --symbols 1,50 --periods 1m,1y \\
+        --fetchers EquityHistorical,KeyMetrics --baseline results.json --threshold 0.2
+    PYTHONPATH=xiaoyuan python benchmarks/fetchers.py --database /data/synthetic.duckdb
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import platform
+import re
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Literal, Optional, Set, Tuple, get_args, get_origin
+from unittest import mock
+
+import pandas as pd
+from openbb_core.provider.utils.errors import EmptyDataError
+from openbb_xiaoyuan import openbb_xiaoyuan_provider
+from openbb_xiaoyuan.utils import backend
+from openbb_xiaoyuan.utils.duckdb_store import DuckDBBackend
+from openbb_xiaoyuan.utils.settings import get_settings
+from openbb_xiaoyuan.utils.synthetic import SyntheticConfig, load_synthetic
+from pandas.errors import EmptyDataError as PandasEmptyDataError
+
+STAGES = ("transform_query", "extract", "transform_data")
+
+# 按资产类型选取代码的接口, 其余接口使用个股
+ASSET_TYPES = {
+    "EtfSearch": "etf",
+    "EtfHistorical": "etf",
+    "IndexSearch": "index",
+    "IndexHistorical": "index",
+}
+
+# 分红接口的区间截止到最近一次分红, 值表示是否只看所选代码的分红
+DIVIDEND_FETCHERS = {
+    "CalendarDividend": False,
+    "HistoricalDividends": True,
+}
+
+# FMP 替身每个请求返回的行数: 按区间内的天、周、季度或年计, 其余为一行
+FMP_ROWS = {
+    "HistoricalRating": "days",
+    "GovernmentTrades": "weeks",
+    "Form13FHR": "quarters",
+    "AdvancedDcf": "years",
+}
+
+# 排除噪声: 绝对差值低于该毫秒数或兆字节数的变化不计为退化
+MIN_REGRESSION_MS = 5.0
+MIN_REGRESSION_MB = 1.0
+
+
+def parse_period(text: str) -> Tuple[str, int]:
+    """Return the label and length in days of a period such as ``1m`` or ``10y``."""
+    match = re.fullmatch(r"(\d+)([my])", text.strip())
+    if match is None:
+        raise argparse.ArgumentTypeError(f"Invalid period {text!r}; expected e.g. 1m or 10y.")
+    count, unit = int(match.group(1)), match.group(2)
+    return text.strip(), count * (31 if unit == "m" else 366)
+
+
+def display_symbol(symbol: str) -> str:
+    """Return an ``SH600519`` symbol in the ``600519.SS`` format the fetchers accept."""
+    exchange = "SS" if symbol[:2] == "SH" else symbol[:2]
+    return f"{symbol[2:]}.{exchange}"
+
+
+def last_dividend(store: DuckDBBackend, end: date, symbols: Optional[List[str]] = None) -> date:
+    """Return the last dividend date on or before ``end``, of ``symbols`` if given, or ``end`` if there is none."""
+    dividends = asyncio.run(store.dividends(date(1900, 1, 1), end, symbols))
+    if dividends is None or dividends.empty:
+        return end
+    return pd.Timestamp(dividends["date"].max()).date()
+
+
+def xiaoyuan_params(name: str, symbols: List[str], start: date, end: date, days: int) -> Dict[str, Any]:
+    """Return the query parameters of a XiaoYuan fetcher for a scenario."""
+    joined = ",".join(display_symbol(s) for s in symbols)
+    fields = openbb_xiaoyuan_provider.fetcher_dict[name].query_params_type.model_fields
+    candidates = {
+        "symbol": joined,
+        "query": joined,
+        "is_symbol": True,
+        "start_date": start,
+        "end_date": end,
+        # 报表接口按年报取数, 条数覆盖整个区间
+        "limit": max(1, round(days / 366)),
+    }
+    return {key: value for key, value in candidates.items() if key in fields}
+
+
+def stand_in_value(annotation: Any, i: int) -> Any:
+    """Return a value of the given type for the ``i``-th row of a canned response."""
+    if get_origin(annotation) is Literal:
+        return get_args(annotation)[0]
+    args = [a for a in get_args(annotation) if a is not type(None)]
+    if args:
+        return stand_in_value(args[0], i)
+    if annotation is bool:
+        return i % 2 == 0
+    if annotation is int:
+        return i
+    if annotation is float:
+        return round(100 + i * 0.37, 4)
+    if annotation in (date, datetime):
+        return (date(2024, 12, 31) - timedelta(days=i)).isoformat()
+    return f"S{i}"
+
+
+def stand_in_records(fetcher: Any, rows: int) -> List[Dict[str, Any]]:
+    """Return ``rows`` records keyed like the API fields of the fetcher's data model."""
+    model = fetcher.data_type
+    aliases = getattr(model, "__alias_dict__", {})
+    return [
+        {aliases.get(name, name): stand_in_value(field.annotation, i) for name, field in model.model_fields.items()}
+        for i in range(rows)
+    ]
+
+
+def fmp_rows(name: str, days: int) -> int:
+    """Return the rows of each canned FMP response in a period of ``days`` days."""
+    unit = FMP_ROWS.get(name)
+    if unit == "days":
+        return days * 5 // 7
+    if unit == "weeks":
+        return max(1, days // 7)
+    if unit == "quarters":
+        return max(1, days // 91)
+    if unit == "years":
+        return max(1, days // 366)
+    return 1
+
+
+def fmp_params(fetcher: Any, symbols: List[str], start: date, days: int) -> Dict[str, Any]:
+    """Return the query parameters of an FMP-extension fetcher for a scenario."""
+    fields = fetcher.query_params_type.model_fields
+    candidates = {"symbol": ",".join(symbols), "date": start, "chamber": "all", "limit": max(1, days // 7)}
+    return {key: value for key, value in candidates.items() if key in fields}
+
+
+def load_fmp() -> Tuple[Dict[str, Any], Optional[str]]:
+    """Return the FMP-extension fetchers, or none and the reason they cannot be imported."""
+    try:
+        module = importlib.import_module("openbb_fmp_extension")
+    except ImportError as exc:
+        return {}, f"{type(exc).__name__}: {exc}"
+    return dict(module.fmp_provider.fetcher_dict), None
+
+
+def run_stages(
+    fetcher: Any, params: Dict[str, Any], credentials: Optional[Dict[str, str]]
+) -> Tuple[Dict[str, float], int]:
+    """Run the three stages of a fetcher once and return their seconds and the output rows."""
+    timings = {}
+    start = time.perf_counter()
+    query = fetcher.transform_query(dict(params))
+    timings["transform_query"] = time.perf_counter() - start
+
+    async def extract() -> Tuple[Any, float]:
+        began = time.perf_counter()
+        data = await fetcher.aextract_data(query, credentials)
+        return data, time.perf_counter() - began
+
+    data, timings["extract"] = asyncio.run(extract())
+    start = time.perf_counter()
+    results = fetcher.transform_data(query, data)
+    timings["transform_data"] = time.perf_counter() - start
+    return timings, len(results)
+
+
+def measure(
+    run: Callable[[], Tuple[Dict[str, float], int]], repeat: int, budget: float, memory: bool
+) -> Dict[str, Any]:
+    """Return the best stage timings over ``repeat`` runs and the peak memory of a traced run.
+
+    Repeats stop early once the runs have taken ``budget`` seconds. A fetcher
+    raising ``EmptyDataError`` is reported as empty, other exceptions as errors.
+    """
+    result: Dict[str, Any] = {}
+    try:
+        if memory:
+            tracemalloc.start()
+            try:
+                _, rows = run()
+                result["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+            finally:
+                tracemalloc.stop()
+        best: Dict[str, float] = {}
+        spent = 0.0
+        for _ in range(repeat):
+            timings, rows = run()
+            for stage, seconds in timings.items():
+                best[stage] = min(best.get(stage, float("inf")), seconds)
+            spent += sum(timings.values())
+            if spent > budget:
+                break
+    except (EmptyDataError, PandasEmptyDataError):
+        return {**result, "status": "empty"}
+    except Exception as exc:  # pylint: disable=broad-except
+        message = " ".join(str(exc).split())
+        return {**result, "status": f"error: {type(exc).__name__}: {message}"[:200]}
+    total = sum(best.values())
+    result.update({f"{stage}_ms": round(best[stage] * 1000, 3) for stage in STAGES})
+    result.update(
+        {
+            "total_ms": round(total * 1000, 3),
+            "rows": rows,
+            "rows_per_sec": round(rows / total, 1) if total else None,
+            "status": "ok",
+        }
+    )
+    return result
+
+
+def prepare_store(args: argparse.Namespace, max_symbols: int, max_days: int) -> DuckDBBackend:
+    """Open the DuckDB database, or generate a synthetic dataset covering every scenario in memory."""
+    if args.database:
+        return DuckDBBackend(args.database)
+    store = DuckDBBackend()
+    config = SyntheticConfig(
+        stocks=max_symbols,
+        etfs=min(max_symbols, 300),
+        indices=min(max_symbols, 50),
+        # 多取一个月, 保证首日有前收盘价
+        start=args.end - timedelta(days=max_days + 31),
+        end=args.end,
+        seed=args.seed,
+    )
+    began = time.perf_counter()
+    counts = load_synthetic(store, config)
+    sys.stdout.write(f"synthetic data: {sum(counts.values())} rows in {time.perf_counter() - began:.1f} s\n")
+    return store
+
+
+def run_suite(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run every scenario and return the results document."""
+    periods = [parse_period(p) for p in args.periods.split(",")]
+    scales = [int(n) for n in args.symbols.split(",")]
+    wanted = set(args.fetchers.split(",")) if args.fetchers else None
+    store = prepare_store(args, max(scales), max(days for _, days in periods))
+    backend.register_backend("benchmark", lambda: store)
+    os.environ["XIAOYUAN_BACKEND"] = "benchmark"
+    get_settings.cache_clear()
+    listings = {
+        asset_type: store.load_listings(asset_type)["symbol"].tolist() for asset_type in ("stock", "etf", "index")
+    }
+
+    fmp_fetchers, fmp_skipped = load_fmp()
+    if fmp_skipped:
+        sys.stdout.write(f"skipping FMP-extension fetchers: {fmp_skipped}\n")
+    providers = {"xiaoyuan": dict(openbb_xiaoyuan_provider.fetcher_dict), "fmp_extension": fmp_fetchers}
+
+    results = []
+    for provider, fetchers in providers.items():
+        for name, fetcher in fetchers.items():
+            if wanted is not None and name not in wanted:
+                continue
+            for scale in scales:
+                end = args.end
+                if provider == "xiaoyuan" and name in DIVIDEND_FETCHERS:
+                    own = listings["stock"][:scale] if DIVIDEND_FETCHERS[name] else None
+                    end = last_dividend(store, args.end, own)
+                for label, days in periods:
+                    start = end - timedelta(days=days)
+                    if provider == "xiaoyuan":
+                        symbols = listings[ASSET_TYPES.get(name, "stock")][:scale]
+                        params = xiaoyuan_params(name, symbols, start, end, days)
+                        run = lambda f=fetcher, p=params: run_stages(f, p, None)  # noqa: E731
+                    else:
+                        symbols = [display_symbol(s).split(".")[0] for s in listings["stock"][:scale]]
+                        params = fmp_params(fetcher, symbols, start, days)
+                        records = stand_in_records(fetcher, fmp_rows(name, days))
+                        run = lambda f=fetcher, p=params, r=records: run_fmp(f, p, r)  # noqa: E731
+                    result = measure(run, args.repeat, args.budget, not args.no_memory)
+                    results.append(
+                        {
+                            "provider": provider,
+                            "fetcher": name,
+                            "symbols": scale,
+                            "symbols_used": len(symbols),
+                            "period": label,
+                            "end": end.isoformat(),
+                            **result,
+                        }
+                    )
+                    sys.stdout.write(format_result(results[-1]) + "\n")
+                    sys.stdout.flush()
+    store.close()
+    return {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "end": args.end.isoformat(),
+            "seed": args.seed,
+            "database": args.database,
+            "skipped": {"fmp_extension": fmp_skipped} if fmp_skipped else {},
+        },
+        "results": results,
+    }
+
+
+def run_fmp(fetcher: Any, params: Dict[str, Any], records: List[Dict[str, Any]]) -> Tuple[Dict[str, float], int]:
+    """Run an FMP-extension fetcher with ``amake_request`` answering every URL with ``records``."""
+
+    async def respond(url: str, **kwargs: Any) -> List[Dict[str, Any]]:  # pylint: disable=unused-argument
+        return [dict(r) for r in records]
+
+    with mock.patch.object(sys.modules[fetcher.__module__], "amake_request", respond):
+        return run_stages(fetcher, params, {"fmp_api_key": "benchmark"})
+
+
+def format_result(result: Dict[str, Any]) -> str:
+    """Return one line of the result table."""
+    head = f"{result['provider']:<14}{result['fetcher']:<26}{result['symbols']:>6}{result['period']:>8}"
+    if result["status"] != "ok":
+        return f"{head}  {result['status']}"
+    stages = "".join(f"{result[f'{stage}_ms']:>14.1f}" for stage in STAGES)
+    peak = f"{result['peak_mb']:>9.1f}" if "peak_mb" in result else f"{'-':>9}"
+    return f"{head}{stages}{result['total_ms']:>12.1f}{result['rows']:>9}{result['rows_per_sec']:>12.0f}{peak}"
+
+
+def compare(
+    results: List[Dict[str, Any]],
+    baseline: List[Dict[str, Any]],
+    threshold: float,
+    fetchers: Optional[Set[str]] = None,
+) -> List[str]:
+    """Return a line for every scenario slower or heavier than its baseline by more than ``threshold``.
+
+    Scenarios are matched on provider, fetcher, symbol count and period. A
+    scenario timed in the baseline is also reported when it is empty, failed or
+    missing now. Baseline scenarios outside the symbol counts and periods of
+    ``results``, or outside ``fetchers`` when given, were not run and are skipped.
+    """
+    key = lambda r: (r["provider"], r["fetcher"], r["symbols"], r["period"])  # noqa: E731
+    current = {key(r): r for r in results}
+    scales, periods = {r["symbols"] for r in results}, {r["period"] for r in results}
+    regressions = []
+    for before in baseline:
+        if before.get("status") != "ok" or before["symbols"] not in scales or before["period"] not in periods:
+            continue
+        if fetchers is not None and before["fetcher"] not in fetchers:
+            continue
+        name = " ".join(str(k) for k in key(before))
+        result = current.get(key(before))
+        if result is None:
+            regressions.append(f"{name}: missing")
+            continue
+        if result["status"] != "ok":
+            regressions.append(f"{name}: {result['status']}")
+            continue
+        for metric, floor in (("total_ms", MIN_REGRESSION_MS), ("peak_mb", MIN_REGRESSION_MB)):
+            old, new = before.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            if new > old * (1 + threshold) and new - old > floor:
+                regressions.append(f"{name}: {metric} {old} -> {new} (+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main() -> None:
+    """Run the benchmark suite, write the results and compare them with a baseline."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", default="1,50,1000", help="Comma-separated symbol counts.")
+    parser.add_argument("--periods", default="1m,1y,10y", help="Comma-separated periods, e.g. 1m,1y,10y.")
+    parser.add_argument("--fetchers", help="Comma-separated fetcher names; all by default.")
+    parser.add_argument("--end", type=date.fromisoformat, default=date(2024, 12, 31))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database", help="DuckDB database to read instead of generating synthetic data.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=10.0, help="Seconds after which repeats stop.")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the traced run measuring peak memory.")
+    parser.add_argument("--output", help="JSON file to write the results to.")
+    parser.add_argument("--baseline", help="Earlier results file to compare with.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative slowdown.")
+    args = parser.parse_args()
+    wanted = set(args.fetchers.split(",")) if args.fetchers else None
+
+    sys.stdout.write(
+        f"{'provider':<14}{'fetcher':<26}{'n':>6}{'period':>8}{'query_ms':>14}{'extract_ms':>14}"
+        f"{'transform_ms':>14}{'total_ms':>12}{'rows':>9}{'rows/s':>12}{'peak_mb':>9}\n"
+    )
+    document = run_suite(args)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(document, f, ensure_ascii=False, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(document["results"], baseline, args.threshold, wanted)
+        for line in regressions:
+            sys.stdout.write(f"REGRESSION {line}\n")
+        if regressions:
+            sys.exit(1)
+        sys.stdout.write(f"no regressions above {args.threshold:.0%}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Compare the long-form and wide quarterly statement plans of ``get_query_cnzvt_sql``.
+
+The previous script unpivoted the wide cn_zvt table to one row per factor,
+limited each (symbol, factor) group, then pivoted back to wide. The current
+script limits each symbol directly on the wide table. By default both plans
+run on an in-memory pandas stand-in shaped like ``income_statement_qtr``;
+pass ``--live`` to time the two DolphinDB scripts against the configured server.
+
+Usage::
+
+    python benchmarks/quarterly_statements.py --symbols 500 --quarters 80 --limit 4
+    python benchmarks/quarterly_statements.py --live --symbols 600519.SS,000001.SZ
+"""
+
+import argparse
+import sys
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+from openbb_xiaoyuan.utils.references import get_query_cnzvt_sql
+
+FACTORS = {
+    "total_op_income": "营业总收入",
+    "total_operating_costs": "营业总成本",
+    "operating_costs": "营业成本",
+    "rd_costs": "研发费用",
+    "eps": "每股收益",
+    "diluted_eps": "稀释每股收益",
+    "total_comprehensive_income": "综合收益总额",
+    "fi_interest_income": "其中：利息收入",
+    "fi_other_income": "其他收益",
+    "fi_net_profit_continuing_operations": "持续经营净利润",
+    "fi_iscontinued_operating_net_profit": "终止经营净利润",
+}
+
+
+def legacy_cnzvt_sql(factor_names: dict, symbol: list, table_name: str, limit: int) -> str:
+    """Return the unpivot and re-pivot script the quarterly path used before."""
+    # 表名与代码列表来自基准自身的固定输入
+    return f"""
+        t = select timestamp,report_date as 报告期, (upper(split(id,"_")[1])+split(id,"_")[2]) as symbol,
+        {', '.join(f"{key} as {value}" for key, value in factor_names.items())}
+        from loadTable("dfs://cn_zvt","{table_name}") where (upper(split(id,"_")[1])+split(id,"_")[2]) in {symbol};
+        t = t.unpivot(keyColNames=["timestamp","报告期","symbol"],valueColNames={list(factor_names.values())});
+        rename!(t,`timestamp`报告期`symbol`factor_name`value);
+        t = select timestamp, 报告期, symbol, factor_name, value from t
+            context by symbol, factor_name order by 报告期 limit {limit};
+        t = select value from t pivot by timestamp,symbol,报告期,factor_name;
+        select *,getFiscalQuarterFromTime(报告期) as fiscal_period,year(报告期) as fiscal_year
+        from t context by symbol,报告期;
+        """  # noqa: S608
+
+
+def stand_in_table(symbols: int, quarters: int, seed: int = 0) -> pd.DataFrame:
+    """Return a wide quarterly statement table with the cn_zvt column names."""
+    rng = np.random.default_rng(seed)
+    report_dates = pd.date_range(end="2024-12-31", periods=quarters, freq="QE")
+    codes = [f"SZ{i:06d}" for i in range(symbols)]
+    df = pd.DataFrame(
+        {
+            "symbol": np.repeat(codes, quarters),
+            "报告期": np.tile(report_dates, symbols),
+        }
+    )
+    df["timestamp"] = df["报告期"] + pd.Timedelta(days=30)
+    for column in FACTORS:
+        values = rng.normal(1e8, 1e7, len(df))
+        values[rng.random(len(df)) < 0.1] = np.nan
+        df[column] = values
+    # 存储顺序与报告期无关
+    return df.sample(frac=1.0, random_state=seed).reset_index(drop=True)
+
+
+def long_plan(table: pd.DataFrame, limit: int) -> pd.DataFrame:
+    """Unpivot, take the latest rows of each (symbol, factor), then pivot back."""
+    t = table.rename(columns=FACTORS)
+    t = t.melt(id_vars=["timestamp", "报告期", "symbol"], var_name="factor_name", value_name="value")
+    t = t.sort_values("报告期", kind="stable").groupby(["symbol", "factor_name"]).tail(limit)
+    t = t.pivot(index=["timestamp", "symbol", "报告期"], columns="factor_name", values="value")
+    return t.reset_index().rename_axis(columns=None)
+
+
+def wide_plan(table: pd.DataFrame, limit: int) -> pd.DataFrame:
+    """Take the latest rows of each symbol directly from the wide table."""
+    t = table.rename(columns=FACTORS)
+    t = t.sort_values("报告期", kind="stable").groupby("symbol").tail(limit)
+    return t[["timestamp", "symbol", "报告期", *FACTORS.values()]].reset_index(drop=True)
+
+
+def best_of(func: Callable[[], object], repeat: int) -> float:
+    """Return the best wall time of ``func`` in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run_stand_in(symbols: int, quarters: int, limit: int, repeat: int) -> Dict[str, float]:
+    """Time both plans on the stand-in table and check they return the same rows."""
+    table = stand_in_table(symbols, quarters)
+    columns = ["symbol", "报告期", *FACTORS.values()]
+    expected = long_plan(table, limit).sort_values(["symbol", "报告期"])[columns]
+    actual = wide_plan(table, limit).sort_values(["symbol", "报告期"])[columns]
+    pd.testing.assert_frame_equal(
+        expected.reset_index(drop=True), actual.reset_index(drop=True), check_dtype=False
+    )
+    return {
+        "long": best_of(lambda: long_plan(table, limit), repeat),
+        "wide": best_of(lambda: wide_plan(table, limit), repeat),
+    }
+
+
+def run_live(symbols: List[str], limit: int, repeat: int) -> Dict[str, float]:
+    """Time both DolphinDB scripts on the configured server, bypassing the query cache."""
+    # pylint: disable=import-outside-toplevel
+    from openbb_xiaoyuan.utils.references import convert_stock_code_format
+    from openbb_xiaoyuan.utils.session_pool import lease_reader
+
+    symbols = convert_stock_code_format(",".join(symbols)).split(",")
+    scripts = {
+        "long": legacy_cnzvt_sql(FACTORS, symbols, "income_statement_qtr", -limit),
+        "wide": get_query_cnzvt_sql(FACTORS, symbols, "income_statement_qtr", -limit),
+    }
+    with lease_reader() as reader:
+        return {
+            name: best_of(
+                lambda script=script: reader._run_query(script),  # pylint: disable=protected-access
+                repeat,
+            )
+            for name, script in scripts.items()
+        }
+
+
+def main() -> None:
+    """Run the comparison and print the best time of each plan."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", default="500")
+    parser.add_argument("--quarters", type=int, default=80)
+    parser.add_argument("--limit", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--live", action="store_true")
+    args = parser.parse_args()
+
+    if args.live:
+        timings = run_live(args.symbols.split(","), args.limit, args.repeat)
+    else:
+        timings = run_stand_in(int(args.symbols), args.quarters, args.limit, args.repeat)
+    for name, ms in timings.items():
+        sys.stdout.write(f"{name:<6}{ms:>10.1f} ms\n")
+    sys.stdout.write(f"speedup {timings['long'] / timings['wide']:.1f}x\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@
 
 from typing import Any, Dict, List, Literal, Optional
 
+import pandas as pd
 from openbb_core.provider.abstract.fetcher import Fetcher
 from openbb_core.provider.standard_models.balance_sheet import (
     BalanceSheetData,
@@ -14,14 +15,15 @@ from openbb_core.provider.utils.descriptions import (
     QUERY_DESCRIPTIONS,
 )
 from openbb_core.provider.utils.errors import EmptyDataError
+from openbb_xiaoyuan.utils.backend import get_backend
+from openbb_xiaoyuan.utils.postprocess import PostProcessSpec
 from openbb_xiaoyuan.utils.references import (
     convert_stock_code_format,
-    extractMonthDayFromTime,
-    get_query_finance_sql,
+    get_finance_query,
     get_report_month,
-    getFiscalQuarterFromTime,
-    revert_stock_code_format,
+    revert_stock_code_frame,
 )
+from openbb_xiaoyuan.utils.transform import validate_frame
 from pydantic import Field, field_validator, model_validator
 
 
@@ -29,6 +31,7 @@ class XiaoYuanBalanceSheetQueryParams(BalanceSheetQueryParams):
     """XiaoYuan Balance Sheet Query."""
 
     __json_schema_extra__ = {
+        "symbol": {"multiple_items_allowed": True},
         "period": {
             "choices": ["annual", "ytd"],
         }
@@ -175,10 +178,9 @@ class XiaoYuanBalanceSheetFetcher(
         query: XiaoYuanBalanceSheetQueryParams,
         credentials: Optional[Dict[str, str]],
         **kwargs: Any,
-    ) -> List[Dict]:
+    ) -> pd.DataFrame:
         """Return the raw data from the XiaoYuan endpoint."""
-        from jinniuai_data_store.reader import get_jindata_reader
-
+        symbols = query.symbol.split(",")
         factors = [
             "应收账款",
             "预付款项",
@@ -206,22 +208,18 @@ class XiaoYuanBalanceSheetFetcher(
             "其他综合收益",
             "净债务",
         ]
-        reader = get_jindata_reader()
         report_month = get_report_month(query.period, -query.limit)
-        finance_sql = get_query_finance_sql(factors, [query.symbol], report_month)
-        df = reader._run_query(
-            script=extractMonthDayFromTime + getFiscalQuarterFromTime + finance_sql,
+        df = await get_backend().finance_factors(
+            get_finance_query(factors, symbols, report_month, PostProcessSpec())
         )
         if df is None or df.empty:
             raise EmptyDataError()
-        df["报告期"] = df["报告期"].dt.strftime("%Y-%m-%d")
-        df.sort_values(by="报告期", ascending=False, inplace=True)
-        return df.to_dict(orient="records")
+        return df
 
     @staticmethod
     def transform_data(
-        query: XiaoYuanBalanceSheetQueryParams, data: List[Dict], **kwargs: Any
+        query: XiaoYuanBalanceSheetQueryParams, data: pd.DataFrame, **kwargs: Any
     ) -> List[XiaoYuanBalanceSheetData]:
         """Return the transformed data."""
-        data = revert_stock_code_format(data)
-        return [XiaoYuanBalanceSheetData.model_validate(d) for d in data]
+        data = revert_stock_code_frame(data)
+        return validate_frame(XiaoYuanBalanceSheetData, data)
@@ -2,6 +2,7 @@
 
 from typing import Any, Dict, List, Literal, Optional
 
+import pandas as pd
 from openbb_core.provider.abstract.fetcher import Fetcher
 from openbb_core.provider.standard_models.balance_sheet_growth import (
     BalanceSheetGrowthData,
@@ -12,14 +13,15 @@ from openbb_core.provider.utils.descriptions import (
     QUERY_DESCRIPTIONS,
 )
 from openbb_core.provider.utils.errors import EmptyDataError
+from openbb_xiaoyuan.utils.backend import get_backend
+from openbb_xiaoyuan.utils.postprocess import PostProcessSpec
 from openbb_xiaoyuan.utils.references import (
     convert_stock_code_format,
-    extractMonthDayFromTime,
-    get_query_finance_sql,
+    get_finance_query,
     get_report_month,
-    getFiscalQuarterFromTime,
-    revert_stock_code_format,
+    revert_stock_code_frame,
 )
+from openbb_xiaoyuan.utils.transform import validate_frame
 from pydantic import Field, model_validator
 
 
@@ -30,6 +32,7 @@ class XiaoYuanBalanceSheetGrowthQueryParams(BalanceSheetGrowthQueryParams):
     """
 
     __json_schema_extra__ = {
+        "symbol": {"multiple_items_allowed": True},
         "period": {
             "choices": ["annual", "ytd"],
         }
@@ -292,39 +295,30 @@ class XiaoYuanBalanceSheetGrowthFetcher(
         return XiaoYuanBalanceSheetGrowthQueryParams(**params)
 
     @staticmethod
-    def extract_data(
+    async def aextract_data(
         # pylint: disable=unused-argument
         query: XiaoYuanBalanceSheetGrowthQueryParams,
         credentials: Optional[Dict[str, str]],
         **kwargs: Any,
-    ) -> List[XiaoYuanBalanceSheetGrowthData]:
+    ) -> pd.DataFrame:
         """Extract the data from the XiaoYuan Finance endpoints."""
-        from jinniuai_data_store.reader import get_jindata_reader
-
-        reader = get_jindata_reader()
+        symbols = query.symbol.split(",")
         FIN_METRICS_PER_SHARE = [
             "总资产同比增长率（百分比）",
         ]
         report_month = get_report_month(query.period, -query.limit)
-        finance_sql = get_query_finance_sql(
-            FIN_METRICS_PER_SHARE, [query.symbol], report_month
-        )
-        df = reader._run_query(
-            script=extractMonthDayFromTime + getFiscalQuarterFromTime + finance_sql,
+        post_process = PostProcessSpec(percent_columns=tuple(FIN_METRICS_PER_SHARE))
+        df = await get_backend().finance_factors(
+            get_finance_query(FIN_METRICS_PER_SHARE, symbols, report_month, post_process)
         )
         if df is None or df.empty:
             raise EmptyDataError()
-        df["报告期"] = df["报告期"].dt.strftime("%Y-%m-%d")
-        columns_to_divide = FIN_METRICS_PER_SHARE
-        df[columns_to_divide] /= 100
-        df.sort_values(by="报告期", ascending=False, inplace=True)
-        data = df.to_dict(orient="records")
-        return data
+        return df
 
     @staticmethod
     def transform_data(
-        query: XiaoYuanBalanceSheetGrowthQueryParams, data: List[Dict], **kwargs: Any
+        query: XiaoYuanBalanceSheetGrowthQueryParams, data: pd.DataFrame, **kwargs: Any
     ) -> List[XiaoYuanBalanceSheetGrowthData]:
         """Return the transformed data."""
-        data = revert_stock_code_format(data)
-        return [XiaoYuanBalanceSheetGrowthData.model_validate(d) for d in data]
+        data = revert_stock_code_frame(data)
+        return validate_frame(XiaoYuanBalanceSheetGrowthData, data)
@@ -3,16 +3,18 @@
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
+import pandas as pd
 from dateutil.relativedelta import relativedelta
 from openbb_core.provider.abstract.fetcher import Fetcher
 from openbb_core.provider.standard_models.calendar_dividend import (
     CalendarDividendData,
     CalendarDividendQueryParams,
 )
+from openbb_xiaoyuan.utils.backend import get_backend
 from openbb_xiaoyuan.utils.references import (
-    get_dividend_sql,
-    revert_stock_code_format,
+    revert_stock_code_frame,
 )
+from openbb_xiaoyuan.utils.transform import validate_frame
 from pandas.errors import EmptyDataError
 from pydantic import field_validator
 
@@ -73,34 +75,26 @@ class XiaoYuanCalendarDividendFetcher(
         return XiaoYuanCalendarDividendQueryParams(**transformed_params)
 
     @staticmethod
-    def extract_data(
+    async def aextract_data(
         # pylint: disable=unused-argument
         query: XiaoYuanCalendarDividendQueryParams,
         credentials: Optional[Dict[str, str]],
         **kwargs: Any,
-    ) -> List[XiaoYuanCalendarDividendData]:
+    ) -> pd.DataFrame:
         """Extract the data from the XiaoYuan Finance endpoints."""
-        from jinniuai_data_store.reader import get_jindata_reader
-
-        reader = get_jindata_reader()
-
-        historical_start = reader.convert_to_db_date_format(query.start_date)
-        historical_end = reader.convert_to_db_date_format(query.end_date)
-        dividend_sql = get_dividend_sql(historical_start, historical_end)
-
-        df = reader._run_query(dividend_sql)
+        df = await get_backend().dividends(query.start_date, query.end_date)
         if df is None or df.empty:
             raise EmptyDataError()
         df.sort_values(by="date", ascending=False, inplace=True)
         date_columns = ["date", "recordDate", "paymentDate"]
         for col in date_columns:
             df[col] = df[col].dt.strftime("%Y-%m-%d")
-        return df.to_dict(orient="records")
+        return df
 
     @staticmethod
     def transform_data(
-        query: XiaoYuanCalendarDividendQueryParams, data: List[Dict], **kwargs: Any
+        query: XiaoYuanCalendarDividendQueryParams, data: pd.DataFrame, **kwargs: Any
     ) -> List[XiaoYuanCalendarDividendData]:
         """Return the transformed data."""
-        data = revert_stock_code_format(data)
-        return [XiaoYuanCalendarDividendData.model_validate(d) for d in data]
+        data = revert_stock_code_frame(data)
+        return validate_frame(XiaoYuanCalendarDividendData, data)
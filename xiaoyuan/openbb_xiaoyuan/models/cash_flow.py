@@ -2,6 +2,7 @@
 
 from typing import Any, Dict, List, Literal, Optional
 
+import pandas as pd
 from openbb_core.provider.abstract.fetcher import Fetcher
 from openbb_core.provider.standard_models.cash_flow import (
     CashFlowStatementData,
@@ -12,15 +13,15 @@ from openbb_core.provider.utils.descriptions import (
     QUERY_DESCRIPTIONS,
 )
 from openbb_core.provider.utils.errors import EmptyDataError
+from openbb_xiaoyuan.utils.backend import get_backend
+from openbb_xiaoyuan.utils.postprocess import PostProcessSpec
 from openbb_xiaoyuan.utils.references import (
     convert_stock_code_format,
-    extractMonthDayFromTime,
-    get_query_finance_sql,
-    get_query_cnzvt_sql,
+    get_finance_query,
     get_report_month,
-    getFiscalQuarterFromTime,
-    revert_stock_code_format,
+    revert_stock_code_frame,
 )
+from openbb_xiaoyuan.utils.transform import validate_frame
 from pydantic import Field, model_validator
 
 
@@ -28,6 +29,7 @@ class XiaoYuanCashFlowStatementQueryParams(CashFlowStatementQueryParams):
     """XiaoYuan Finance Cash Flow Statement Query."""
 
     __json_schema_extra__ = {
+        "symbol": {"multiple_items_allowed": True},
         "period": {
             "choices": ["annual", "quarter", "ytd"],
         }
@@ -99,15 +101,14 @@ class XiaoYuanCashFlowStatementFetcher(
         return XiaoYuanCashFlowStatementQueryParams(**params)
 
     @staticmethod
-    def extract_data(
+    async def aextract_data(
             # pylint: disable=unused-argument
             query: XiaoYuanCashFlowStatementQueryParams,
             credentials: Optional[Dict[str, str]],
             **kwargs: Any,
-    ) -> List[XiaoYuanCashFlowStatementData]:
+    ) -> pd.DataFrame:
         """Extract the data from the XiaoYuan Finance endpoints."""
-        from jinniuai_data_store.reader import get_jindata_reader
-
+        symbols = query.symbol.split(",")
         factors = [
             "经营活动产生的现金流量净额",
             "投资活动产生的现金流量净额",
@@ -123,30 +124,26 @@ class XiaoYuanCashFlowStatementFetcher(
             "cash_to_repay_borrowings": "偿还债务支付的现金",
         }
 
-        reader = get_jindata_reader()
         if query.period == "quarter":
-            df = reader._run_query(
-                script=get_query_cnzvt_sql(quarter_factors, [query.symbol], "cash_flow_statement_qtr", -query.limit)
+            df = await get_backend().statements(
+                "cash_flow_statement_qtr", quarter_factors, symbols, -query.limit, PostProcessSpec()
             )
         else:
             report_month = get_report_month(query.period, -query.limit)
-            finance_sql = get_query_finance_sql(factors, [query.symbol], report_month)
-            df = reader._run_query(
-                script=extractMonthDayFromTime + getFiscalQuarterFromTime + finance_sql,
+            df = await get_backend().finance_factors(
+                get_finance_query(factors, symbols, report_month, PostProcessSpec())
             )
         if df is None or df.empty:
             raise EmptyDataError()
-        df["报告期"] = df["报告期"].dt.strftime("%Y-%m-%d")
-        df.sort_values(by="报告期", ascending=False, inplace=True)
-        return df.to_dict(orient="records")
+        return df
 
     @staticmethod
     def transform_data(
             # pylint: disable=unused-argument
             query: XiaoYuanCashFlowStatementQueryParams,
-            data: List[Dict],
+            data: pd.DataFrame,
             **kwargs: Any,
     ) -> List[XiaoYuanCashFlowStatementData]:
         """Transform the data."""
-        data = revert_stock_code_format(data)
-        return [XiaoYuanCashFlowStatementData.model_validate(d) for d in data]
+        data = revert_stock_code_frame(data)
+        return validate_frame(XiaoYuanCashFlowStatementData, data)
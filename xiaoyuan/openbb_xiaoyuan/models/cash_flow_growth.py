@@ -2,6 +2,7 @@
 
 from typing import Any, Dict, List, Literal, Optional
 
+import pandas as pd
 from openbb_core.provider.abstract.fetcher import Fetcher
 from openbb_core.provider.standard_models.cash_flow_growth import (
     CashFlowStatementGrowthData,
@@ -12,15 +13,15 @@ from openbb_core.provider.utils.descriptions import (
     QUERY_DESCRIPTIONS,
 )
 from openbb_core.provider.utils.errors import EmptyDataError
+from openbb_xiaoyuan.utils.backend import get_backend
+from openbb_xiaoyuan.utils.postprocess import PostProcessSpec
 from openbb_xiaoyuan.utils.references import (
     convert_stock_code_format,
-    extractMonthDayFromTime,
-    get_query_finance_sql,
+    get_finance_query,
     get_report_month,
-    getFiscalQuarterFromTime,
-    revert_stock_code_format,
-    get_query_cnzvt_sql,
+    revert_stock_code_frame,
 )
+from openbb_xiaoyuan.utils.transform import validate_frame
 from pydantic import Field
 
 
@@ -31,6 +32,7 @@ class XiaoYuanCashFlowStatementGrowthQueryParams(CashFlowStatementGrowthQueryPar
     """
 
     __json_schema_extra__ = {
+        "symbol": {"multiple_items_allowed": True},
         "period": {
             "choices": ["annual", "quarter", "ytd"],
         }
@@ -249,16 +251,14 @@ class XiaoYuanCashFlowStatementGrowthFetcher(
         return XiaoYuanCashFlowStatementGrowthQueryParams(**params)
 
     @staticmethod
-    def extract_data(
+    async def aextract_data(
         # pylint: disable=unused-argument
         query: XiaoYuanCashFlowStatementGrowthQueryParams,
         credentials: Optional[Dict[str, str]],
         **kwargs: Any,
-    ) -> List[XiaoYuanCashFlowStatementGrowthData]:
+    ) -> pd.DataFrame:
         """Extract the data from the XiaoYuan Finance endpoints."""
-        from jinniuai_data_store.reader import get_jindata_reader
-
-        reader = get_jindata_reader()
+        symbols = query.symbol.split(",")
         FIN_METRICS_PER_SHARE = [
             "净利润同比增长率（百分比）",
             "经营活动产生的现金流量净额同比增长率（百分比）",
@@ -267,34 +267,26 @@ class XiaoYuanCashFlowStatementGrowthFetcher(
             "q_yoy_cfo": "经营活动产生的现金流量净额同比增长率（百分比）",
         }
         if query.period == "quarter":
-            columns_to_divide = list(FIN_METRICS_PER_SHARE_DICT.values())
-            cnzvt_sql = get_query_cnzvt_sql(FIN_METRICS_PER_SHARE_DICT, [query.symbol], "financial_index_qtr", -query.limit)
-            df = reader._run_query(
-                script=extractMonthDayFromTime + getFiscalQuarterFromTime + cnzvt_sql
+            post_process = PostProcessSpec(percent_columns=tuple(FIN_METRICS_PER_SHARE_DICT.values()))
+            df = await get_backend().statements(
+                "financial_index_qtr", FIN_METRICS_PER_SHARE_DICT, symbols, -query.limit, post_process
             )
         else:
-            columns_to_divide = FIN_METRICS_PER_SHARE
+            post_process = PostProcessSpec(percent_columns=tuple(FIN_METRICS_PER_SHARE))
             report_month = get_report_month(query.period, -query.limit)
-            finance_sql = get_query_finance_sql(
-                FIN_METRICS_PER_SHARE, [query.symbol], report_month
-            )
-            df = reader._run_query(
-                script=extractMonthDayFromTime + getFiscalQuarterFromTime + finance_sql,
+            df = await get_backend().finance_factors(
+                get_finance_query(FIN_METRICS_PER_SHARE, symbols, report_month, post_process)
             )
         if df is None or df.empty:
             raise EmptyDataError()
-        df["报告期"] = df["报告期"].dt.strftime("%Y-%m-%d")
-        df[columns_to_divide] /= 100
-        df.sort_values(by="报告期", ascending=False, inplace=True)
-        data = df.to_dict(orient="records")
-        return data
+        return df
 
     @staticmethod
     def transform_data(
         query: XiaoYuanCashFlowStatementGrowthQueryParams,
-        data: List[Dict],
+        data: pd.DataFrame,
         **kwargs: Any,
     ) -> List[XiaoYuanCashFlowStatementGrowthData]:
         """Return the transformed data."""
-        data = revert_stock_code_format(data)
-        return [XiaoYuanCashFlowStatementGrowthData.model_validate(d) for d in data]
+        data = revert_stock_code_frame(data)
+        return validate_frame(XiaoYuanCashFlowStatementGrowthData, data)
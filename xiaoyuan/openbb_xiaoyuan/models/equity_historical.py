@@ -5,6 +5,7 @@
 from datetime import datetime
 from typing import Any, Dict, List, Literal, Optional
 
+import pandas as pd
 from dateutil.relativedelta import relativedelta
 from openbb_core.provider.abstract.fetcher import Fetcher
 from openbb_core.provider.standard_models.equity_historical import (
@@ -16,10 +17,13 @@ from openbb_core.provider.utils.descriptions import (
     QUERY_DESCRIPTIONS,
 )
 from openbb_core.provider.utils.errors import EmptyDataError
+from openbb_xiaoyuan.utils.backend import get_backend
+from openbb_xiaoyuan.utils.calendar import aget_trading_calendar
 from openbb_xiaoyuan.utils.references import (
     convert_stock_code_format,
-    revert_stock_code_format,
+    revert_stock_code_frame,
 )
+from openbb_xiaoyuan.utils.transform import validate_frame
 from pydantic import Field
 
 
@@ -90,54 +94,41 @@ class XiaoYuanEquityHistoricalFetcher(
         return XiaoYuanEquityHistoricalQueryParams(**transformed_params)
 
     @staticmethod
-    def extract_data(
+    async def aextract_data(
         # pylint: disable=unused-argument
         query: XiaoYuanEquityHistoricalQueryParams,
         credentials: Optional[Dict[str, str]],
         **kwargs: Any,
-    ) -> List[XiaoYuanEquityHistoricalData]:
+    ) -> pd.DataFrame:
         """Extract the data from the XiaoYuan Finance endpoints."""
-        from jinniuai_data_store.reader import get_jindata_reader
-
-        reader = get_jindata_reader()
 
-        historical_start = reader.convert_to_db_date_format(
-            reader.get_adjacent_trade_day(query.start_date, -1)
-        )
-        historical_end = reader.convert_to_db_date_format(query.end_date)
+        calendar = await aget_trading_calendar()
+        previous_start = calendar.previous(query.start_date)
 
-        symbols_list = query.symbol.split(",")
+        # 多取开始日前一个交易日, 使返回的第一行也有涨跌基准
+        if pd.isna(previous_start):
+            previous_start = query.start_date
 
         factors = list(XiaoYuanEquityHistoricalData.__alias_dict__.values())
         factors.remove(XiaoYuanEquityHistoricalData.__alias_dict__["date"])
 
-        historical_sql = f"""
-            use mytt
-            t = select timestamp, symbol, factor_name ,value 
-            from loadTable("dfs://factors_6M", `cn_factors_1D) 
-            where factor_name in {factors} 
-            and timestamp between {historical_start} 
-            and {historical_end} 
-            and symbol in {symbols_list};
-
-            t = select value from t pivot by timestamp, symbol, factor_name;
-            update t set ref_close = REF({XiaoYuanEquityHistoricalData.__alias_dict__["close"]}, 1) context by symbol;
-            update t set change = {XiaoYuanEquityHistoricalData.__alias_dict__["close"]} - ref_close context by symbol;
-            update t set changeOverTime = change / ref_close  context by symbol;
-            select * from t where timestamp > {reader.convert_to_db_date_format(query.start_date)};
-        """
-        df = reader._run_query(
-            script=historical_sql,
+        df = await get_backend().daily_factors(
+            query.symbol.split(","),
+            factors,
+            previous_start,
+            query.end_date,
+            change_of=XiaoYuanEquityHistoricalData.__alias_dict__["close"],
+            after=query.start_date,
         )
         if df is None or df.empty:
             raise EmptyDataError()
-        return df.to_dict(orient="records")
+        return df
 
     @staticmethod
     def transform_data(
-        query: XiaoYuanEquityHistoricalQueryParams, data: List[Dict], **kwargs: Any
+        query: XiaoYuanEquityHistoricalQueryParams, data: pd.DataFrame, **kwargs: Any
     ) -> List[XiaoYuanEquityHistoricalData]:
         """Return the transformed data."""
-        data = revert_stock_code_format(data)
+        data = revert_stock_code_frame(data)
 
-        return [XiaoYuanEquityHistoricalData.model_validate(d) for d in data]
+        return validate_frame(XiaoYuanEquityHistoricalData, data)
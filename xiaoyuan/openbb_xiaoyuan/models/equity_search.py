@@ -12,10 +12,12 @@ from openbb_core.provider.standard_models.equity_search import (
     EquitySearchQueryParams,
 )
 from openbb_core.provider.utils.errors import EmptyDataError
+from openbb_xiaoyuan.utils.backend import get_backend
 from openbb_xiaoyuan.utils.references import (
     convert_stock_code_format,
-    revert_stock_code_format,
+    revert_stock_code_frame,
 )
+from openbb_xiaoyuan.utils.transform import validate_frame
 from pydantic import Field
 
 
@@ -73,37 +75,24 @@ class XiaoYuanEquitySearchFetcher(
         query: XiaoYuanEquitySearchQueryParams,
         credentials: Optional[Dict[str, str]],
         **kwargs: Any,
-    ) -> Dict:
+    ) -> pd.DataFrame:
         """Return the raw data from the XiaoYuan endpoint."""
-        # pylint: disable=import-outside-toplevel
-
-        from jinniuai_data_store.reader import get_jindata_reader
-
-        reader = get_jindata_reader()
-        stock_listing_info = """
-        select upper(split(entity_id,'_')[1])+split(entity_id,'_')[2] as symbol,
-        name,exchange,list_date,end_date from loadTable("dfs://cn_zvt", `stock)
-        where exchange in ['sh','sz'] 
-        """
-        query_symbol = f"""and upper(split(entity_id,'_')[1])+split(entity_id,'_')[2] in {query.query.split(",")}"""
-        if query.is_symbol:
-            df = reader._run_query(stock_listing_info + query_symbol)
-        else:
-            df = reader._run_query(stock_listing_info)
+        df = await get_backend().listings(
+            "stock",
+            query.query.split(",") if query.is_symbol else None,
+            exchanges=["sh", "sz"],
+        )
         if df is None or df.empty:
             raise EmptyDataError()
         df["list_date"] = df["list_date"].dt.strftime("%Y-%m-%d")
         df["end_date"] = df["end_date"].dt.strftime("%Y-%m-%d")
-        return df.to_dict(orient="records")
+        return df
 
     @staticmethod
     def transform_data(
-        query: XiaoYuanEquitySearchQueryParams, data: Dict, **kwargs: Any
+        query: XiaoYuanEquitySearchQueryParams, data: pd.DataFrame, **kwargs: Any
     ) -> List[XiaoYuanEquitySearchData]:
         """Transform the data to the standard format."""
-        data = revert_stock_code_format(data)
-        data = [
-            {**d, "end_date": None if pd.isna(d.get("end_date")) else d["end_date"]}
-            for d in data
-        ]
-        return [XiaoYuanEquitySearchData.model_validate(d) for d in data]
+        data = revert_stock_code_frame(data)
+        data["end_date"] = data["end_date"].astype(object).where(data["end_date"].notna(), None)
+        return validate_frame(XiaoYuanEquitySearchData, data)
@@ -10,12 +10,14 @@ from openbb_core.provider.standard_models.equity_valuation_multiples import (
 )
 from openbb_core.provider.utils.descriptions import DATA_DESCRIPTIONS
 from openbb_core.provider.utils.errors import EmptyDataError
+from openbb_xiaoyuan.utils.backend import get_backend
 from openbb_xiaoyuan.utils.references import (
     convert_stock_code_format,
-    get_recent_1q_query_finance_sql,
-    get_specific_daily_sql,
-    revert_stock_code_format,
+    get_recent_1q_query,
+    revert_stock_code_frame,
 )
+from openbb_xiaoyuan.utils.transform import validate_frame
+from openbb_xiaoyuan.utils.universe import aget_symbol_universe
 from pydantic import Field
 
 # pylint: disable=unused-argument
@@ -64,61 +66,37 @@ class XiaoYuanEquityValuationMultiplesFetcher(
         query: XiaoYuanEquityValuationMultiplesQueryParams,
         credentials: Optional[Dict[str, str]],
         **kwargs: Any,
-    ) -> List[Dict]:
+    ) -> pd.DataFrame:
         """Return the raw data from the XiaoYuan endpoint."""
-        from jinniuai_data_store.reader import get_jindata_reader
-
         symbols = query.symbol.split(",")
         factors = [
             "市盈率（滚动）",
             "市销率（滚动）",
             "投入资本回报率ROIC（TTM）（百分比）",
         ]
-        reader = get_jindata_reader()
-        stock_listing_info = reader.get_stocks().symbol.tolist()
-        symbols = [s for s in symbols if s in stock_listing_info]
-        if not symbols:
+
+        universe = await aget_symbol_universe()
+        listed = universe.filter(symbols, asset_type="stock")
+        if not listed:
             raise EmptyDataError()
-        # 获取当前时间
-        cur_date = pd.Timestamp.now().strftime("%Y.%m.%d")
-        # 获取最近一个报告期的财务数据
-        df_sql = get_recent_1q_query_finance_sql(
-            factors, symbols, reader.convert_to_db_date_format(cur_date)
+
+        # 最近一个报告期的财务数据与其后首个交易日的日频数据连接
+        backend = get_backend()
+        snapshot = await backend.latest_snapshot()
+        df = await backend.daily_asof(
+            get_recent_1q_query(factors, listed, pd.Timestamp.now(), snapshot), forward=True
         )
-        df = reader._run_query(df_sql)
         if df is None or df.empty:
             raise EmptyDataError()
-        date_list = df["报告期"].tolist()
-        date_list = [
-            (
-                reader.get_adjacent_trade_day(i, 0).strftime("%Y.%m.%d")
-                if reader.get_adjacent_trade_day(i, 0).strftime("%Y.%m.%d") == i
-                else reader.get_adjacent_trade_day(i, 1).strftime("%Y.%m.%d")
-            )
-            for i in date_list
-        ]
-
-        daily_sql = get_specific_daily_sql(factors, symbols, date_list)
-        df_daily = reader._run_query(daily_sql)
-        df = pd.merge_asof(
-            df,
-            df_daily,
-            left_on=["报告期"],
-            right_on=["timestamp"],
-            direction="forward",
-        )
-
-        df = df.drop(columns=["timestamp_y", "symbol_y", "报告期", "timestamp_x"])
-        df = df.rename(columns={"symbol_x": "symbol"})
-        data = df.to_dict(orient="records")
-        return data
+        df = df.drop(columns=["报告期", "timestamp"], errors="ignore")
+        return df
 
     @staticmethod
     def transform_data(
         query: XiaoYuanEquityValuationMultiplesQueryParams,
-        data: List[Dict],
+        data: pd.DataFrame,
         **kwargs: Any,
     ) -> List[XiaoYuanEquityValuationMultiplesData]:
         """Return the transformed data."""
-        data = revert_stock_code_format(data)
-        return [XiaoYuanEquityValuationMultiplesData.model_validate(d) for d in data]
+        data = revert_stock_code_frame(data)
+        return validate_frame(XiaoYuanEquityValuationMultiplesData, data)
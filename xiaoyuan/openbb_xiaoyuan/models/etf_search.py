@@ -12,10 +12,12 @@ from openbb_core.provider.standard_models.etf_search import (
     EtfSearchQueryParams,
 )
 from openbb_core.provider.utils.errors import EmptyDataError
+from openbb_xiaoyuan.utils.backend import get_backend
 from openbb_xiaoyuan.utils.references import (
     convert_stock_code_format,
-    revert_stock_code_format,
+    revert_stock_code_frame,
 )
+from openbb_xiaoyuan.utils.transform import validate_frame
 from pydantic import Field
 
 
@@ -66,41 +68,27 @@ class XiaoYuanEtfSearchFetcher(
         query: XiaoYuanEtfSearchQueryParams,
         credentials: Optional[Dict[str, str]],
         **kwargs: Any,
-    ) -> List[Dict]:
+    ) -> pd.DataFrame:
         """Return the raw data from the XiaoYuan endpoint."""
-        # pylint: disable=import-outside-toplevel
-
-        from jinniuai_data_store.reader import get_jindata_reader
-
-        reader = get_jindata_reader()
-        etf_listing_info = """
-        select upper(split(entity_id,'_')[1])+split(entity_id,'_')[2] as symbol,
-        name,exchange,list_date,end_date from loadTable("dfs://cn_zvt", `etf) 
-        """
-        query_etf = f"""where upper(split(entity_id,'_')[1])+split(entity_id,'_')[2] in {query.query.split(",")}"""
-        if query.query:
-            df = reader._run_query(etf_listing_info + query_etf)
-        else:
-            df = reader._run_query(etf_listing_info)
+        df = await get_backend().listings(
+            "etf", query.query.split(",") if query.query else None
+        )
         if query.is_active:
             df = df.query("end_date.isnull()")
         if df is None or df.empty:
             raise EmptyDataError()
         df["list_date"] = df["list_date"].dt.strftime("%Y-%m-%d")
         df["end_date"] = df["end_date"].dt.strftime("%Y-%m-%d")
-        return df.to_dict(orient="records")
+        return df
 
     @staticmethod
     def transform_data(
         query: XiaoYuanEtfSearchQueryParams,
-        data: List[Dict],
+        data: pd.DataFrame,
         **kwargs: Any,
     ) -> List[XiaoYuanEtfSearchData]:
         """Transform data."""
         # pylint: disable=import-outside-toplevel
-        data = revert_stock_code_format(data)
-        data = [
-            {**d, "end_date": None if pd.isna(d.get("end_date")) else d["end_date"]}
-            for d in data
-        ]
-        return [XiaoYuanEtfSearchData.model_validate(d) for d in data]
+        data = revert_stock_code_frame(data)
+        data["end_date"] = data["end_date"].astype(object).where(data["end_date"].notna(), None)
+        return validate_frame(XiaoYuanEtfSearchData, data)
@@ -2,6 +2,7 @@
 
 from typing import Any, Dict, List, Literal, Optional
 
+import pandas as pd
 from openbb_core.provider.abstract.fetcher import Fetcher
 from openbb_core.provider.standard_models.financial_ratios import (
     FinancialRatiosData,
@@ -9,14 +10,15 @@ from openbb_core.provider.standard_models.financial_ratios import (
 )
 from openbb_core.provider.utils.descriptions import QUERY_DESCRIPTIONS
 from openbb_core.provider.utils.errors import EmptyDataError
+from openbb_xiaoyuan.utils.backend import get_backend
+from openbb_xiaoyuan.utils.postprocess import PostProcessSpec
 from openbb_xiaoyuan.utils.references import (
     convert_stock_code_format,
-    extractMonthDayFromTime,
-    get_query_finance_sql,
+    get_finance_query,
     get_report_month,
-    getFiscalQuarterFromTime,
-    revert_stock_code_format,
+    revert_stock_code_frame,
 )
+from openbb_xiaoyuan.utils.transform import validate_frame
 from pydantic import Field, model_validator
 
 
@@ -27,6 +29,7 @@ class XiaoYuanFinancialRatiosQueryParams(FinancialRatiosQueryParams):
     """
 
     __json_schema_extra__ = {
+        "symbol": {"multiple_items_allowed": True},
         "period": {
             "choices": ["annual", "ytd"],
         }
@@ -279,16 +282,14 @@ class XiaoYuanFinancialRatiosFetcher(
         return XiaoYuanFinancialRatiosQueryParams(**params)
 
     @staticmethod
-    def extract_data(
+    async def aextract_data(
         # pylint: disable=unused-argument
         query: XiaoYuanFinancialRatiosQueryParams,
         credentials: Optional[Dict[str, str]],
         **kwargs: Any,
-    ) -> List[XiaoYuanFinancialRatiosData]:
+    ) -> pd.DataFrame:
         """Extract the data from the XiaoYuan Finance endpoints."""
-        from jinniuai_data_store.reader import get_jindata_reader
-
-        reader = get_jindata_reader()
+        symbols = query.symbol.split(",")
         FIN_METRICS_PER_SHARE = [
             "流动比率",
             "速动比率",
@@ -313,17 +314,7 @@ class XiaoYuanFinancialRatiosFetcher(
             "资产负债率",
             "产权比率",
         ]
-        report_month = get_report_month(query.period, -query.limit)
-        finance_sql = get_query_finance_sql(
-            FIN_METRICS_PER_SHARE, [query.symbol], report_month
-        )
-        df = reader._run_query(
-            script=extractMonthDayFromTime + getFiscalQuarterFromTime + finance_sql,
-        )
-        if df is None or df.empty:
-            raise EmptyDataError()
-        df["报告期"] = df["报告期"].dt.strftime("%Y-%m-%d")
-        columns_to_divide = [
+        percent_columns = (
             "净资产收益率ROE（摊薄）（百分比）",
             "总资产净利率ROA（百分比）",
             "投入资本回报率ROIC（百分比）",
@@ -334,15 +325,22 @@ class XiaoYuanFinancialRatiosFetcher(
             "利润总额比息税前利润",
             "息税前利润比营业总收入",
             "资产负债率",
-        ]
-        df[columns_to_divide] /= 100
-        df.sort_values(by="报告期", ascending=False, inplace=True)
-        return df.to_dict(orient="records")
+        )
+        report_month = get_report_month(query.period, -query.limit)
+        post_process = PostProcessSpec(
+            percent_columns=percent_columns, date_columns=(), date_text_columns=("报告期",)
+        )
+        df = await get_backend().finance_factors(
+            get_finance_query(FIN_METRICS_PER_SHARE, symbols, report_month, post_process)
+        )
+        if df is None or df.empty:
+            raise EmptyDataError()
+        return df
 
     @staticmethod
     def transform_data(
-        query: XiaoYuanFinancialRatiosQueryParams, data: List[Dict], **kwargs: Any
+        query: XiaoYuanFinancialRatiosQueryParams, data: pd.DataFrame, **kwargs: Any
     ) -> List[XiaoYuanFinancialRatiosData]:
         """Return the transformed data."""
-        data = revert_stock_code_format(data)
-        return [XiaoYuanFinancialRatiosData.model_validate(d) for d in data]
+        data = revert_stock_code_frame(data)
+        return validate_frame(XiaoYuanFinancialRatiosData, data)
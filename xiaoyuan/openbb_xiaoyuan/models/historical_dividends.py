@@ -6,17 +6,19 @@ from datetime import (
 )
 from typing import Any, Dict, List, Optional
 
+import pandas as pd
 from dateutil.relativedelta import relativedelta
 from openbb_core.provider.abstract.fetcher import Fetcher
 from openbb_core.provider.standard_models.historical_dividends import (
     HistoricalDividendsData,
     HistoricalDividendsQueryParams,
 )
+from openbb_xiaoyuan.utils.backend import get_backend
 from openbb_xiaoyuan.utils.references import (
     convert_stock_code_format,
-    get_dividend_sql,
-    revert_stock_code_format,
+    revert_stock_code_frame,
 )
+from openbb_xiaoyuan.utils.transform import validate_frame
 from pandas.errors import EmptyDataError
 from pydantic import Field, field_validator
 
@@ -85,37 +87,29 @@ class XiaoYuanHistoricalDividendsFetcher(
         return XiaoYuanHistoricalDividendsQueryParams(**params)
 
     @staticmethod
-    def extract_data(
+    async def aextract_data(
         # pylint: disable=unused-argument
         query: XiaoYuanHistoricalDividendsQueryParams,
         credentials: Optional[Dict[str, str]],
         **kwargs: Any,
-    ) -> List[XiaoYuanHistoricalDividendsData]:
+    ) -> pd.DataFrame:
         """Extract the data from the XiaoYuan Finance endpoints."""
-        from jinniuai_data_store.reader import get_jindata_reader
-
-        reader = get_jindata_reader()
-
-        historical_start = reader.convert_to_db_date_format(query.start_date)
-        historical_end = reader.convert_to_db_date_format(query.end_date)
-        dividend_sql = get_dividend_sql(
-            historical_start, historical_end, query.symbol[-6:]
+        df = await get_backend().dividends(
+            query.start_date, query.end_date, query.symbol.split(",") if query.symbol else None
         )
-
-        df = reader._run_query(dividend_sql)
         if df is None or df.empty:
             raise EmptyDataError()
         df.sort_values(by="date", ascending=False, inplace=True)
         date_columns = ["date", "recordDate", "paymentDate"]
         for col in date_columns:
             df[col] = df[col].dt.strftime("%Y-%m-%d")
-        return df.to_dict(orient="records")
+        return df
 
     @staticmethod
     def transform_data(
-        query: XiaoYuanHistoricalDividendsQueryParams, data: List[Dict], **kwargs: Any
+        query: XiaoYuanHistoricalDividendsQueryParams, data: pd.DataFrame, **kwargs: Any
     ) -> List[XiaoYuanHistoricalDividendsData]:
         """Return the transformed data."""
-        data = revert_stock_code_format(data)
+        data = revert_stock_code_frame(data)
 
-        return [XiaoYuanHistoricalDividendsData.model_validate(d) for d in data]
+        return validate_frame(XiaoYuanHistoricalDividendsData, data)
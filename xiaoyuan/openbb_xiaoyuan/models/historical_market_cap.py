@@ -3,17 +3,19 @@
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
-from jinniuai_data_store.reader import get_jindata_reader
+import pandas as pd
 from openbb_core.provider.abstract.fetcher import Fetcher
 from openbb_core.provider.standard_models.historical_market_cap import (
     HistoricalMarketCapData,
     HistoricalMarketCapQueryParams,
 )
 from openbb_core.provider.utils.errors import EmptyDataError
+from openbb_xiaoyuan.utils.backend import get_backend
 from openbb_xiaoyuan.utils.references import (
     convert_stock_code_format,
-    revert_stock_code_format,
+    revert_stock_code_frame,
 )
+from openbb_xiaoyuan.utils.transform import validate_frame
 
 
 class XiaoYuanHistoricalMarketCapQueryParams(HistoricalMarketCapQueryParams):
@@ -66,48 +68,32 @@ class XiaoYuanHistoricalMarketCapFetcher(
         return XiaoYuanHistoricalMarketCapQueryParams(**transformed_params)
 
     @staticmethod
-    def extract_data(
+    async def aextract_data(
         # pylint: disable=unused-argument
         query: XiaoYuanHistoricalMarketCapQueryParams,
         credentials: Optional[Dict[str, str]],
         **kwargs: Any,
-    ) -> List[XiaoYuanHistoricalMarketCapData]:
+    ) -> pd.DataFrame:
         """Extract the data from the XiaoYuan Finance endpoints."""
-        reader = get_jindata_reader()
-
-        historical_start = reader.convert_to_db_date_format(query.start_date)
-        historical_end = reader.convert_to_db_date_format(query.end_date)
-
-        symbols_list = query.symbol.split(",")
 
         factors = list(XiaoYuanHistoricalMarketCapData.__alias_dict__.values())
         factors.remove(XiaoYuanHistoricalMarketCapData.__alias_dict__["date"])
 
-        historical_sql = f"""
-            t = select timestamp, symbol, factor_name ,value 
-            from loadTable("dfs://factors_6M", `cn_factors_1D) 
-            where factor_name in {factors} 
-            and timestamp between {historical_start} 
-            and {historical_end} 
-            and symbol in {symbols_list};
-
-            select value from t pivot by timestamp, symbol, factor_name;
-        """
-        df = reader._run_query(
-            script=historical_sql,
+        df = await get_backend().daily_factors(
+            query.symbol.split(","), factors, query.start_date, query.end_date
         )
         if df is None or df.empty:
             raise EmptyDataError()
         df.sort_values(by="timestamp", ascending=False, inplace=True)
-        return df.to_dict(orient="records")
+        return df
 
     @staticmethod
     def transform_data(
         query: XiaoYuanHistoricalMarketCapQueryParams,
-        data: List[Dict],
+        data: pd.DataFrame,
         **kwargs: Any,
     ) -> List[XiaoYuanHistoricalMarketCapData]:
         """Return the transformed data."""
-        data = revert_stock_code_format(data)
+        data = revert_stock_code_frame(data)
 
-        return [XiaoYuanHistoricalMarketCapData.model_validate(d) for d in data]
+        return validate_frame(XiaoYuanHistoricalMarketCapData, data)
@@ -3,6 +3,7 @@
 # pylint: disable=unused-argument
 from typing import Any, Dict, List, Literal, Optional
 
+import pandas as pd
 from openbb_core.provider.abstract.fetcher import Fetcher
 from openbb_core.provider.standard_models.income_statement import (
     IncomeStatementData,
@@ -13,15 +14,15 @@ from openbb_core.provider.utils.descriptions import (
     QUERY_DESCRIPTIONS,
 )
 from openbb_core.provider.utils.errors import EmptyDataError
+from openbb_xiaoyuan.utils.backend import get_backend
+from openbb_xiaoyuan.utils.postprocess import PostProcessSpec
 from openbb_xiaoyuan.utils.references import (
     convert_stock_code_format,
-    extractMonthDayFromTime,
-    get_query_finance_sql,
+    get_finance_query,
     get_report_month,
-    getFiscalQuarterFromTime,
-    revert_stock_code_format,
-    get_query_cnzvt_sql,
+    revert_stock_code_frame,
 )
+from openbb_xiaoyuan.utils.transform import validate_frame
 from pydantic import Field, model_validator
 
 
@@ -29,6 +30,7 @@ class XiaoYuanIncomeStatementQueryParams(IncomeStatementQueryParams):
     """XiaoYuan Income Statement Query."""
 
     __json_schema_extra__ = {
+        "symbol": {"multiple_items_allowed": True},
         "period": {
             "choices": ["annual", "quarter", "ytd"],
         }
@@ -134,9 +136,8 @@ class XiaoYuanIncomeStatementFetcher(
         query: XiaoYuanIncomeStatementQueryParams,
         credentials: Optional[Dict[str, str]],
         **kwargs: Any,
-    ) -> List[Dict]:
-        from jinniuai_data_store.reader import get_jindata_reader
-
+    ) -> pd.DataFrame:
+        symbols = query.symbol.split(",")
         factors = [
             "营业总收入",
             "营业总成本",
@@ -167,30 +168,25 @@ class XiaoYuanIncomeStatementFetcher(
             "fi_iscontinued_operating_net_profit": "终止经营净利润",
         }
 
-        reader = get_jindata_reader()
+        # 公告日作为额外字段原样输出为文本
+        post_process = PostProcessSpec(date_text_columns=("timestamp",))
         if query.period == "quarter":
-            cnzvt_sql = get_query_cnzvt_sql(quarter_factors, [query.symbol], "income_statement_qtr", -query.limit)
-            df = reader._run_query(
-                script=extractMonthDayFromTime + getFiscalQuarterFromTime + cnzvt_sql
+            df = await get_backend().statements(
+                "income_statement_qtr", quarter_factors, symbols, -query.limit, post_process
             )
         else:
             report_month = get_report_month(query.period, -query.limit)
-            finance_sql = get_query_finance_sql(factors, [query.symbol], report_month)
-            df = reader._run_query(
-                script=extractMonthDayFromTime + getFiscalQuarterFromTime + finance_sql,
+            df = await get_backend().finance_factors(
+                get_finance_query(factors, symbols, report_month, post_process)
             )
         if df is None or df.empty:
             raise EmptyDataError()
-        df["报告期"] = df["报告期"].dt.strftime("%Y-%m-%d")
-        df["timestamp"] = df["timestamp"].dt.strftime("%Y-%m-%d")
-        df.sort_values(by="报告期", ascending=False, inplace=True)
-        data = df.to_dict(orient="records")
-        return data
+        return df
 
     @staticmethod
     def transform_data(
-        query: XiaoYuanIncomeStatementQueryParams, data: List[Dict], **kwargs: Any
+        query: XiaoYuanIncomeStatementQueryParams, data: pd.DataFrame, **kwargs: Any
     ) -> List[XiaoYuanIncomeStatementData]:
         """Return the transformed data."""
-        data = revert_stock_code_format(data)
-        return [XiaoYuanIncomeStatementData.model_validate(d) for d in data]
+        data = revert_stock_code_frame(data)
+        return validate_frame(XiaoYuanIncomeStatementData, data)
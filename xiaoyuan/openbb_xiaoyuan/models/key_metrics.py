@@ -16,15 +16,16 @@ from openbb_core.provider.utils.descriptions import (
     QUERY_DESCRIPTIONS,
 )
 from openbb_core.provider.utils.errors import EmptyDataError
+from openbb_xiaoyuan.utils.backend import get_backend
+from openbb_xiaoyuan.utils.postprocess import PostProcessSpec
 from openbb_xiaoyuan.utils.references import (
     convert_stock_code_format,
-    extractMonthDayFromTime,
-    get_query_finance_sql,
+    get_finance_query,
     get_report_month,
-    get_specific_daily_sql,
-    getFiscalQuarterFromTime,
-    revert_stock_code_format,
+    revert_stock_code_frame,
 )
+from openbb_xiaoyuan.utils.transform import validate_frame
+from openbb_xiaoyuan.utils.universe import aget_symbol_universe
 from pydantic import Field
 
 
@@ -146,10 +147,8 @@ class XiaoYuanKeyMetricsFetcher(
         query: XiaoYuanKeyMetricsQueryParams,
         credentials: Optional[Dict[str, str]],
         **kwargs: Any,
-    ) -> List[Dict]:
+    ) -> pd.DataFrame:
         """Return the raw data from the  XiaoYuan endpoint."""
-        from jinniuai_data_store.reader import get_jindata_reader
-
         factors = [
             "每股收益EPSTTM（元）",
             "营运资本",
@@ -174,76 +173,38 @@ class XiaoYuanKeyMetricsFetcher(
             "市净率（静态）",
             "股息率",
         ]
-        reader = get_jindata_reader()
-        symbols = query.symbol.split(",")
-        stock_listing_info = reader.get_stocks().symbol.tolist()
-        symbols = [s for s in symbols if s in stock_listing_info]
+
+        universe = await aget_symbol_universe()
+        symbols = universe.filter(query.symbol.split(","), asset_type="stock")
         if not symbols:
             raise EmptyDataError()
-        report_month = get_report_month(query.period, -query.limit)
-        finance_sql = get_query_finance_sql(factors, symbols, report_month)
-        df = reader._run_query(
-            script=extractMonthDayFromTime + getFiscalQuarterFromTime + finance_sql,
+        # 财务与日频因子按股票做 as-of 连接, DolphinDB 后端在一个脚本内完成
+        df = await get_backend().daily_asof(
+            get_finance_query(factors, symbols, get_report_month(query.period, -query.limit)),
+            PostProcessSpec(date_columns=(), date_text_columns=("报告期",)),
         )
-        df = df.sort_values(by=["报告期"])
         if df is None or df.empty:
             raise EmptyDataError()
-        date_list = df["报告期"].tolist()
-        date_list = [
-            reader.get_adjacent_trade_day(i, -1).strftime("%Y.%m.%d") for i in date_list
-        ]
-
-        daily_sql = get_specific_daily_sql(factors, symbols, date_list)
-        df_daily = reader._run_query(daily_sql)
-        df = pd.merge_asof(
-            df,
-            df_daily,
-            left_on=["报告期"],
-            right_on=["timestamp"],
-            direction="backward",
-        )
-        # 删除不必要的列
-        df = df.drop(columns=["timestamp_y", "symbol_y"])
-        df = df.rename(columns={"timestamp_x": "timestamp", "symbol_x": "symbol"})
-        df["报告期"] = df["报告期"].dt.strftime("%Y-%m-%d")
-        df.sort_values(by="报告期", ascending=False, inplace=True)
-        data = df.to_dict(orient="records")
-        return data
+        return df
 
     @staticmethod
     def transform_data(
         query: XiaoYuanKeyMetricsQueryParams,
-        data: List[Dict],
+        data: pd.DataFrame,
         **kwargs: Any,
     ) -> List[XiaoYuanKeyMetricsData]:
         """Validate and transform the data."""
-        data = revert_stock_code_format(data)
-
-        # Sort the results by the order of the symbols in the query.
-        symbols = query.symbol.split(",")
-        data = sorted(
-            data,
-            key=(
-                lambda item: (
-                    symbols.index(item["symbol"])
-                    if item["symbol"] in symbols
-                    else len(symbols)
-                )
-            ),
-        )
-
-        results: List[XiaoYuanKeyMetricsData] = []
-        for item in data:
-
-            if item.get("总市值") is None or isinstance(item.get("总市值"), dict):
-                warn(f"Symbol Error: No data found for {item.get('symbol')}")
-                continue
-
-            for key, value in item.copy().items():
-                # A bad response in a field will return a dict here, so we remove it.
-                if isinstance(value, dict):
-                    _ = item.pop(key)
-
-            results.append(XiaoYuanKeyMetricsData.model_validate(item))
-
-        return results
+        data = revert_stock_code_frame(data)
+
+        market_cap = data.get("总市值", pd.Series(None, index=data.index, dtype=object))
+        missing = market_cap.map(lambda v: v is None or isinstance(v, dict)).astype(bool)
+        for symbol in data.loc[missing, "symbol"]:
+            warn(f"Symbol Error: No data found for {symbol}")
+        data = data[~missing].copy()
+        # A bad response in a field will return a dict here, so we remove it.
+        for column in data.columns:
+            bad = data[column].map(lambda v: isinstance(v, dict)).astype(bool)
+            if bad.any():
+                data[column] = data[column].mask(bad, None)
+
+        return validate_frame(XiaoYuanKeyMetricsData, data)
@@ -0,0 +1,358 @@
+"""Storage backends answering the typed data requests of the XiaoYuan fetchers."""
+
+import importlib
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+from openbb_xiaoyuan.utils.batching import aload_factor_query
+from openbb_xiaoyuan.utils.factor_cache import use_factor_cache
+from openbb_xiaoyuan.utils.postprocess import PostProcessSpec
+from openbb_xiaoyuan.utils.query_builder import FactorQuery
+from openbb_xiaoyuan.utils.references import (
+    ASOF_LOOKBACK_DAYS,
+    ASSET_TABLES,
+    get_asof_daily_rows_sql,
+    get_daily_factors_sql,
+    get_dividend_sql,
+    get_listing_sql,
+    get_query_cnzvt_sql,
+    get_trading_days_sql,
+    render_asof_daily,
+)
+from openbb_xiaoyuan.utils.session_pool import arun_query, run_blocking, run_query
+from openbb_xiaoyuan.utils.settings import get_settings
+from openbb_xiaoyuan.utils.snapshot import aensure_latest_snapshot
+
+
+class XiaoYuanBackend(ABC):
+    """The data requests of the XiaoYuan fetchers, whatever stores the tables.
+
+    Symbols use the internal ``SH600519`` format. Every request returns the
+    frame the DolphinDB script of the same request returns, with the same
+    columns, so the fetchers transform the results of every backend alike;
+    ``None`` or an empty frame means no rows.
+    """
+
+    @abstractmethod
+    async def finance_factors(self, query: FactorQuery) -> Optional[pd.DataFrame]:
+        """Return the result of a query on a long-format factor table."""
+
+    @abstractmethod
+    async def daily_factors(
+        self,
+        symbols: Sequence[str],
+        factors: Sequence[str],
+        start: Any,
+        end: Any,
+        change_of: Optional[str] = None,
+        after: Any = None,
+    ) -> Optional[pd.DataFrame]:
+        """Return the daily factors of each symbol, like the script of ``get_daily_factors_sql``."""
+
+    @abstractmethod
+    async def daily_asof(
+        self,
+        reports: FactorQuery,
+        post_process: Optional[PostProcessSpec] = None,
+        forward: bool = False,
+    ) -> Optional[pd.DataFrame]:
+        """Return the rows of ``reports`` joined to nearby daily factors, like ``render_asof_daily``."""
+
+    @abstractmethod
+    async def statements(
+        self,
+        table_name: str,
+        columns: Dict[str, str],
+        symbols: Sequence[str],
+        limit: int,
+        post_process: Optional[PostProcessSpec] = None,
+    ) -> Optional[pd.DataFrame]:
+        """Return the quarterly rows of a cn_zvt statement table, like ``get_query_cnzvt_sql``."""
+
+    @abstractmethod
+    async def listings(
+        self,
+        asset_type: str,
+        symbols: Optional[Sequence[str]] = None,
+        exchanges: Optional[Sequence[str]] = None,
+    ) -> Optional[pd.DataFrame]:
+        """Return the stock, ETF or index listings, optionally of some symbols or exchanges only."""
+
+    @abstractmethod
+    async def dividends(
+        self, start: Any, end: Any, symbols: Optional[Sequence[str]] = None
+    ) -> Optional[pd.DataFrame]:
+        """Return the dividends paid between two dates, optionally of some symbols only."""
+
+    @abstractmethod
+    def load_listings(self, asset_type: str) -> Optional[pd.DataFrame]:
+        """Return every listing of an asset type; blocking, for the cached symbol universe."""
+
+    @abstractmethod
+    def load_trading_days(self, market: str, start: Any, end: Any) -> Any:
+        """Return the trading days of a market; blocking, for the cached trading calendar."""
+
+    async def latest_snapshot(self) -> bool:
+        """Return whether latest-report lookups can read the latest-report snapshot."""
+        return False
+
+
+class DolphinDBBackend(XiaoYuanBackend):
+    """The tables of the XiaoYuan DolphinDB server, read through the pooled sessions."""
+
+    async def finance_factors(self, query: FactorQuery) -> Optional[pd.DataFrame]:
+        """Return the result of a factor query, through the wide table, factor cache and batching."""
+        return await aload_factor_query(query)
+
+    async def daily_factors(
+        self,
+        symbols: Sequence[str],
+        factors: Sequence[str],
+        start: Any,
+        end: Any,
+        change_of: Optional[str] = None,
+        after: Any = None,
+    ) -> Optional[pd.DataFrame]:
+        """Return the daily factors of each symbol."""
+        return await arun_query(
+            get_daily_factors_sql(list(factors), list(symbols), start, end, change_of, after)
+        )
+
+    async def daily_asof(
+        self,
+        reports: FactorQuery,
+        post_process: Optional[PostProcessSpec] = None,
+        forward: bool = False,
+    ) -> Optional[pd.DataFrame]:
+        """Return the rows of ``reports`` joined to nearby daily factors.
+
+        Reports the factor cache answers are loaded through it, so they share
+        rows with the other finance fetchers; the daily rows of their candidate
+        days are then read and joined locally. Other reports, such as the
+        per-symbol latest reports, are joined in one script.
+        """
+        reports = reports.optimize()
+        if not use_factor_cache(reports):
+            return await arun_query(render_asof_daily(reports, post_process, forward))
+        df = await self.finance_factors(reports)
+        if df is None or df.empty:
+            return df
+        rows = await arun_query(
+            get_asof_daily_rows_sql(list(reports.symbols), list(reports.factors), df["报告期"], forward)
+        )
+        if rows is not None and not rows.empty:
+            # 与脚本一致, 空值不参与连接
+            rows = rows.dropna(subset=["value"])
+        df = asof_join(df, pivot_daily_rows(rows), forward)
+        if post_process:
+            df = post_process.apply(df, list(reports.symbols))
+        return df
+
+    async def statements(
+        self,
+        table_name: str,
+        columns: Dict[str, str],
+        symbols: Sequence[str],
+        limit: int,
+        post_process: Optional[PostProcessSpec] = None,
+    ) -> Optional[pd.DataFrame]:
+        """Return the quarterly rows of a cn_zvt statement table."""
+        return await arun_query(
+            get_query_cnzvt_sql(columns, list(symbols), table_name, limit, post_process)
+        )
+
+    async def listings(
+        self,
+        asset_type: str,
+        symbols: Optional[Sequence[str]] = None,
+        exchanges: Optional[Sequence[str]] = None,
+    ) -> Optional[pd.DataFrame]:
+        """Return the listings of an asset type."""
+        return await arun_query(
+            get_listing_sql(
+                ASSET_TABLES[asset_type],
+                list(symbols) if symbols else None,
+                list(exchanges) if exchanges else None,
+            )
+        )
+
+    async def dividends(
+        self, start: Any, end: Any, symbols: Optional[Sequence[str]] = None
+    ) -> Optional[pd.DataFrame]:
+        """Return the dividends paid between two dates."""
+        return await arun_query(
+            get_dividend_sql(start, end, ",".join(symbols) if symbols else None)
+        )
+
+    def load_listings(self, asset_type: str) -> Optional[pd.DataFrame]:
+        """Return every listing of an asset type."""
+        return run_query(get_listing_sql(ASSET_TABLES[asset_type]))
+
+    def load_trading_days(self, market: str, start: Any, end: Any) -> Any:
+        """Return the trading days of a market from ``getMarketCalendar``."""
+        return run_query(get_trading_days_sql(market, start, end))
+
+    async def latest_snapshot(self) -> bool:
+        """Return whether the latest-report snapshot is enabled and up to date."""
+        return await aensure_latest_snapshot()
+
+
+def pivot_daily_rows(rows: pd.DataFrame) -> pd.DataFrame:
+    """Pivot long daily factor rows like ``pivot by timestamp, symbol, factor_name``."""
+    if rows is None or rows.empty:
+        return pd.DataFrame()
+    index = ["timestamp", "symbol"]
+    # 与服务端 pivot 一致, 同一单元格有多行时取最后一行
+    rows = rows.drop_duplicates(subset=index + ["factor_name"], keep="last")
+    df = rows.pivot(index=index, columns="factor_name", values="value")
+    return df.reset_index().rename_axis(columns=None)
+
+
+def finish_daily(df: pd.DataFrame, change_of: Optional[str] = None, after: Any = None) -> pd.DataFrame:
+    """Add the changes and drop the leading rows of pivoted daily factors, like ``get_daily_factors_sql``."""
+    if df.empty:
+        return df
+    if change_of and change_of in df.columns:
+        # 与 REF(x, 1) context by symbol 一致, 取同一代码的上一行
+        ref_close = df.groupby("symbol", sort=False)[change_of].shift(1)
+        change = df[change_of] - ref_close
+        df = df.assign(ref_close=ref_close, change=change, changeOverTime=change / ref_close)
+    if after is not None:
+        df = df[df["timestamp"] > pd.Timestamp(after)]
+    return df.reset_index(drop=True)
+
+
+def asof_window(reports: pd.DataFrame, forward: bool = False) -> Tuple[Any, Any]:
+    """Return the first and last day whose daily rows ``asof_join`` may pick for ``reports``."""
+    dates = pd.to_datetime(reports["报告期"]).dt.normalize()
+    if forward:
+        return dates.min(), dates.max() + pd.Timedelta(days=ASOF_LOOKBACK_DAYS + 1)
+    return dates.min() - pd.Timedelta(days=ASOF_LOOKBACK_DAYS), dates.max()
+
+
+def asof_join(reports: pd.DataFrame, daily: pd.DataFrame, forward: bool = False) -> pd.DataFrame:
+    """Join each report row to the pivoted daily row of its symbol nearest its report date.
+
+    Like the join of ``render_asof_daily``, a row takes the last trading day
+    before its report date, or with ``forward`` the first one on or after it,
+    within ``ASOF_LOOKBACK_DAYS``. Report rows keep their order and columns;
+    daily factors the reports already have are not joined again.
+    """
+    if reports is None or reports.empty or daily is None or daily.empty:
+        return reports
+    # 两侧的日期精度可能不同 (如 DATE 与 TIMESTAMP 列), merge_asof 要求相同
+    daily = daily.assign(_asof=pd.to_datetime(daily["timestamp"]).dt.normalize().astype("datetime64[ns]"))
+    daily = daily.drop(columns=[c for c in daily.columns if c in reports.columns and c != "symbol"])
+    days = pd.to_datetime(reports["报告期"]).dt.normalize().astype("datetime64[ns]")
+    left = reports.assign(_row=range(len(reports)), _asof=days if forward else days - pd.Timedelta(days=1))
+    df = pd.merge_asof(
+        left.sort_values("_asof", kind="stable"),
+        daily.dropna(subset=["_asof"]).sort_values("_asof", kind="stable"),
+        on="_asof",
+        by="symbol",
+        direction="forward" if forward else "backward",
+        tolerance=pd.Timedelta(days=ASOF_LOOKBACK_DAYS if forward else ASOF_LOOKBACK_DAYS - 1),
+    )
+    return df.sort_values("_row").drop(columns=["_row", "_asof"]).reset_index(drop=True)
+
+
+class LocalFactorBackend(XiaoYuanBackend):
+    """A backend computing the factor requests in process from long rows it reads locally.
+
+    Subclasses answer factor queries and read long daily factor rows; both
+    are blocking and run on the query executor. The daily pivot, the change
+    columns and the as-of join are then computed like the DolphinDB scripts.
+    """
+
+    @abstractmethod
+    def load_factor_query(self, query: FactorQuery) -> pd.DataFrame:
+        """Return the result of a factor query; blocking."""
+
+    @abstractmethod
+    def read_daily_rows(
+        self, symbols: Sequence[str], factors: Sequence[str], start: Any, end: Any
+    ) -> pd.DataFrame:
+        """Return the long daily factor rows between two dates; blocking."""
+
+    async def finance_factors(self, query: FactorQuery) -> Optional[pd.DataFrame]:
+        """Return the result of a factor query."""
+        return await run_blocking(self.load_factor_query, query)
+
+    async def daily_factors(
+        self,
+        symbols: Sequence[str],
+        factors: Sequence[str],
+        start: Any,
+        end: Any,
+        change_of: Optional[str] = None,
+        after: Any = None,
+    ) -> Optional[pd.DataFrame]:
+        """Return the daily factors of each symbol."""
+        rows = await run_blocking(self.read_daily_rows, symbols, factors, start, end)
+        return finish_daily(pivot_daily_rows(rows), change_of, after)
+
+    async def daily_asof(
+        self,
+        reports: FactorQuery,
+        post_process: Optional[PostProcessSpec] = None,
+        forward: bool = False,
+    ) -> Optional[pd.DataFrame]:
+        """Return the rows of ``reports`` joined to nearby daily factors."""
+        reports = reports.optimize()
+        df = await self.finance_factors(reports)
+        if df is None or df.empty:
+            return df
+        start, end = asof_window(df, forward)
+        rows = await run_blocking(self.read_daily_rows, reports.symbols, reports.factors, start, end)
+        df = asof_join(df, pivot_daily_rows(rows), forward)
+        if post_process:
+            df = post_process.apply(df, list(reports.symbols))
+        return df
+
+    async def latest_snapshot(self) -> bool:
+        """Return ``False``; local stores keep every report and have no snapshot."""
+        return False
+
+
+# 后端名称到类或 "模块:类" 路径, 路径在首次使用时才导入
+BACKENDS: Dict[str, Union[str, Callable[[], XiaoYuanBackend]]] = {
+    "dolphindb": "openbb_xiaoyuan.utils.backend:DolphinDBBackend",
+    "mirror": "openbb_xiaoyuan.utils.mirror:MirrorBackend",
+    "duckdb": "openbb_xiaoyuan.utils.duckdb_store:DuckDBBackend",
+}
+
+_INSTANCES: Dict[str, XiaoYuanBackend] = {}
+_BACKEND_LOCK = threading.Lock()
+
+
+def register_backend(name: str, backend: Union[str, Callable[[], XiaoYuanBackend]]) -> None:
+    """Register a backend class, or its ``module:Class`` path, under the name set in ``XIAOYUAN_BACKEND``."""
+    with _BACKEND_LOCK:
+        BACKENDS[name] = backend
+        _INSTANCES.pop(name, None)
+
+
+def _create_backend(name: str) -> XiaoYuanBackend:
+    """Import and instantiate a registered backend."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown XiaoYuan backend {name!r}; expected one of {sorted(BACKENDS)}.")
+    factory = BACKENDS[name]
+    if isinstance(factory, str):
+        module, _, attribute = factory.partition(":")
+        factory = getattr(importlib.import_module(module), attribute)
+    return factory()
+
+
+def get_backend() -> XiaoYuanBackend:
+    """Return the backend selected by the settings."""
+    name = get_settings().backend
+    backend = _INSTANCES.get(name)
+    if backend is None:
+        with _BACKEND_LOCK:
+            backend = _INSTANCES.get(name)
+            if backend is None:
+                backend = _INSTANCES[name] = _create_backend(name)
+    return backend
+
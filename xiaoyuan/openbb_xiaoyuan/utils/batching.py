@@ -0,0 +1,181 @@
+"""Micro-batching of concurrent factor table queries for the XiaoYuan fetchers."""
+
+import asyncio
+import threading
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+
+from openbb_xiaoyuan.utils.factor_cache import get_factor_cache, use_factor_cache
+from openbb_xiaoyuan.utils.query_builder import WIDE_FINANCE_FACTORS, FactorQuery
+from openbb_xiaoyuan.utils.session_pool import arun_query
+from openbb_xiaoyuan.utils.settings import get_settings
+from openbb_xiaoyuan.utils.wide_table import aensure_wide_table, reads_wide
+
+Request = Tuple[FactorQuery, "asyncio.Future[Any]"]
+
+
+def batch_key(query: FactorQuery, long: bool = False) -> Hashable:
+    """Return the key of the queries that may share a batch."""
+    return (query.shape(), query.post_process, long)
+
+
+def split_result(df: Any, query: FactorQuery, merged: FactorQuery) -> Any:
+    """Return the part of a merged result answering ``query``.
+
+    Rows of other symbols and columns of other factors are dropped, as are rows
+    in which every factor of ``query`` is missing, since those only exist in the
+    merged pivot because another query asked for a factor on that date.
+    """
+    if df is None or df.empty:
+        return df
+    rows = df[df["symbol"].isin(query.symbols)]
+    others = [f for f in merged.factors if f not in query.factors and f in rows.columns]
+    rows = rows.drop(columns=others)
+    own = [f for f in query.factors if f in rows.columns]
+    if own:
+        rows = rows.dropna(subset=own, how="all")
+    if query.post_process:
+        order = {s: i for i, s in enumerate(query.symbols)}
+        rows = rows.sort_values(by="symbol", key=lambda col: col.map(order), kind="stable")
+    return rows.reset_index(drop=True)
+
+
+def split_long_result(df: Any, query: FactorQuery) -> Any:
+    """Return the long rows of a merged result answering ``query``."""
+    if df is None or df.empty:
+        return df
+    rows = df[df["symbol"].isin(query.symbols) & df["factor_name"].isin(query.factors)]
+    return rows.reset_index(drop=True)
+
+
+class BatchLoader:
+    """Collect factor queries arriving within a short window and run them as one.
+
+    Queries with the same shape (table, filters, limit, pivot and
+    post-processing) are merged into a single ``symbol in [...]`` query, and each
+    caller receives only its own symbols and factors. Queries whose result a
+    merge would change, such as a per-symbol limit across factors, run alone.
+    With ``long=True`` the long rows are returned without pivoting.
+    """
+
+    def __init__(self, window: float, max_symbols: int = 500):
+        """Initialize the loader with the batching window in seconds."""
+        self.window = window
+        self.max_symbols = max_symbols
+        self._pending: Dict[Tuple[int, Hashable], List[Request]] = {}
+        # 每个待发批次的定时器, 提前发送时取消, 以免误发下一批
+        self._timers: Dict[Tuple[int, Hashable], asyncio.TimerHandle] = {}
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "queries": 0}
+        # 保留任务引用, 避免执行中被回收
+        self._tasks: Set[asyncio.Task[None]] = set()
+
+    def stats(self) -> Dict[str, int]:
+        """Return how many requests were received and how many queries were run."""
+        with self._lock:
+            return dict(self._stats)
+
+    async def load(self, query: FactorQuery, long: bool = False) -> Any:
+        """Return the result of ``query``, possibly fetched together with others."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        key = (id(loop), batch_key(query, long))
+        with self._lock:
+            self._stats["requests"] += 1
+            batch = self._pending.get(key)
+            if batch is None:
+                batch = self._pending[key] = []
+                self._timers[key] = loop.call_later(self.window, self._flush, loop, key)
+            batch.append((query, future))
+            full = sum(len(q.symbols) for q, _ in batch) >= self.max_symbols
+        if full:
+            self._flush(loop, key)
+        return await future
+
+    def _flush(self, loop: asyncio.AbstractEventLoop, key: Tuple[int, Hashable]) -> None:
+        """Send the pending batch of ``key``, if it was not sent already."""
+        with self._lock:
+            batch = self._pending.pop(key, None)
+            timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        if batch:
+            task = loop.create_task(self._run(batch, long=key[1][-1]))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Request], long: bool = False) -> None:
+        """Run the merged queries of a batch and hand each caller its result."""
+        groups: List[Tuple[FactorQuery, List[Request]]] = []
+        for request in batch:
+            query = request[0]
+            for i, (merged, members) in enumerate(groups):
+                if merged.can_merge(query):
+                    groups[i] = (merged.merge(query), members + [request])
+                    break
+            else:
+                groups.append((query, [request]))
+        await asyncio.gather(*(self._run_group(merged, members, long) for merged, members in groups))
+
+    async def _run_group(self, merged: FactorQuery, members: List[Request], long: bool) -> None:
+        """Run one merged query and split its result between the members."""
+        with self._lock:
+            self._stats["queries"] += 1
+        try:
+            df = await arun_query(merged.render_long() if long else merged.render())
+        except Exception as exc:  # pylint: disable=broad-except
+            for _, future in members:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for query, future in members:
+            if future.done():
+                continue
+            if len(members) == 1:
+                future.set_result(df)
+                continue
+            try:
+                if long:
+                    future.set_result(split_long_result(df, query))
+                else:
+                    future.set_result(split_result(df, query, merged))
+            except Exception as exc:  # pylint: disable=broad-except
+                future.set_exception(exc)
+
+
+_LOADER: Optional[BatchLoader] = None
+_LOADER_LOCK = threading.Lock()
+
+
+def get_batch_loader() -> BatchLoader:
+    """Return the process-wide batch loader."""
+    global _LOADER  # noqa: PLW0603  # pylint: disable=global-statement
+    if _LOADER is None:
+        with _LOADER_LOCK:
+            if _LOADER is None:
+                settings = get_settings()
+                _LOADER = BatchLoader(settings.batch_window_ms / 1000, settings.batch_max_symbols)
+    return _LOADER
+
+
+async def _fetch_long_rows(query: FactorQuery) -> Any:
+    """Run the long-row script of a factor query, batched when batching is enabled."""
+    if get_settings().batch_window_ms <= 0:
+        return await arun_query(query.render_long())
+    return await get_batch_loader().load(query, long=True)
+
+
+async def aload_factor_query(query: FactorQuery) -> Any:
+    """Run a factor query through the factor cache and the batch loader when they are enabled.
+
+    Queries whose factors are all in the wide finance table read it without a
+    pivot. Otherwise separable queries are answered from the factor cache, whose
+    delta queries are batched; other queries are batched whole.
+    """
+    factors = await aensure_wide_table()
+    if factors and reads_wide(query, factors):
+        return await arun_query(query.render_wide(WIDE_FINANCE_FACTORS))
+    if use_factor_cache(query):
+        return await get_factor_cache().load(query, fetch=_fetch_long_rows)
+    if get_settings().batch_window_ms <= 0:
+        return await arun_query(query.render())
+    return await get_batch_loader().load(query)
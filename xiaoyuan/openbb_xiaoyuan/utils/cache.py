@@ -0,0 +1,214 @@
+"""Result cache for the XiaoYuan DolphinDB queries."""
+
+import asyncio
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+import pandas as pd
+from openbb_xiaoyuan.utils.settings import get_settings
+
+T = TypeVar("T")
+
+# 各数据集的缓存时长(秒)取自对应的设置项, 一个脚本涉及多个数据集时取最短的
+DATASET_TTL_SETTINGS = {
+    "cn_finance_factors_1Q": "cache_ttl_finance",
+    "cn_finance_factors_latest": "cache_ttl_finance",
+    "cn_finance_factors_wide": "cache_ttl_finance",
+    "cn_factors_1D": "cache_ttl_daily",
+    "dfs://cn_zvt": "cache_ttl_reference",
+}
+
+
+def normalize_script(script: str) -> str:
+    """Collapse whitespace so that formatting differences do not split the cache."""
+    return " ".join(script.split())
+
+
+def script_cache_key(script: str) -> str:
+    """Return the cache key of a DolphinDB script."""
+    normalized = normalize_script(script).encode("utf-8")
+    return hashlib.sha1(normalized, usedforsecurity=False).hexdigest()
+
+
+def ttl_for_script(script: str) -> float:
+    """Return how long the result of a script may be cached, in seconds."""
+    settings = get_settings()
+    ttls = [
+        getattr(settings, name)
+        for marker, name in DATASET_TTL_SETTINGS.items()
+        if marker in script
+    ]
+    return min(ttls) if ttls else settings.cache_ttl_default
+
+
+def copy_result(value: Any) -> Any:
+    """Return a copy of a cached result that the caller is free to mutate."""
+    return value.copy() if hasattr(value, "copy") else value
+
+
+def _sizeof(value: Any) -> int:
+    """Return the approximate memory footprint of a query result."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(value.memory_usage(deep=True).sum())
+    nbytes = getattr(value, "nbytes", None)
+    return int(nbytes) if nbytes is not None else sys.getsizeof(value)
+
+
+@dataclass
+class _Entry:
+    value: Any
+    size: int
+    expires_at: float
+
+
+class QueryCache:
+    """Thread-safe LRU cache with per-entry TTL and a total byte budget."""
+
+    def __init__(self, max_bytes: int):
+        """Initialize the cache."""
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a copy of the cached value, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self._stats["expirations"] += 1
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            value = entry.value
+        return copy_result(value)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """Store a value for ``ttl`` seconds, evicting least recently used entries."""
+        if ttl <= 0 or value is None:
+            return
+        size = _sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            while self._entries and self._bytes + size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+            self._entries[key] = _Entry(value, size, time.monotonic() + ttl)
+            self._bytes += size
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Drop one entry, or every entry when no key is given."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._bytes = 0
+            elif key in self._entries:
+                self._remove(key)
+
+    def stats(self) -> Dict[str, int]:
+        """Return a snapshot of the cache counters."""
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries), "bytes": self._bytes}
+
+    def _remove(self, key: str) -> None:
+        """Remove an entry. Caller holds the lock."""
+        self._bytes -= self._entries.pop(key).size
+
+
+class SingleFlight:
+    """Coalesce identical concurrent calls so that only one of them runs.
+
+    The first caller for a key runs the call; callers arriving while it is in
+    flight wait for and share its result (or exception). Results are shared,
+    so callers must copy them before modifying them.
+    """
+
+    def __init__(self):
+        """Initialize the call registry."""
+        self._calls: Dict[str, Future] = {}
+        self._tasks: Dict[Tuple[int, str], asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "shared": 0}
+
+    def do(self, key: str, func: Callable[[], T]) -> T:
+        """Run ``func`` unless an identical call is in flight on another thread."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self._stats["calls"] += 1
+            else:
+                self._stats["shared"] += 1
+        if not leader:
+            return future.result()
+        try:
+            result = func()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return result
+
+    async def ado(self, key: str, func: Callable[[], Awaitable[T]]) -> T:
+        """Await ``func`` unless an identical call is in flight on this event loop."""
+        loop = asyncio.get_running_loop()
+        task_key = (id(loop), key)
+        with self._lock:
+            task = self._tasks.get(task_key)
+            if task is None:
+                task = self._tasks[task_key] = loop.create_task(func())
+                task.add_done_callback(lambda _: self._forget(task_key))
+                self._stats["calls"] += 1
+            else:
+                self._stats["shared"] += 1
+        # A cancelled waiter must not cancel the call the other waiters share.
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, int]:
+        """Return how many calls ran and how many were served by another call."""
+        with self._lock:
+            return dict(self._stats)
+
+    def _forget(self, task_key: Tuple[int, str]) -> None:
+        """Remove a finished task from the registry."""
+        with self._lock:
+            self._tasks.pop(task_key, None)
+
+
+_CACHE: Optional[QueryCache] = None
+_SINGLE_FLIGHT = SingleFlight()
+_CACHE_LOCK = threading.Lock()
+
+
+def get_query_cache() -> QueryCache:
+    """Return the result cache shared by every XiaoYuan fetcher."""
+    global _CACHE  # noqa: PLW0603  # pylint: disable=global-statement
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = QueryCache(max_bytes=get_settings().cache_max_bytes)
+    return _CACHE
+
+
+def get_single_flight() -> SingleFlight:
+    """Return the registry coalescing identical in-flight XiaoYuan queries."""
+    return _SINGLE_FLIGHT
@@ -0,0 +1,127 @@
+"""A-share trading calendar cached in process for the XiaoYuan fetchers."""
+
+import threading
+from datetime import date, timedelta
+from typing import Any, Optional
+from warnings import warn
+
+import numpy as np
+import pandas as pd
+from openbb_xiaoyuan.utils.backend import get_backend
+from openbb_xiaoyuan.utils.session_pool import run_blocking
+from openbb_xiaoyuan.utils.settings import get_settings
+
+
+class TradingCalendar:
+    """Sorted trading days with vectorized adjacent-trading-day lookups.
+
+    Every lookup accepts a scalar date or an array-like of dates. Scalars return a
+    ``pd.Timestamp`` and arrays a ``pd.DatetimeIndex``; dates outside the loaded
+    range map to ``NaT``.
+    """
+
+    def __init__(self, days: Any, start: Any = None, end: Any = None):
+        """Initialize the calendar from the trading days between ``start`` and ``end``."""
+        days = pd.to_datetime(np.asarray(days).ravel()).values.astype("datetime64[D]")
+        self.days = np.unique(days[~np.isnat(days)])
+        self.start = _to_day(start) if start is not None else self.days[0]
+        self.end = _to_day(end) if end is not None else self.days[-1]
+
+    def __len__(self) -> int:
+        """Return the number of trading days."""
+        return len(self.days)
+
+    def is_trading_day(self, dates: Any) -> Any:
+        """Return whether each date is a trading day."""
+        scalar, values = _as_days(dates)
+        pos = np.searchsorted(self.days, values, side="left")
+        found = pos < len(self.days)
+        found[found] = self.days[pos[found]] == values[found]
+        return bool(found[0]) if scalar else found
+
+    def on_or_before(self, dates: Any) -> Any:
+        """Return the latest trading day on or before each date."""
+        return self._lookup(dates, "right", -1)
+
+    def on_or_after(self, dates: Any) -> Any:
+        """Return the earliest trading day on or after each date."""
+        return self._lookup(dates, "left", 0)
+
+    def previous(self, dates: Any, n: int = 1) -> Any:
+        """Return the ``n``-th trading day strictly before each date."""
+        return self._lookup(dates, "left", -n)
+
+    def next(self, dates: Any, n: int = 1) -> Any:
+        """Return the ``n``-th trading day strictly after each date."""
+        return self._lookup(dates, "right", n - 1)
+
+    def _lookup(self, dates: Any, side: str, offset: int) -> Any:
+        """Shift the search position of each date by ``offset`` trading days."""
+        scalar, values = _as_days(dates)
+        pos = np.searchsorted(self.days, values, side=side) + offset
+        valid = (
+            (pos >= 0)
+            & (pos < len(self.days))
+            & (values >= self.start)
+            & (values <= self.end)
+        )
+        result = np.full(values.shape, np.datetime64("NaT"), dtype="datetime64[D]")
+        result[valid] = self.days[pos[valid]]
+        result = pd.DatetimeIndex(result)
+        return result[0] if scalar else result
+
+
+def _to_day(value: Any) -> np.datetime64:
+    """Return a date-like value as a ``datetime64[D]``."""
+    return pd.Timestamp(value).to_datetime64().astype("datetime64[D]")
+
+
+def _as_days(dates: Any):
+    """Return whether ``dates`` is a scalar and its values as ``datetime64[D]``."""
+    scalar = np.ndim(dates) == 0
+    values = pd.to_datetime(np.atleast_1d(np.asarray(dates, dtype=object)).ravel())
+    return scalar, values.values.astype("datetime64[D]")
+
+
+def load_trading_calendar() -> TradingCalendar:
+    """Load the trading days from the configured backend, up to a year ahead of today."""
+    settings = get_settings()
+    start = pd.Timestamp(settings.calendar_start)
+    end = pd.Timestamp(date.today() + timedelta(days=366))
+    days = get_backend().load_trading_days(settings.calendar_market, start, end)
+    return TradingCalendar(days, start=start, end=end)
+
+
+_CALENDAR: Optional[TradingCalendar] = None
+_LOADED_ON: Optional[date] = None
+_CALENDAR_LOCK = threading.Lock()
+
+
+def _is_fresh() -> bool:
+    """Return whether the cached calendar was loaded today."""
+    return _CALENDAR is not None and date.today() == _LOADED_ON
+
+
+def get_trading_calendar() -> TradingCalendar:
+    """Return the cached trading calendar, reloading it once a day."""
+    global _CALENDAR, _LOADED_ON  # noqa: PLW0603  # pylint: disable=global-statement
+    if _is_fresh():
+        return _CALENDAR
+    with _CALENDAR_LOCK:
+        if not _is_fresh():
+            try:
+                _CALENDAR = load_trading_calendar()
+            except Exception as exc:  # pylint: disable=broad-except
+                if _CALENDAR is None:
+                    raise
+                # 刷新失败时继续使用昨日的日历
+                warn(f"Could not refresh the trading calendar: {exc}")
+            _LOADED_ON = date.today()
+    return _CALENDAR
+
+
+async def aget_trading_calendar() -> TradingCalendar:
+    """Return the cached trading calendar, loading it off the event loop if needed."""
+    if _is_fresh():
+        return _CALENDAR
+    return await run_blocking(get_trading_calendar)
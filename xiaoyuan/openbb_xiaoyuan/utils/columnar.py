@@ -0,0 +1,57 @@
+"""Columnar results for the XiaoYuan fetchers, without building a Data object per row."""
+
+from typing import Any, Dict, Optional, Type, Union
+
+import pandas as pd
+from openbb_core.provider.abstract.data import Data
+from openbb_core.provider.abstract.fetcher import Fetcher
+from openbb_xiaoyuan.utils.references import revert_stock_code_frame
+
+
+def to_columnar(model: Type[Data], df: pd.DataFrame) -> pd.DataFrame:
+    """Rename the columns of a raw XiaoYuan result to the fields of ``model``.
+
+    Model fields come first, in the order they are declared, followed by any
+    extra columns. Zero values become missing for models that drop zeros with a
+    ``replace_zero`` validator. Dates stay as datetime64 columns.
+    """
+    aliases = {alias: name for name, alias in model.__alias_dict__.items()}
+    df = df.rename(columns=aliases)
+    if "symbol" in df.columns:
+        df = revert_stock_code_frame(df)
+    if "replace_zero" in model.__pydantic_decorators__.model_validators:
+        numeric = df.select_dtypes(include="number").columns
+        df[numeric] = df[numeric].mask(df[numeric] == 0)
+    fields = [name for name in model.model_fields if name in df.columns]
+    extras = [name for name in df.columns if name not in model.model_fields]
+    return df[fields + extras].reset_index(drop=True)
+
+
+def to_arrow(df: pd.DataFrame) -> Any:
+    """Convert a columnar result to a ``pyarrow.Table``."""
+    try:
+        import pyarrow as pa  # pylint: disable=import-outside-toplevel
+    except ImportError as exc:
+        raise ImportError(
+            "Arrow output requires pyarrow. Install it with `pip install pyarrow`."
+        ) from exc
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+async def fetch_columnar(
+    fetcher: Type[Fetcher],
+    params: Dict[str, Any],
+    credentials: Optional[Dict[str, str]] = None,
+    as_arrow: bool = False,
+    **kwargs: Any,
+) -> Union[pd.DataFrame, Any]:
+    """Run a XiaoYuan fetcher and return its result as one frame instead of Data objects.
+
+    The query is transformed and extracted as usual, but the DolphinDB result is
+    returned with alias-mapped column names rather than validated row by row.
+    Pass ``as_arrow=True`` for a ``pyarrow.Table``.
+    """
+    query = fetcher.transform_query(params=params)
+    data = await fetcher.aextract_data(query=query, credentials=credentials, **kwargs)
+    df = to_columnar(fetcher.data_type, data)
+    return to_arrow(df) if as_arrow else df
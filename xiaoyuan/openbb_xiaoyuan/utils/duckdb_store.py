@@ -0,0 +1,306 @@
+"""XiaoYuan factor and cn_zvt tables stored in an embedded DuckDB database."""
+
+import datetime
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+from openbb_xiaoyuan.utils.backend import LocalFactorBackend
+from openbb_xiaoyuan.utils.factor_cache import FISCAL_QUARTERS, pivot_factor_rows
+from openbb_xiaoyuan.utils.postprocess import PostProcessSpec
+from openbb_xiaoyuan.utils.query_builder import (
+    DAILY_FACTORS,
+    Between,
+    FactorQuery,
+    In,
+    Predicate,
+    Select,
+)
+from openbb_xiaoyuan.utils.references import ASSET_TABLES, to_entity_ids
+from openbb_xiaoyuan.utils.session_pool import run_blocking
+from openbb_xiaoyuan.utils.settings import get_settings
+
+# 与 PANDAS_FUNCTIONS 对应的 SQL 表达式
+SQL_FUNCTIONS = {
+    "monthOfYear": "month({})",
+    "year": "year({})",
+    "date": "CAST({} AS DATE)",
+    "extractMonthDayFromTime": "strftime({}, '%m.%d')",
+}
+
+SQL_COMPARISONS = {"==": "=", "<>": "!="}
+
+_CALL = re.compile(r"^(\w+)\((\w+)\)$")
+
+# cn_zvt 表的 entity_id 还原为 SH600519 形式的代码
+SYMBOL_EXPRESSION = "upper(split_part(entity_id, '_', 2)) || split_part(entity_id, '_', 3)"
+
+LISTING_COLUMNS = ["symbol", "name", "exchange", "list_date", "end_date"]
+DIVIDEND_COLUMNS = ["symbol", "dividend", "recordDate", "paymentDate", "date"]
+
+
+def _duckdb() -> Any:
+    """Return the ``duckdb`` module."""
+    try:
+        import duckdb  # pylint: disable=import-outside-toplevel
+    except ImportError as exc:
+        raise ImportError(
+            "The duckdb backend requires duckdb. Install it with `pip install duckdb`."
+        ) from exc
+    return duckdb
+
+
+# 本模块拼接的 SQL 中, 标识符都经 identifier() 加引号, 取值都以 ? 参数绑定,
+# 因此各处 f-string SQL 上的 ruff S608 为误报
+def identifier(name: str) -> str:
+    """Return a quoted SQL identifier."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def sql_expression(expression: str) -> str:
+    """Return the SQL of a column name, or of one of ``SQL_FUNCTIONS`` over a column."""
+    match = _CALL.match(expression.replace(" ", ""))
+    if match is None:
+        return identifier(expression)
+    if match.group(1) not in SQL_FUNCTIONS:
+        raise ValueError(f"Cannot evaluate {expression!r} in DuckDB.")
+    return SQL_FUNCTIONS[match.group(1)].format(identifier(match.group(2)))
+
+
+def _parameter(value: Any) -> Any:
+    """Return a bound parameter for a predicate value."""
+    if isinstance(value, (datetime.date, pd.Timestamp)):
+        return pd.Timestamp(value).to_pydatetime()
+    return value
+
+
+def sql_predicate(predicate: Predicate, params: List[Any]) -> str:
+    """Return the SQL of a predicate, appending its values to ``params``."""
+    if isinstance(predicate, In):
+        if not predicate.values:
+            return "FALSE"
+        values = list(predicate.values)
+        if predicate.cast in ("date", "datetime", "timestamp"):
+            values = list(pd.to_datetime(values))
+        params.extend(_parameter(v) for v in values)
+        return f"{sql_expression(predicate.column)} IN ({', '.join('?' * len(values))})"
+    if isinstance(predicate, Between):
+        column = sql_expression(predicate.column)
+        parts = []
+        if predicate.start is not None:
+            parts.append(f"{column} >= ?")
+            params.append(_parameter(predicate.start))
+        if predicate.end is not None:
+            parts.append(f"{column} <= ?")
+            params.append(_parameter(predicate.end))
+        return " AND ".join(parts) or "TRUE"
+    expression = sql_expression(predicate.expression)
+    if predicate.value is None:
+        return f"{expression} IS NOT NULL" if predicate.op == "is not" else f"{expression} IS NULL"
+    params.append(_parameter(predicate.value))
+    return f"{expression} {SQL_COMPARISONS.get(predicate.op, predicate.op)} ?"
+
+
+def sql_select(select: Select) -> Tuple[str, List[Any]]:
+    """Return the SQL and parameters of a ``Select`` on a table of the same name.
+
+    ``context by ... order by ... limit n`` keeps the first ``n`` rows of each
+    group, or the last ``-n`` ones, in the order of ``order_by`` and then of
+    insertion, as DolphinDB does.
+    """
+    params: List[Any] = []
+    source = select.source.name if hasattr(select.source, "name") else select.source
+    sql = f"SELECT {', '.join(sql_expression(c) for c in select.columns)} FROM {identifier(source)}"  # noqa: S608
+    if select.where:
+        sql += " WHERE " + " AND ".join(f"({sql_predicate(p, params)})" for p in select.where)
+    order = [sql_expression(c) for c in select.order_by] + ["rowid"]
+    if select.limit is not None:
+        direction = " DESC" if select.limit < 0 else ""
+        ranked = ", ".join(c + direction for c in order)
+        partition = ", ".join(sql_expression(c) for c in select.context_by)
+        window = f"PARTITION BY {partition} ORDER BY {ranked}" if partition else f"ORDER BY {ranked}"
+        sql += f" QUALIFY row_number() OVER ({window}) <= {abs(select.limit)}"
+    return sql + " ORDER BY " + ", ".join(order), params
+
+
+class DuckDBBackend(LocalFactorBackend):
+    """The XiaoYuan tables in an embedded DuckDB database, for offline research and benchmarks.
+
+    The tables keep their DolphinDB names and columns: ``cn_factors_1D`` and
+    ``cn_finance_factors_1Q`` in long format, and the cn_zvt ``stock``,
+    ``etf``, ``index``, ``dividend_detail`` and ``*_qtr`` statement tables keyed
+    by ``entity_id``. Fill them with ``load`` or ``load_parquet``. Every request
+    is answered in process; the trading calendar is the set of days with rows
+    in ``cn_factors_1D``.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """Open the database at ``path``, the ``XIAOYUAN_DUCKDB_PATH`` setting, or in memory."""
+        path = path or get_settings().duckdb_path
+        self.path = str(Path(path)) if path else ":memory:"
+        self._connection = _duckdb().connect(self.path)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        """Close the database."""
+        self._connection.close()
+
+    def tables(self) -> List[str]:
+        """Return the names of the tables in the database."""
+        return [row[0] for row in self._connection.cursor().execute("SHOW TABLES").fetchall()]
+
+    def load(self, table: str, rows: pd.DataFrame) -> int:
+        """Append ``rows`` to a table, creating it from their columns, and return the row count."""
+        if rows is None or rows.empty:
+            return 0
+        with self._lock:
+            cursor = self._connection.cursor()
+            cursor.register("_rows", rows)
+            try:
+                if table in self.tables():
+                    cursor.execute(f"INSERT INTO {identifier(table)} BY NAME SELECT * FROM _rows")  # noqa: S608
+                else:
+                    cursor.execute(f"CREATE TABLE {identifier(table)} AS SELECT * FROM _rows")  # noqa: S608
+            finally:
+                cursor.unregister("_rows")
+        return len(rows)
+
+    def load_parquet(self, table: str, path: Any) -> int:
+        """Append the rows of Parquet files, a path or glob, to a table and return the row count."""
+        return self.load(table, self._query("SELECT * FROM read_parquet(?)", [str(path)]))
+
+    def _query(self, sql: str, params: Optional[List[Any]] = None) -> pd.DataFrame:
+        """Run a query on its own cursor, so calls from several threads do not interfere."""
+        return self._connection.cursor().execute(sql, params or []).df()
+
+    def _select(self, select: Select) -> pd.DataFrame:
+        """Return the rows of a ``Select``, or no rows when its table was never loaded."""
+        if select.source.name not in self.tables():
+            return pd.DataFrame(columns=list(select.columns))
+        return self._query(*sql_select(select))
+
+    def load_factor_query(self, query: FactorQuery) -> pd.DataFrame:
+        """Return the result of a factor query, filtered and limited in SQL and pivoted in pandas."""
+        query = query.optimize()
+        return pivot_factor_rows(query, self._select(query.select()))
+
+    def read_daily_rows(
+        self, symbols: Sequence[str], factors: Sequence[str], start: Any, end: Any
+    ) -> pd.DataFrame:
+        """Return the long daily factor rows between two dates."""
+        where = (In("symbol", tuple(symbols)), In("factor_name", tuple(factors)), Between("timestamp", start, end))
+        return self._select(Select(("timestamp", "symbol", "factor_name", "value"), DAILY_FACTORS, where))
+
+    def _statements(
+        self,
+        table_name: str,
+        columns: Dict[str, str],
+        symbols: Sequence[str],
+        limit: int,
+        post_process: Optional[PostProcessSpec],
+    ) -> pd.DataFrame:
+        """Return the quarterly rows of a statement table, like ``get_query_cnzvt_sql``."""
+        if table_name not in self.tables():
+            return pd.DataFrame()
+        params: List[Any] = []
+        selected = ", ".join(f"{identifier(k)} AS {identifier(v)}" for k, v in columns.items())
+        direction = " DESC" if limit < 0 else ""
+        df = self._query(
+            f"SELECT timestamp, {SYMBOL_EXPRESSION} AS symbol, report_date AS 报告期, {selected} "  # noqa: S608
+            f"FROM {identifier(table_name)} WHERE "
+            + sql_predicate(In("entity_id", tuple(to_entity_ids(list(symbols)))), params)
+            + f" QUALIFY row_number() OVER (PARTITION BY entity_id ORDER BY report_date{direction}, "
+            f"rowid{direction}) <= {abs(limit)} ORDER BY entity_id, report_date",
+            params,
+        )
+        if df.empty:
+            return df
+        df["fiscal_period"] = df["报告期"].dt.month.map(FISCAL_QUARTERS)
+        df["fiscal_year"] = df["报告期"].dt.year
+        if post_process:
+            df = post_process.apply(df, list(symbols))
+        return df
+
+    async def statements(
+        self,
+        table_name: str,
+        columns: Dict[str, str],
+        symbols: Sequence[str],
+        limit: int,
+        post_process: Optional[PostProcessSpec] = None,
+    ) -> Optional[pd.DataFrame]:
+        """Return the quarterly rows of a statement table."""
+        return await run_blocking(self._statements, table_name, columns, symbols, limit, post_process)
+
+    def _listings(
+        self,
+        asset_type: str,
+        symbols: Optional[Sequence[str]] = None,
+        exchanges: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """Return the listings of an asset type, like ``get_listing_sql``."""
+        table = ASSET_TABLES[asset_type]
+        if table not in self.tables():
+            return pd.DataFrame(columns=LISTING_COLUMNS)
+        params: List[Any] = []
+        where = []
+        if symbols:
+            where.append(sql_predicate(In("entity_id", tuple(to_entity_ids(list(symbols), table))), params))
+        if exchanges:
+            where.append(sql_predicate(In("exchange", tuple(exchanges)), params))
+        sql = (
+            f"SELECT {SYMBOL_EXPRESSION} AS symbol, name, exchange, list_date, end_date "  # noqa: S608
+            f"FROM {identifier(table)}"
+        )
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return self._query(sql + " ORDER BY rowid", params)
+
+    async def listings(
+        self,
+        asset_type: str,
+        symbols: Optional[Sequence[str]] = None,
+        exchanges: Optional[Sequence[str]] = None,
+    ) -> Optional[pd.DataFrame]:
+        """Return the listings of an asset type."""
+        return await run_blocking(self._listings, asset_type, symbols, exchanges)
+
+    def load_listings(self, asset_type: str) -> Optional[pd.DataFrame]:
+        """Return every listing of an asset type."""
+        return self._listings(asset_type)
+
+    def _dividends(self, start: Any, end: Any, symbols: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Return the dividends paid between two dates, like ``get_dividend_sql``."""
+        if "dividend_detail" not in self.tables():
+            return pd.DataFrame(columns=DIVIDEND_COLUMNS)
+        params: List[Any] = []
+        where = [sql_predicate(Between("dividend_date", start, end), params)]
+        if symbols:
+            where.append(sql_predicate(In("entity_id", tuple(to_entity_ids(list(symbols)))), params))
+        return self._query(
+            f"SELECT {SYMBOL_EXPRESSION} AS symbol, dividend_per_share_before_tax AS dividend, "  # noqa: S608
+            'record_date AS "recordDate", dividend_date AS "paymentDate", dividend_date AS "date" '
+            "FROM dividend_detail WHERE " + " AND ".join(where) + " ORDER BY rowid",
+            params,
+        )
+
+    async def dividends(
+        self, start: Any, end: Any, symbols: Optional[Sequence[str]] = None
+    ) -> Optional[pd.DataFrame]:
+        """Return the dividends paid between two dates."""
+        return await run_blocking(self._dividends, start, end, symbols)
+
+    def load_trading_days(self, market: str, start: Any, end: Any) -> Any:
+        """Return the days with daily factor rows between two dates; the market is not used."""
+        if DAILY_FACTORS.name not in self.tables():
+            return []
+        params: List[Any] = []
+        where = sql_predicate(Between("timestamp", start, end), params)
+        df = self._query(
+            f"SELECT DISTINCT CAST(timestamp AS DATE) AS day FROM {identifier(DAILY_FACTORS.name)} "  # noqa: S608
+            f"WHERE {where} ORDER BY day",
+            params,
+        )
+        return df["day"].to_numpy()
@@ -0,0 +1,150 @@
+"""Factor rows cached per symbol and factor, shared by every XiaoYuan fetcher."""
+
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import pandas as pd
+from openbb_xiaoyuan.utils.cache import QueryCache, script_cache_key, ttl_for_script
+from openbb_xiaoyuan.utils.query_builder import FactorQuery
+from openbb_xiaoyuan.utils.session_pool import arun_query
+from openbb_xiaoyuan.utils.settings import get_settings
+
+Pair = Tuple[str, str]
+
+LongFetch = Callable[[FactorQuery], Awaitable[Any]]
+
+FISCAL_QUARTERS = {3: "q1", 6: "q2", 9: "q3", 12: "q4"}
+
+
+def pivot_factor_rows(query: FactorQuery, rows: pd.DataFrame) -> pd.DataFrame:
+    """Pivot long factor rows and finish them like the script of ``query`` does."""
+    if query.drop_null:
+        rows = rows.dropna(subset=["value"])
+    if rows.empty:
+        return pd.DataFrame()
+    index = list(query.pivot_by)
+    # 与服务端 pivot 一致, 同一单元格有多行时取最后一行
+    rows = rows.drop_duplicates(subset=index + ["factor_name"], keep="last")
+    df = rows.pivot(index=index, columns="factor_name", values="value")
+    df = df.reset_index().rename_axis(columns=None)
+    if query.fiscal_period:
+        df = df.sort_values(by=["symbol", "报告期"], kind="stable").reset_index(drop=True)
+        df["fiscal_period"] = df["报告期"].dt.month.map(FISCAL_QUARTERS)
+        df["fiscal_year"] = df["报告期"].dt.year
+    if query.post_process:
+        df = query.post_process.apply(df, list(query.symbols))
+    return df
+
+
+async def fetch_long_rows(query: FactorQuery) -> Any:
+    """Run the long-row script of a factor query."""
+    return await arun_query(query.render_long())
+
+
+class FactorCache:
+    """Long-format factor rows keyed by query shape, symbol and factor name.
+
+    Separable queries, whose rows for one (symbol, factor) pair do not depend on
+    the other pairs, are answered from the cached pairs; only the missing pairs
+    are fetched, in one delta query. Pairs without rows are cached as empty.
+    """
+
+    def __init__(self, max_bytes: int):
+        """Initialize the cache."""
+        self._cache = QueryCache(max_bytes)
+        self._lock = threading.Lock()
+        self._stats = {"queries": 0, "delta_queries": 0, "pairs_hit": 0, "pairs_fetched": 0}
+
+    def stats(self) -> Dict[str, int]:
+        """Return the query and pair counters."""
+        with self._lock:
+            return dict(self._stats)
+
+    def invalidate(self) -> None:
+        """Drop every cached pair."""
+        self._cache.invalidate()
+
+    @staticmethod
+    def _key(shape: str, pair: Pair) -> str:
+        """Return the cache key of one pair."""
+        return f"{shape}|{pair[0]}|{pair[1]}"
+
+    async def load(self, query: FactorQuery, fetch: Optional[LongFetch] = None) -> pd.DataFrame:
+        """Return the result of a separable ``query``, fetching only uncached pairs.
+
+        ``fetch`` runs the delta query and returns its long rows; it defaults to
+        running the long-row script directly.
+        """
+        query = query.optimize()
+        shape = script_cache_key(repr(query.shape()))
+        pairs = [(s, f) for s in query.symbols for f in query.factors]
+        cached: Dict[Pair, pd.DataFrame] = {}
+        for pair in pairs:
+            rows = self._cache.get(self._key(shape, pair))
+            if rows is not None:
+                cached[pair] = rows
+        missing = [pair for pair in pairs if pair not in cached]
+        with self._lock:
+            self._stats["queries"] += 1
+            self._stats["pairs_hit"] += len(cached)
+        if missing:
+            cached.update(await self._fetch(query, shape, missing, fetch or fetch_long_rows))
+        frames = [cached[pair] for pair in pairs if not cached[pair].empty]
+        rows = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=query.columns)
+        return pivot_factor_rows(query, rows)
+
+    async def _fetch(
+        self, query: FactorQuery, shape: str, missing: List[Pair], fetch: LongFetch
+    ) -> Dict[Pair, pd.DataFrame]:
+        """Fetch the long rows of the missing pairs and cache them."""
+        symbols: Set[str] = {s for s, _ in missing}
+        factors: Set[str] = {f for _, f in missing}
+        delta = FactorQuery(
+            query.table,
+            [f for f in query.factors if f in factors],
+            [s for s in query.symbols if s in symbols],
+            query.columns,
+            query.where,
+            query.context_by,
+            query.order_by,
+            query.limit,
+        )
+        rows = await fetch(delta)
+        if rows is None:
+            rows = pd.DataFrame(columns=query.columns)
+        groups = {key: group.reset_index(drop=True) for key, group in rows.groupby(["symbol", "factor_name"])}
+        ttl = ttl_for_script(delta.render_long())
+        fetched = {}
+        # 按矩形取数, 顺带刷新已缓存的组合
+        for pair in ((s, f) for s in delta.symbols for f in delta.factors):
+            fetched[pair] = groups.get(pair, rows.iloc[0:0])
+            self._cache.set(self._key(shape, pair), fetched[pair], ttl)
+        with self._lock:
+            self._stats["delta_queries"] += 1
+            self._stats["pairs_fetched"] += len(fetched)
+        return fetched
+
+
+_FACTOR_CACHE: Optional[FactorCache] = None
+_FACTOR_CACHE_LOCK = threading.Lock()
+
+
+def get_factor_cache() -> FactorCache:
+    """Return the process-wide factor cache."""
+    global _FACTOR_CACHE  # noqa: PLW0603  # pylint: disable=global-statement
+    if _FACTOR_CACHE is None:
+        with _FACTOR_CACHE_LOCK:
+            if _FACTOR_CACHE is None:
+                _FACTOR_CACHE = FactorCache(get_settings().factor_cache_max_bytes)
+    return _FACTOR_CACHE
+
+
+def use_factor_cache(query: FactorQuery) -> bool:
+    """Return whether ``query`` is answered from the factor cache."""
+    settings = get_settings()
+    return (
+        settings.cache_enabled
+        and settings.factor_cache_enabled
+        and query.is_separable()
+        and ttl_for_script(query.render_long()) > 0
+    )
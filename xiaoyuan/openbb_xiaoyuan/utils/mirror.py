@@ -0,0 +1,337 @@
+"""Local Parquet mirror of the XiaoYuan factor tables, synced incrementally from DolphinDB."""
+
+import argparse
+import json
+import sys
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+from openbb_xiaoyuan.utils.backend import DolphinDBBackend, LocalFactorBackend
+from openbb_xiaoyuan.utils.factor_cache import pivot_factor_rows
+from openbb_xiaoyuan.utils.query_builder import (
+    DAILY_FACTORS,
+    FACTOR_COLUMNS,
+    FINANCE_FACTORS_1Q,
+    Between,
+    Compare,
+    FactorQuery,
+    In,
+    Select,
+    TableRef,
+    order_predicates,
+)
+from openbb_xiaoyuan.utils.session_pool import lease_reader
+from openbb_xiaoyuan.utils.settings import get_settings
+
+# 镜像的因子表及其列
+MIRROR_TABLES: Dict[str, Tuple[TableRef, Tuple[str, ...]]] = {
+    DAILY_FACTORS.name: (DAILY_FACTORS, ("timestamp", "symbol", "factor_name", "value")),
+    FINANCE_FACTORS_1Q.name: (FINANCE_FACTORS_1Q, FACTOR_COLUMNS),
+}
+
+STATE_FILE = "_sync.json"
+
+RowFetch = Callable[[TableRef, Tuple[str, ...], Optional[Tuple[str, ...]], Any, Any], pd.DataFrame]
+
+
+def _pyarrow() -> Tuple[Any, Any]:
+    """Return the ``pyarrow`` and ``pyarrow.dataset`` modules."""
+    try:
+        import pyarrow as pa  # pylint: disable=import-outside-toplevel
+        import pyarrow.dataset as ds  # pylint: disable=import-outside-toplevel
+    except ImportError as exc:
+        raise ImportError(
+            "The local mirror requires pyarrow. Install it with `pip install pyarrow`."
+        ) from exc
+    return pa, ds
+
+
+def fetch_rows(
+    table: TableRef,
+    columns: Tuple[str, ...],
+    factors: Optional[Tuple[str, ...]],
+    start: Any,
+    end: Any,
+) -> pd.DataFrame:
+    """Read the rows of ``table`` with ``start <= timestamp < end`` from DolphinDB."""
+    where = [Compare("timestamp", ">=", start), Compare("timestamp", "<", end)]
+    if factors:
+        where.append(In("factor_name", factors))
+    script = Select(columns, table, order_predicates(where)).render()
+    # 同步读取的数据量大, 不经过结果缓存
+    with lease_reader() as reader:
+        df = reader._run_query(script=script)  # pylint: disable=protected-access
+    return df if df is not None else pd.DataFrame(columns=list(columns))
+
+
+def _timestamp_bounds(query: FactorQuery) -> Tuple[Any, Any]:
+    """Return the timestamp range implied by the predicates of ``query``, for partition pruning."""
+    start = end = None
+    for predicate in query.where:
+        if isinstance(predicate, Between) and predicate.column == "timestamp":
+            start, end = predicate.start, predicate.end
+        elif isinstance(predicate, Compare) and predicate.expression == "timestamp":
+            if predicate.op in (">", ">="):
+                start = predicate.value
+            elif predicate.op in ("<", "<="):
+                end = predicate.value
+    return start, end
+
+
+class ParquetMirror:
+    """Factor tables mirrored to ``root/<table>/symbol=<symbol>/year=<year>/*.parquet``.
+
+    Every sync appends the rows read since the last synced ``timestamp`` as a
+    new numbered batch. The rows at the last timestamp are read again, so rows
+    loaded in several batches with the same timestamp are not missed; readers
+    keep the row of the latest batch. ``compact`` rewrites each partition as
+    one file, so the files read stay one per partition however many syncs ran.
+
+    The dataset of each table, with its file list, is discovered once and
+    reused until the batch number in ``_sync.json`` changes, which every write
+    and compaction, by this or another process, increments.
+    """
+
+    def __init__(self, root: Any):
+        """Initialize the mirror rooted at a directory."""
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._datasets: Dict[str, Tuple[int, Any]] = {}
+
+    def _path(self, table: str) -> Path:
+        """Return the dataset directory of a table."""
+        if table not in MIRROR_TABLES:
+            raise ValueError(f"{table} is not mirrored.")
+        return self.root / table
+
+    def state(self, table: str) -> Dict[str, Any]:
+        """Return the last synced timestamp and batch number of a table."""
+        path = self._path(table) / STATE_FILE
+        if not path.exists():
+            return {"watermark": None, "sequence": 0}
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def write(self, table: str, rows: pd.DataFrame) -> int:
+        """Append ``rows`` to the mirror of ``table`` as a new batch and return the row count."""
+        pa, ds = _pyarrow()
+        if rows is None or rows.empty:
+            return 0
+        with self._lock:
+            state = self.state(table)
+            sequence = state["sequence"] + 1
+            rows = rows.reset_index(drop=True).assign(
+                _batch=sequence, year=pd.to_datetime(rows["timestamp"]).dt.year.to_numpy()
+            )
+            path = self._path(table)
+            self._datasets.pop(table, None)
+            ds.write_dataset(
+                pa.Table.from_pandas(rows, preserve_index=False),
+                path,
+                format="parquet",
+                partitioning=self._partitioning(),
+                basename_template=f"part-{sequence:06d}-{{i}}.parquet",
+                existing_data_behavior="overwrite_or_ignore",
+            )
+            watermark = pd.Timestamp(rows["timestamp"].max())
+            if state["watermark"] is not None:
+                watermark = max(watermark, pd.Timestamp(state["watermark"]))
+            self._write_state(table, watermark.isoformat(), sequence)
+        return len(rows)
+
+    def _write_state(self, table: str, watermark: Optional[str], sequence: int) -> None:
+        """Record the last synced timestamp and batch number of a table."""
+        (self._path(table) / STATE_FILE).write_text(
+            json.dumps({"watermark": watermark, "sequence": sequence}), encoding="utf-8"
+        )
+
+    def compact(self, table: str) -> int:
+        """Rewrite each partition of ``table`` as one file and return the number of files removed.
+
+        Only the row of the latest batch is kept for each key, with its batch
+        number, so batches written later still replace it. The new file is
+        written under a hidden name and renamed before the old files are
+        removed; readers in between see the same rows twice and deduplicate them.
+        """
+        pa, _ = _pyarrow()
+        import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+
+        columns = MIRROR_TABLES[table][1]
+        path = self._path(table)
+        if not path.exists():
+            return 0
+        removed = 0
+        with self._lock:
+            state = self.state(table)
+            sequence = state["sequence"] + 1
+            for partition in sorted(path.glob("symbol=*/year=*")):
+                files = sorted(partition.glob("*.parquet"))
+                if len(files) < 2:
+                    continue
+                df = pd.concat([pq.read_table(f).to_pandas() for f in files], ignore_index=True)
+                keys = [c for c in df.columns if c in columns and c != "value"]
+                df = df.sort_values("_batch", kind="stable").drop_duplicates(subset=keys, keep="last")
+                hidden = partition / f".part-{sequence:06d}-0.parquet"
+                pq.write_table(pa.Table.from_pandas(df, preserve_index=False), hidden)
+                hidden.rename(partition / hidden.name[1:])
+                for f in files:
+                    f.unlink()
+                removed += len(files)
+            self._datasets.pop(table, None)
+            self._write_state(table, state["watermark"], sequence)
+        return removed
+
+    @staticmethod
+    def _partitioning() -> Any:
+        """Return the hive partitioning by symbol and year."""
+        pa, ds = _pyarrow()
+        return ds.partitioning(pa.schema([("symbol", pa.string()), ("year", pa.int32())]), flavor="hive")
+
+    def read(
+        self,
+        table: str,
+        symbols: Optional[Iterable[str]] = None,
+        factors: Optional[Iterable[str]] = None,
+        start: Any = None,
+        end: Any = None,
+    ) -> pd.DataFrame:
+        """Return the long rows of a mirrored table, filtered while reading.
+
+        The symbol and year filters skip whole partitions, and the factor and
+        timestamp filters are checked against the row group statistics before
+        any data is read.
+        """
+        _, ds = _pyarrow()
+        columns = list(MIRROR_TABLES[table][1])
+        path = self._path(table)
+        if not path.exists():
+            return pd.DataFrame(columns=columns)
+        dataset = self._dataset(table)
+        filters = []
+        if symbols is not None:
+            filters.append(ds.field("symbol").isin(list(symbols)))
+        if factors is not None:
+            filters.append(ds.field("factor_name").isin(list(factors)))
+        if start is not None:
+            filters.append(ds.field("year") >= pd.Timestamp(start).year)
+            filters.append(ds.field("timestamp") >= pd.Timestamp(start))
+        if end is not None:
+            filters.append(ds.field("year") <= pd.Timestamp(end).year)
+            filters.append(ds.field("timestamp") <= pd.Timestamp(end))
+        expression = None
+        for f in filters:
+            expression = f if expression is None else expression & f
+        df = dataset.to_table(columns=columns + ["_batch"], filter=expression).to_pandas()
+        keys = [c for c in columns if c != "value"]
+        df = df.sort_values("_batch", kind="stable").drop_duplicates(subset=keys, keep="last")
+        return df[columns].reset_index(drop=True)
+
+    def _dataset(self, table: str) -> Any:
+        """Return the dataset of a table, discovering its files again only after a write."""
+        _, ds = _pyarrow()
+        sequence = self.state(table)["sequence"]
+        with self._lock:
+            cached = self._datasets.get(table)
+            if cached is not None and cached[0] == sequence:
+                return cached[1]
+        dataset = ds.dataset(self._path(table), format="parquet", partitioning=self._partitioning())
+        with self._lock:
+            self._datasets[table] = (sequence, dataset)
+        return dataset
+
+    def load(self, query: FactorQuery) -> pd.DataFrame:
+        """Return the result of a factor query computed from the mirror."""
+        query = query.optimize()
+        start, end = _timestamp_bounds(query)
+        rows = self.read(query.table.name, query.symbols, query.factors, start, end)
+        return pivot_factor_rows(query, query.evaluate_long(rows))
+
+    def sync(
+        self,
+        table: str,
+        factors: Optional[Iterable[str]] = None,
+        start: Any = None,
+        fetch: Optional[RowFetch] = None,
+    ) -> int:
+        """Pull the rows newer than the last sync, one calendar year at a time.
+
+        The first sync starts at ``start``, or at the calendar start setting.
+        Each year is written as its own batch, so an interrupted sync resumes
+        from the last year written. Returns the number of rows written.
+        """
+        source, columns = MIRROR_TABLES[table]
+        fetch = fetch or fetch_rows
+        factors = tuple(factors) if factors else None
+        watermark = self.state(table)["watermark"]
+        begin = pd.Timestamp(watermark or start or get_settings().calendar_start)
+        written = 0
+        for year in range(begin.year, date.today().year + 1):
+            chunk_start = max(begin, pd.Timestamp(year=year, month=1, day=1))
+            chunk_end = pd.Timestamp(year=year + 1, month=1, day=1)
+            written += self.write(table, fetch(source, columns, factors, chunk_start, chunk_end))
+        return written
+
+
+_MIRROR: Optional[ParquetMirror] = None
+_MIRROR_LOCK = threading.Lock()
+
+
+def get_mirror() -> ParquetMirror:
+    """Return the mirror at the configured path."""
+    global _MIRROR  # noqa: PLW0603  # pylint: disable=global-statement
+    root = get_settings().mirror_path
+    if root is None:
+        raise ValueError("XIAOYUAN_MIRROR_PATH is not set.")
+    if _MIRROR is None or _MIRROR.root != Path(root):
+        with _MIRROR_LOCK:
+            if _MIRROR is None or _MIRROR.root != Path(root):
+                _MIRROR = ParquetMirror(root)
+    return _MIRROR
+
+
+class MirrorBackend(LocalFactorBackend, DolphinDBBackend):
+    """The factor tables read from the local mirror, the reference tables from DolphinDB.
+
+    Factor queries and daily factor requests are computed in pandas from the
+    mirror at ``XIAOYUAN_MIRROR_PATH``; the cn_zvt listings, statements and
+    dividends and the trading calendar still come from the server.
+    """
+
+    def load_factor_query(self, query: FactorQuery) -> pd.DataFrame:
+        """Return the result of a factor query on a mirrored table."""
+        return get_mirror().load(query)
+
+    def read_daily_rows(
+        self, symbols: Sequence[str], factors: Sequence[str], start: Any, end: Any
+    ) -> pd.DataFrame:
+        """Return the mirrored daily factor rows between two dates."""
+        return get_mirror().read(DAILY_FACTORS.name, symbols, factors, start, end)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Sync the local mirror from the command line."""
+    parser = argparse.ArgumentParser(
+        prog="xiaoyuan-mirror", description="Sync the local Parquet mirror of the XiaoYuan factor tables."
+    )
+    parser.add_argument("root", nargs="?", default=get_settings().mirror_path, help="Mirror directory.")
+    parser.add_argument("--table", action="append", choices=list(MIRROR_TABLES), help="Table to sync; repeatable.")
+    parser.add_argument("--factors", help="Comma-separated factor names; all factors by default.")
+    parser.add_argument("--start", help="First date of the first sync.")
+    parser.add_argument("--compact", action="store_true", help="Rewrite each partition as one file after syncing.")
+    args = parser.parse_args(argv)
+    if args.root is None:
+        parser.error("Pass the mirror directory or set XIAOYUAN_MIRROR_PATH.")
+
+    mirror = ParquetMirror(args.root)
+    factors = args.factors.split(",") if args.factors else None
+    for table in args.table or list(MIRROR_TABLES):
+        written = mirror.sync(table, factors, args.start)
+        sys.stdout.write(f"{table}: {written} rows, synced to {mirror.state(table)['watermark']}\n")
+        if args.compact:
+            sys.stdout.write(f"{table}: compacted {mirror.compact(table)} files\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Post-processing of query results compiled into the tail of the DolphinDB script."""
+
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class PostProcessSpec:
+    """Final column transformations of a fetcher, run on the server.
+
+    Percentage columns are divided by 100, date columns are cast to DATE and
+    text date columns are formatted as ``yyyy-MM-dd`` strings. Rows are sorted
+    by the order of the requested symbols, then by ``order_by`` within each
+    symbol. Columns missing from the result are skipped.
+    """
+
+    percent_columns: Tuple[str, ...] = ()
+    date_columns: Tuple[str, ...] = ("报告期",)
+    date_text_columns: Tuple[str, ...] = ()
+    order_by: Optional[str] = "报告期"
+    ascending: bool = False
+
+    def compile(self, symbols: Optional[List[str]] = None, table: str = "t") -> str:
+        """Return the DolphinDB statements applying the spec to ``table`` in place."""
+        statements = []
+        # 列名可能含全角括号等字符, 统一按字符串列名访问
+        for columns, expression in (
+            (self.percent_columns, "{table}[c] / 100"),
+            (self.date_columns, "date({table}[c])"),
+            (self.date_text_columns, 'temporalFormat({table}[c], "yyyy-MM-dd")'),
+        ):
+            if columns:
+                statements.append(
+                    f"for (c in {list(columns)}) {{ if (c in columnNames({table})) "
+                    f"replaceColumn!({table}, c, {expression.format(table=table)}) }};"
+                )
+        sort_columns, directions = [], []
+        if symbols:
+            # 代码已经过 symbol 校验并以 DolphinDB 列表字面量写入, S608 为误报
+            statements.append(
+                f"{table} = select *, find({list(symbols)}, symbol) as _symbol_order from {table};"  # noqa: S608
+            )
+            sort_columns.append("_symbol_order")
+            directions.append(1)
+        if self.order_by:
+            # 与 apply 一致, 结果缺少排序列时只按代码顺序排序
+            ordered = f"sortBy!({table}, {sort_columns + [self.order_by]}, {directions + [int(self.ascending)]})"
+            fallback = f" else {{ sortBy!({table}, {sort_columns}, {directions}) }}" if sort_columns else ""
+            statements.append(f'if ("{self.order_by}" in columnNames({table})) {{ {ordered} }}{fallback};')
+        elif sort_columns:
+            statements.append(f"sortBy!({table}, {sort_columns}, {directions});")
+        if symbols:
+            statements.append(f'dropColumns!({table}, "_symbol_order");')
+        return "\n        ".join(statements)
+
+    def apply(self, df: pd.DataFrame, symbols: Optional[List[str]] = None) -> pd.DataFrame:
+        """Apply the spec to a frame in pandas, as the compiled statements do on the server."""
+        df = df.copy()
+        for column in self.percent_columns:
+            if column in df.columns:
+                df[column] = df[column] / 100
+        for column in self.date_columns:
+            if column in df.columns:
+                df[column] = pd.to_datetime(df[column]).dt.normalize()
+        for column in self.date_text_columns:
+            if column in df.columns:
+                df[column] = pd.to_datetime(df[column]).dt.strftime("%Y-%m-%d")
+        by, ascending = [], []
+        if symbols:
+            order = {s: i for i, s in enumerate(symbols)}
+            df["_symbol_order"] = df["symbol"].map(order).fillna(-1)
+            by.append("_symbol_order")
+            ascending.append(True)
+        if self.order_by and self.order_by in df.columns:
+            by.append(self.order_by)
+            ascending.append(self.ascending)
+        if by:
+            df = df.sort_values(by=by, ascending=ascending, kind="stable")
+        return df.drop(columns=["_symbol_order"], errors="ignore").reset_index(drop=True)
@@ -0,0 +1,428 @@
+"""Typed builder for the DolphinDB scripts run against the XiaoYuan factor tables."""
+
+import datetime
+import operator
+import re
+from dataclasses import dataclass, replace
+from typing import Any, Iterable, Optional, Tuple, Union
+
+import pandas as pd
+from openbb_xiaoyuan.utils.cache import script_cache_key
+from openbb_xiaoyuan.utils.postprocess import PostProcessSpec
+
+
+def quote(value: str) -> str:
+    """Return a DolphinDB string literal."""
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def date_literal(value: Any) -> str:
+    """Return a DolphinDB DATE literal, or a DATETIME literal when there is a time of day."""
+    value = pd.Timestamp(value)
+    if value == value.normalize():
+        return value.strftime("%Y.%m.%d")
+    return value.strftime("%Y.%m.%dT%H:%M:%S")
+
+
+def literal(value: Any) -> str:
+    """Return a DolphinDB literal for a Python scalar or sequence."""
+    if value is None:
+        return "null"
+    if isinstance(value, str):
+        return quote(value)
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (datetime.date, pd.Timestamp)):
+        return date_literal(value)
+    if isinstance(value, (list, tuple, pd.Index)):
+        return "[" + ", ".join(literal(v) for v in value) + "]"
+    return str(value)
+
+
+def _unique(values: Iterable[Any]) -> Tuple[Any, ...]:
+    """Return the values without duplicates or missing values, keeping their order."""
+    return tuple(dict.fromkeys(v for v in values if not pd.isna(v)))
+
+
+# 本地执行查询时支持的 DolphinDB 函数, 参数均为单个列名
+PANDAS_FUNCTIONS = {
+    "monthOfYear": lambda col: col.dt.month,
+    "year": lambda col: col.dt.year,
+    "date": lambda col: col.dt.normalize(),
+    "extractMonthDayFromTime": lambda col: col.dt.strftime("%m.%d"),
+}
+
+_CALL = re.compile(r"^(\w+)\((\w+)\)$")
+
+
+def evaluate_expression(frame: pd.DataFrame, expression: str) -> pd.Series:
+    """Evaluate a column name, or one of ``PANDAS_FUNCTIONS`` over a column, on a frame."""
+    if expression in frame.columns:
+        return frame[expression]
+    match = _CALL.match(expression.replace(" ", ""))
+    if match is None or match.group(1) not in PANDAS_FUNCTIONS:
+        raise ValueError(f"Cannot evaluate {expression!r} outside DolphinDB.")
+    return PANDAS_FUNCTIONS[match.group(1)](frame[match.group(2)])
+
+
+@dataclass(frozen=True)
+class TableRef:
+    """A distributed table."""
+
+    database: str
+    name: str
+
+    def render(self) -> str:
+        """Return the ``loadTable`` call."""
+        return f'loadTable("{self.database}", `{self.name})'
+
+
+FINANCE_FACTORS_1Q = TableRef("dfs://finance_factors_1Y", "cn_finance_factors_1Q")
+DAILY_FACTORS = TableRef("dfs://factors_6M", "cn_factors_1D")
+# 每个 (symbol, factor_name) 最新一期的财务因子快照, 见 utils.snapshot
+LATEST_FINANCE_FACTORS = TableRef("dfs://xiaoyuan_snapshots", "cn_finance_factors_latest")
+# 每个 (timestamp, symbol, 报告期) 一行、每个因子一列的财务因子宽表, 见 utils.wide_table
+WIDE_FINANCE_FACTORS = TableRef("dfs://xiaoyuan_snapshots", "cn_finance_factors_wide")
+
+
+# 谓词按代价排序: 代码过滤最有选择性, 其次是普通列上的比较, 最后是逐行计算的表达式
+SYMBOL_COLUMNS = ("symbol", "entity_id")
+
+
+@dataclass(frozen=True)
+class In:
+    """``column in [values]``, optionally casting the vector first."""
+
+    column: str
+    values: Tuple[Any, ...]
+    cast: Optional[str] = None
+
+    @property
+    def rank(self) -> int:
+        """Return the evaluation order of the predicate."""
+        return 0 if self.column in SYMBOL_COLUMNS else 2
+
+    def canonical(self) -> "In":
+        """Return the predicate with sorted, deduplicated values."""
+        return replace(self, values=tuple(sorted(_unique(self.values), key=literal)))
+
+    def render(self) -> str:
+        """Return the predicate."""
+        values = literal(self.values)
+        return f"{self.column} in {self.cast}({values})" if self.cast else f"{self.column} in {values}"
+
+    def mask(self, frame: pd.DataFrame) -> pd.Series:
+        """Return the rows of ``frame`` matching the predicate."""
+        values = list(self.values)
+        if self.cast in ("date", "datetime", "timestamp"):
+            values = list(pd.to_datetime(values))
+        return evaluate_expression(frame, self.column).isin(values)
+
+
+@dataclass(frozen=True)
+class Between:
+    """A closed date range on a column; a missing bound leaves that side open."""
+
+    column: str
+    start: Any = None
+    end: Any = None
+
+    rank = 1
+
+    def canonical(self) -> "Between":
+        """Return the predicate unchanged."""
+        return self
+
+    def render(self) -> str:
+        """Return the predicate."""
+        if self.start is not None and self.end is not None:
+            return f"{self.column} between {date_literal(self.start)} and {date_literal(self.end)}"
+        if self.start is not None:
+            return f"{self.column} >= {date_literal(self.start)}"
+        return f"{self.column} <= {date_literal(self.end)}"
+
+    def mask(self, frame: pd.DataFrame) -> pd.Series:
+        """Return the rows of ``frame`` matching the predicate."""
+        column = evaluate_expression(frame, self.column)
+        mask = pd.Series(True, index=frame.index)
+        if self.start is not None:
+            mask &= column >= pd.Timestamp(self.start)
+        if self.end is not None:
+            mask &= column <= pd.Timestamp(self.end)
+        return mask
+
+
+COMPARISONS = {
+    "=": operator.eq,
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<>": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+@dataclass(frozen=True)
+class Compare:
+    """``expression op value`` for a column or an expression over a column."""
+
+    expression: str
+    op: str
+    value: Any
+
+    @property
+    def rank(self) -> int:
+        """Return the evaluation order of the predicate."""
+        return 3 if "(" in self.expression else 1
+
+    def canonical(self) -> "Compare":
+        """Return the predicate unchanged."""
+        return self
+
+    def render(self) -> str:
+        """Return the predicate."""
+        return f"{self.expression} {self.op} {literal(self.value)}"
+
+    def mask(self, frame: pd.DataFrame) -> pd.Series:
+        """Return the rows of ``frame`` matching the predicate."""
+        column = evaluate_expression(frame, self.expression)
+        if self.value is None:
+            return column.notna() if self.op == "is not" else column.isna()
+        value = self.value
+        if isinstance(value, (datetime.date, pd.Timestamp)):
+            value = pd.Timestamp(value)
+        return COMPARISONS[self.op](column, value)
+
+
+Predicate = Union[In, Between, Compare]
+
+
+def order_predicates(predicates: Iterable[Predicate]) -> Tuple[Predicate, ...]:
+    """Return the predicates in canonical form, cheapest and most selective first."""
+    return tuple(sorted((p.canonical() for p in predicates), key=lambda p: (p.rank, p.render())))
+
+
+@dataclass(frozen=True)
+class Select:
+    """One ``select`` statement."""
+
+    columns: Tuple[str, ...]
+    source: Union[TableRef, str]
+    where: Tuple[Predicate, ...] = ()
+    context_by: Tuple[str, ...] = ()
+    order_by: Tuple[str, ...] = ()
+    limit: Optional[int] = None
+    pivot_by: Tuple[str, ...] = ()
+
+    def render(self) -> str:
+        """Return the statement without a trailing semicolon."""
+        source = self.source.render() if isinstance(self.source, TableRef) else self.source
+        # 列名与表名由代码给定, 条件的取值由 Predicate 渲染为字面量, ruff S608 为误报
+        parts = [f"select {', '.join(self.columns)} from {source}"]  # noqa: S608
+        if self.where:
+            # 逗号分隔的条件依次过滤, 后面的条件只在前面保留的行上计算
+            parts.append("where " + ", ".join(p.render() for p in self.where))
+        if self.pivot_by:
+            parts.append("pivot by " + ", ".join(self.pivot_by))
+        if self.context_by:
+            parts.append("context by " + ", ".join(self.context_by))
+        if self.order_by:
+            parts.append("order by " + ", ".join(self.order_by))
+        if self.limit is not None:
+            parts.append(f"limit {self.limit}")
+        return " ".join(parts)
+
+
+FACTOR_COLUMNS = ("timestamp", "报告期", "symbol", "factor_name", "value")
+
+
+@dataclass(frozen=True)
+class FactorQuery:
+    """A query on a long-format factor table, pivoted to one column per factor.
+
+    ``where``, ``context_by``, ``order_by`` and ``limit`` apply to the long rows
+    before pivoting by ``pivot_by`` and ``factor_name``. ``render`` always emits
+    the canonical script of the optimized query, so equivalent queries share a
+    cache key whatever the order or repetition of their factors and symbols.
+    Rows are returned in the requested symbol order when ``post_process`` is set.
+    """
+
+    table: TableRef
+    factors: Tuple[str, ...]
+    symbols: Tuple[str, ...]
+    columns: Tuple[str, ...] = FACTOR_COLUMNS
+    where: Tuple[Predicate, ...] = ()
+    context_by: Tuple[str, ...] = ()
+    order_by: Tuple[str, ...] = ()
+    limit: Optional[int] = None
+    pivot_by: Tuple[str, ...] = ("timestamp", "symbol", "报告期")
+    drop_null: bool = False
+    fiscal_period: bool = False
+    post_process: Optional[PostProcessSpec] = None
+
+    def __post_init__(self):
+        """Store the factors and symbols as tuples."""
+        object.__setattr__(self, "factors", tuple(self.factors))
+        object.__setattr__(self, "symbols", tuple(self.symbols))
+        object.__setattr__(self, "where", tuple(self.where))
+
+    def optimize(self) -> "FactorQuery":
+        """Return the query with deduplicated factors and symbols and ordered predicates."""
+        return replace(
+            self,
+            factors=_unique(self.factors),
+            symbols=_unique(self.symbols),
+            where=order_predicates(self.where),
+        )
+
+    def shape(self) -> Tuple[Any, ...]:
+        """Return everything that identifies the query apart from its factors and symbols."""
+        return (
+            self.table,
+            self.columns,
+            order_predicates(self.where),
+            self.context_by,
+            self.order_by,
+            self.limit,
+            self.pivot_by,
+            self.drop_null,
+            self.fiscal_period,
+        )
+
+    def can_merge(self, other: "FactorQuery") -> bool:
+        """Return whether both queries can run as one without changing either result."""
+        if self.shape() != other.shape():
+            return False
+        if self.limit is None:
+            return True
+        # 有 limit 时, 只有按因子与代码分组的查询合并后结果不变
+        same_factors = set(self.factors) == set(other.factors)
+        same_symbols = set(self.symbols) == set(other.symbols)
+        return (same_factors or "factor_name" in self.context_by) and (
+            same_symbols or "symbol" in self.context_by
+        )
+
+    def merge(self, other: "FactorQuery") -> "FactorQuery":
+        """Return one query covering the factors and symbols of both."""
+        if not self.can_merge(other):
+            raise ValueError("The queries differ in more than their factors and symbols.")
+        return replace(
+            self,
+            factors=_unique(self.factors + other.factors),
+            symbols=_unique(self.symbols + other.symbols),
+            post_process=self.post_process or other.post_process,
+        ).optimize()
+
+    def select(self) -> Select:
+        """Return the statement selecting the long rows of the optimized query."""
+        query = self.optimize()
+        where = order_predicates(
+            query.where
+            + (In("symbol", query.symbols), In("factor_name", query.factors))
+        )
+        return Select(
+            query.columns,
+            query.table,
+            where,
+            query.context_by,
+            query.order_by,
+            query.limit,
+        )
+
+    def is_separable(self) -> bool:
+        """Return whether each (symbol, factor) pair of the result is independent of the others."""
+        return self.limit is None or {"symbol", "factor_name"} <= set(self.context_by)
+
+    def statements(self) -> Tuple[str, ...]:
+        """Return the script statements of the optimized query."""
+        query = self.optimize()
+        statements = (
+            "t = " + query.select().render(),
+            "t = "
+            + Select(
+                ("value",),
+                "t",
+                (Compare("value", "is not", None),) if query.drop_null else (),
+                pivot_by=query.pivot_by + ("factor_name",),
+            ).render(),
+        )
+        return statements + query._finish()
+
+    def _finish(self) -> Tuple[str, ...]:
+        """Return the statements run on the pivoted table."""
+        statements = []
+        if self.fiscal_period:
+            statements.append(
+                "t = select *, getFiscalQuarterFromTime(报告期) as fiscal_period, "
+                "year(报告期) as fiscal_year from t context by symbol, 报告期"
+            )
+        if self.post_process:
+            statements.append(self.post_process.compile(list(self.symbols)).rstrip(";"))
+        return tuple(statements)
+
+    def render_wide(self, table: TableRef) -> str:
+        """Return the script reading the query from a wide table with one column per factor.
+
+        ``table`` has the ``pivot_by`` columns and one column per factor, so no
+        pivot is needed. Rows in which every requested factor is missing are
+        skipped, and grouping by ``factor_name`` becomes grouping by row: a limit
+        counts rows per symbol, which is the same as per factor when the factors
+        are reported together.
+        """
+        query = self.optimize()
+        # 因子列名含全角括号等字符, 用 _"列名" 引用
+        factors = tuple("_" + quote(f) for f in query.factors)
+        where = order_predicates(
+            query.where
+            + (
+                In("symbol", query.symbols),
+                Compare(f"rowCount({', '.join(factors)})", ">", 0),
+            )
+        )
+        select = Select(
+            query.pivot_by + factors,
+            table,
+            where,
+            tuple(c for c in query.context_by if c != "factor_name"),
+            query.order_by,
+            query.limit,
+        )
+        return ";\n".join(("t = " + select.render(),) + query._finish() + ("t",))
+
+    def evaluate_long(self, rows: pd.DataFrame) -> pd.DataFrame:
+        """Return the long rows the script of ``render_long`` would select from ``rows``.
+
+        This runs the query in pandas on rows read outside DolphinDB, such as
+        from the local mirror; expressions are limited to ``PANDAS_FUNCTIONS``.
+        """
+        select = self.select()
+        mask = pd.Series(True, index=rows.index)
+        for predicate in select.where:
+            mask &= predicate.mask(rows)
+        rows = rows[mask]
+        if select.order_by:
+            keys = pd.DataFrame({i: evaluate_expression(rows, c) for i, c in enumerate(select.order_by)})
+            rows = rows.loc[keys.sort_values(by=list(keys.columns), kind="stable").index]
+        if select.limit is not None:
+            take = (lambda g: g.tail(-select.limit)) if select.limit < 0 else (lambda g: g.head(select.limit))
+            if select.context_by:
+                groups = [evaluate_expression(rows, c) for c in select.context_by]
+                # 与 context by 一致, 各组内按上面的排序取行
+                rows = take(rows.groupby(groups, sort=False, group_keys=False))
+            else:
+                rows = take(rows)
+        return rows.reindex(columns=list(select.columns)).reset_index(drop=True)
+
+    def render_long(self) -> str:
+        """Return the script of the long rows only, before pivoting and post-processing."""
+        return self.select().render()
+
+    def render(self) -> str:
+        """Return the canonical DolphinDB script."""
+        return ";\n".join(self.statements() + ("t",))
+
+    def cache_key(self) -> str:
+        """Return the result cache key of the rendered script."""
+        return script_cache_key(self.render())
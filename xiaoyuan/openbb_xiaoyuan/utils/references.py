@@ -1,3 +1,23 @@
+import hashlib
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+from openbb_xiaoyuan.utils.postprocess import PostProcessSpec
+from openbb_xiaoyuan.utils.query_builder import (
+    DAILY_FACTORS,
+    FINANCE_FACTORS_1Q,
+    LATEST_FINANCE_FACTORS,
+    Between,
+    Compare,
+    FactorQuery,
+    In,
+    Select,
+    TableRef,
+    date_literal,
+    order_predicates,
+    quote,
+)
+
 extractMonthDayFromTime = """
 def extractMonthDayFromTime(time) {
     return substr(string(time), 5)
@@ -22,101 +42,336 @@ def getFiscalQuarterFromTime(time) {
     };
 """
 
+# 会话初始化时加载的模块与自定义函数, 查询脚本中不再重复定义
+SESSION_MODULES = ["mytt"]
+
+SESSION_HELPERS = {
+    "extractMonthDayFromTime": extractMonthDayFromTime,
+    "getFiscalQuarterFromTime": getFiscalQuarterFromTime,
+}
+
+
+def register_session_helper(name: str, definition: str) -> None:
+    """Register a DolphinDB function to be defined once per pooled session."""
+    SESSION_HELPERS[name] = definition
+
+
+def get_session_bootstrap_script(function_views: bool = False) -> str:
+    """Return the script that prepares a new session for the fetcher queries."""
+    script = "".join(f"use {module}\n" for module in SESSION_MODULES)
+    script += "".join(SESSION_HELPERS.values())
+    if function_views:
+        script += "".join(
+            f'try {{ dropFunctionView("{name}") }} catch(ex) {{}}\n'
+            f"addFunctionView({name})\n"
+            for name in SESSION_HELPERS
+        )
+    return script
+
 
-def get_query_cnzvt_sql(factor_names: dict, symbol: list, table_name: str, limit: int) -> str:
+def get_session_bootstrap_version() -> str:
+    """Return a fingerprint of the session bootstrap definitions."""
+    script = get_session_bootstrap_script().encode("utf-8")
+    return hashlib.sha1(script, usedforsecurity=False).hexdigest()[:12]
+
+
+def get_query_cnzvt_sql(
+    factor_names: dict,
+    symbol: list,
+    table_name: str,
+    limit: int,
+    post_process: Optional[PostProcessSpec] = None,
+) -> str:
+    """Return the latest ``limit`` quarterly rows of each symbol from a wide cn_zvt table."""
+    # 宽表上直接按股票取最近若干期, 不再拆成长表后重新透视
     return f"""
-        t = select timestamp,report_date as 报告期, (upper(split(id,"_")[1])+split(id,"_")[2]) as symbol,
-        {', '.join(f"{key} as {value}" for key, value in factor_names.items())} 
-        from loadTable("dfs://cn_zvt","{table_name}") where (upper(split(id,"_")[1])+split(id,"_")[2]) in {symbol};
-        t = t.unpivot(keyColNames=["timestamp","报告期","symbol"],valueColNames={list(factor_names.values())});
-        rename!(t,`timestamp`报告期`symbol`factor_name`value);
-        t = select timestamp, 报告期, symbol, factor_name, value from t context by symbol, factor_name order by 报告期 limit {limit};
-        t = select value from t pivot by timestamp,symbol,报告期,factor_name;
-        select *,getFiscalQuarterFromTime(报告期) as fiscal_period,year(报告期) as fiscal_year 
+        t = select timestamp, (upper(split(entity_id,"_")[1])+split(entity_id,"_")[2]) as symbol, report_date as 报告期,
+        {', '.join(f"{key} as {value}" for key, value in factor_names.items())}
+        from loadTable("dfs://cn_zvt","{table_name}") where entity_id in {to_entity_ids(symbol)}
+        context by entity_id order by report_date limit {limit};
+        t = select *,getFiscalQuarterFromTime(报告期) as fiscal_period,year(报告期) as fiscal_year
         from t context by symbol,报告期;
+        {post_process.compile(symbol) if post_process else ""}
+        t
         """
 
 
 # Script 组合
-def get_query_finance_sql(factor_names: list, symbol: list, report_month: str) -> str:
-    return f"""
-        t = select timestamp,报告期, symbol, factor_name ,value 
-        from loadTable("dfs://finance_factors_1Y", `cn_finance_factors_1Q) 
-        where factor_name in {factor_names} 
-            and symbol in {symbol} 
-            {report_month} 
-        t = select value from t pivot by timestamp,symbol,报告期,factor_name;
-        select *,getFiscalQuarterFromTime(报告期) as fiscal_period,year(报告期) as fiscal_year 
-        from t context by symbol,报告期;
-        """
+def get_finance_query(
+    factor_names: list,
+    symbol: list,
+    report_month: Dict[str, Any],
+    post_process: Optional[PostProcessSpec] = None,
+) -> FactorQuery:
+    """Return the query for the latest reports of the quarterly finance factors."""
+    return FactorQuery(
+        FINANCE_FACTORS_1Q,
+        factor_names,
+        symbol,
+        fiscal_period=True,
+        post_process=post_process,
+        **report_month,
+    )
 
 
-def get_recent_1q_query_finance_sql(
-    factor_names: list, symbol: list, cur_date: str
+def get_query_finance_sql(
+    factor_names: list,
+    symbol: list,
+    report_month: Dict[str, Any],
+    post_process: Optional[PostProcessSpec] = None,
 ) -> str:
-    return f"""
-        t = select timestamp,报告期, symbol, factor_name ,value 
-        from loadTable("dfs://finance_factors_1Y", `cn_finance_factors_1Q) 
-        where factor_name in {factor_names} 
-            and symbol in {symbol} and timestamp <= {cur_date} context by symbol order by timestamp limit -1;
+    return get_finance_query(factor_names, symbol, report_month, post_process).render()
 
-        t = select value from t where value is not null pivot by 报告期,timestamp,symbol, factor_name;
-        t
-        """
 
+def get_recent_1q_query(
+    factor_names: list, symbol: list, cur_date: Any, snapshot: bool = False
+) -> FactorQuery:
+    """Return the query for the last finance report published on or before ``cur_date``.
+
+    Each symbol keeps its single latest non-null row, so a symbol gives one
+    报告期 row. With ``snapshot`` the row is looked up in the latest-report
+    snapshot, which already holds the latest row of each symbol and factor,
+    instead of scanning every report; the latest of those is the latest row of
+    the symbol, so both tables give the same result. The snapshot only answers
+    a ``cur_date`` on or after its last refresh.
+    """
+    return FactorQuery(
+        LATEST_FINANCE_FACTORS if snapshot else FINANCE_FACTORS_1Q,
+        factor_names,
+        symbol,
+        where=(
+            Compare("timestamp", "<=", pd.Timestamp(cur_date).normalize()),
+            Compare("value", "is not", None),
+        ),
+        context_by=("symbol",),
+        order_by=("timestamp",),
+        limit=-1,
+        pivot_by=("报告期", "timestamp", "symbol"),
+        drop_null=True,
+    )
+
+
+def get_recent_1q_query_finance_sql(
+    factor_names: list, symbol: list, cur_date: Any, snapshot: bool = False
+) -> str:
+    return get_recent_1q_query(factor_names, symbol, cur_date, snapshot).render()
 
-def get_report_month(period: str, limit=-4) -> str:
+
+def get_report_month(period: str, limit=-4) -> Dict[str, Any]:
+    """Return the ``FactorQuery`` arguments selecting the latest ``limit`` reports of a period."""
     period_to_month = {
-        "ytd": "",
-        "annual": "12",
+        "ytd": None,
+        "annual": 12,
     }
     if period not in period_to_month:
         raise ValueError(f"Invalid period: {period}")
     month = period_to_month[period]
-    return (
-        (
-            f" and monthOfYear(报告期) = {month}  context by symbol,factor_name,extractMonthDayFromTime(报告期) "
-            f"order by 报告期 limit {limit} ;"
-        )
-        if month
-        else f"context by symbol,factor_name,extractMonthDayFromTime(报告期) "
-        f"order by 报告期 limit {limit};"
+    return {
+        "where": (Compare("monthOfYear(报告期)", "=", month),) if month else (),
+        "context_by": ("symbol", "factor_name", "extractMonthDayFromTime(报告期)"),
+        "order_by": ("报告期",),
+        "limit": limit,
+    }
+
+
+# 报告期前后查找交易日的自然日数, 覆盖春节等最长休市
+ASOF_LOOKBACK_DAYS = 15
+
+
+def render_asof_daily(
+    reports: FactorQuery,
+    post_process: Optional[PostProcessSpec] = None,
+    forward: bool = False,
+) -> str:
+    """Return one script joining the rows of ``reports`` to the daily factors of a nearby trading day.
+
+    Each report row picks the daily row of its own symbol on the last trading
+    day before the report date, or with ``forward`` on the first trading day on
+    or after it. Daily rows are read only within ``ASOF_LOOKBACK_DAYS`` of the
+    report dates.
+    """
+    reports = reports.optimize()
+    daily = Select(
+        ("date(timestamp) as _day", "symbol", "factor_name", "value"),
+        DAILY_FACTORS,
+        order_predicates((In("symbol", reports.symbols), In("factor_name", reports.factors))),
+    )
+    # 候选日期由报告期在服务端展开, 再用 aj 按股票匹配交易日
+    if forward:
+        # aj 只向前匹配, 日期取负后"之后第一个"即变为"之前最后一个"
+        window = f"cross(add, distinct(date(t.报告期)), 0..{ASOF_LOOKBACK_DAYS})"
+        left, right = "-int(date(报告期))", "-int(_day)"
+    else:
+        window = f"cross(sub, distinct(date(t.报告期)), 1..{ASOF_LOOKBACK_DAYS})"
+        left, right = "date(报告期) - 1", "_day"
+    # 拼接的只有上面固定的表达式, S608 为误报
+    join = (
+        f"days = distinct(flatten({window}))",
+        f"d = {daily.render()}, timestamp in datetime(days)",
+        "d = select value from d where value is not null pivot by _day, symbol, factor_name",
+        f"d = select *, {right} as _asof from d order by _asof",  # noqa: S608
+        f"t = select *, {left} as _asof from t",  # noqa: S608
+        "t = aj(t, d, `symbol`_asof)",
+        'dropColumns!(t, columnNames(t)[like(columnNames(t), "%_asof") or like(columnNames(t), "%_day")])',
     )
+    statements = reports.statements() + (
+        "if (size(t) > 0) {\n    " + ";\n    ".join(join) + ";\n}",
+    )
+    if post_process:
+        statements += (post_process.compile(list(reports.symbols)).rstrip(";"),)
+    return ";\n".join(statements + ("t",))
 
 
-def get_specific_daily_sql(factor_names: list, symbol: list, date_list: list) -> str:
-    return f"""
-        timestamp = {date_list};
-        date_list_table = table(timestamp);
-        timestamp_table = select datetime(date(timestamp)) from date_list_table;
-        t = select timestamp, symbol, factor_name,value
-            from loadTable("dfs://factors_6M", `cn_factors_1D)
-            where factor_name in {factor_names} and
-            timestamp in timestamp_table
-            and symbol in {symbol};
-        t = select value from t where value is not null pivot by timestamp, symbol, factor_name;
-        t
-        """
+def get_asof_daily_rows_sql(
+    symbols: List[str], factor_names: List[str], report_dates: Any, forward: bool = False
+) -> str:
+    """Return the long daily rows ``render_asof_daily`` may join to reports of the given dates.
+
+    Only the candidate days of each report date are read: the
+    ``ASOF_LOOKBACK_DAYS`` days before it, or with ``forward`` the date and the
+    days after it.
+    """
+    dates = pd.to_datetime(pd.Series(report_dates)).dt.normalize().dropna().unique()
+    offsets = range(0, ASOF_LOOKBACK_DAYS + 1) if forward else range(-ASOF_LOOKBACK_DAYS, 0)
+    days = sorted({d + pd.Timedelta(days=k) for d in dates for k in offsets})
+    return Select(
+        ("timestamp", "symbol", "factor_name", "value"),
+        DAILY_FACTORS,
+        order_predicates(
+            (
+                In("symbol", tuple(symbols)),
+                In("factor_name", tuple(factor_names)),
+                In("timestamp", tuple(days), cast="datetime"),
+            )
+        ),
+    ).render()
+
+
+def get_asof_daily_sql(
+    factor_names: list,
+    symbol: list,
+    report_month: Dict[str, Any],
+    post_process: Optional[PostProcessSpec] = None,
+) -> str:
+    """Return the latest reports joined to the daily factors of the trading day before each."""
+    return render_asof_daily(get_finance_query(factor_names, symbol, report_month), post_process)
+
+
+def get_recent_1q_daily_sql(
+    factor_names: list, symbol: list, cur_date: Any, snapshot: bool = False
+) -> str:
+    """Return the last report of each symbol joined to the daily factors of its first trading day."""
+    return render_asof_daily(
+        get_recent_1q_query(factor_names, symbol, cur_date, snapshot), forward=True
+    )
+
+
+def get_daily_factors_sql(
+    factor_names: list,
+    symbol: list,
+    start: Any,
+    end: Any,
+    change_of: Optional[str] = None,
+    after: Any = None,
+) -> str:
+    """Return the daily factors of each symbol between two dates, one column per factor.
+
+    With ``change_of``, the change of that column from the previous row of the
+    same symbol is added as ``change`` and ``changeOverTime``. With ``after``,
+    only the rows after that date are returned, so ``start`` can reach back to
+    the trading day whose close the first change is measured from.
+    """
+    select = Select(
+        ("timestamp", "symbol", "factor_name", "value"),
+        DAILY_FACTORS,
+        order_predicates(
+            (
+                In("symbol", symbol),
+                In("factor_name", factor_names),
+                Between("timestamp", start, end),
+            )
+        ),
+    )
+    statements = [
+        "t = " + select.render(),
+        "t = select value from t pivot by timestamp, symbol, factor_name",
+    ]
+    # change_of 为模型给定的因子列名, 日期经 date_literal 渲染, S608 为误报
+    if change_of:
+        statements += [
+            f"update t set ref_close = REF({change_of}, 1) context by symbol",  # noqa: S608
+            f"update t set change = {change_of} - ref_close context by symbol",  # noqa: S608
+            "update t set changeOverTime = change / ref_close context by symbol",
+        ]
+    if after is not None:
+        statements.append(f"t = select * from t where timestamp > {date_literal(after)}")  # noqa: S608
+    return ";\n".join(statements + ["t"])
 
 
 def get_dividend_sql(
-    start_date: str,
-    end_date: str,
-    code: str = None,
+    start_date: Any,
+    end_date: Any,
+    symbol: str = None,
     table_name: str = "dividend_detail",
 ) -> str:
-    dividend_sql = f"""
-        select upper(split(entity_id,'_')[1])+split(entity_id,'_')[2] as symbol, 
-        dividend_per_share_before_tax as dividend,
-        record_date as recordDate,
-        dividend_date as paymentDate,
-        dividend_date as date 
-        from loadTable("dfs://cn_zvt", `{table_name}) 
-        where dividend_date between {start_date} and {end_date} 
-        """
-    if code:
-        dividend_sql += f" and code = '{code[-6:]}'"
-    return dividend_sql
+    where = [Between("dividend_date", start_date, end_date)]
+    if symbol:
+        where.append(In("entity_id", tuple(to_entity_ids(symbol.split(",")))))
+    return Select(
+        (
+            "upper(split(entity_id,'_')[1])+split(entity_id,'_')[2] as symbol",
+            "dividend_per_share_before_tax as dividend",
+            "record_date as recordDate",
+            "dividend_date as paymentDate",
+            "dividend_date as date",
+        ),
+        TableRef("dfs://cn_zvt", table_name),
+        order_predicates(where),
+    ).render()
+
+
+# 各类证券对应的 cn_zvt 参考表
+ASSET_TABLES = {
+    "stock": "stock",
+    "etf": "etf",
+    "index": "index",
+}
+
+
+def get_listing_sql(
+    table_name: str,
+    symbols: Optional[List[str]] = None,
+    exchanges: Optional[List[str]] = None,
+) -> str:
+    """Return the listings of a cn_zvt reference table, optionally of some symbols or exchanges only."""
+    where = []
+    if symbols:
+        # 参考表名即 entity_id 的类型前缀
+        where.append(In("entity_id", tuple(to_entity_ids(symbols, table_name))))
+    if exchanges:
+        where.append(In("exchange", tuple(exchanges)))
+    return Select(
+        (
+            "upper(split(entity_id,'_')[1])+split(entity_id,'_')[2] as symbol",
+            "name",
+            "exchange",
+            "list_date",
+            "end_date",
+        ),
+        TableRef("dfs://cn_zvt", table_name),
+        order_predicates(where),
+    ).render()
+
+
+def get_trading_days_sql(market: str, start: Any, end: Any) -> str:
+    """Return the call listing the trading days of a market between two dates."""
+    return f"getMarketCalendar({quote(market)}, {date_literal(start)}, {date_literal(end)})"
+
+
+def to_entity_ids(symbols: list, entity_type: str = "stock") -> list:
+    """Convert ``SH600519`` style symbols to cn_zvt entity ids such as ``stock_sh_600519``."""
+    # 直接按存储的 entity_id 过滤, 避免对每一行拆分字符串
+    return [f"{entity_type}_{s[:2].lower()}_{s[2:]}" for s in symbols]
 
 
 def convert_stock_code_format(symbol):
@@ -136,3 +391,13 @@ def revert_stock_code_format(data):
         elif "SZ" in i["symbol"]:
             i["symbol"] = i["symbol"].replace("SZ", "") + ".SZ"
     return data
+
+
+def revert_stock_code_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert the symbol column back to the ``.SS``/``.SZ`` suffix format, like ``revert_stock_code_format``."""
+    symbol = df["symbol"].astype(str)
+    sh = symbol.str.contains("SH", regex=False)
+    sz = ~sh & symbol.str.contains("SZ", regex=False)
+    df["symbol"] = df["symbol"].where(~sh, symbol.str.replace("SH", "", regex=False) + ".SS")
+    df["symbol"] = df["symbol"].where(~sz, symbol.str.replace("SZ", "", regex=False) + ".SZ")
+    return df
@@ -0,0 +1,429 @@
+"""Pooled DolphinDB sessions shared by the XiaoYuan fetchers."""
+
+# pylint: disable=protected-access
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, suppress
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from openbb_xiaoyuan.utils.cache import (
+    copy_result,
+    get_query_cache,
+    get_single_flight,
+    script_cache_key,
+    ttl_for_script,
+)
+from openbb_xiaoyuan.utils.references import (
+    get_session_bootstrap_script,
+    get_session_bootstrap_version,
+)
+from openbb_xiaoyuan.utils.settings import get_settings
+
+T = TypeVar("T")
+
+
+@dataclass(eq=False)
+class PooledSession:
+    """A reader owned by the pool together with its bookkeeping."""
+
+    reader: Any
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    suspect: bool = False
+    bootstrap_version: Optional[str] = None
+
+
+class SessionPool:
+    """Thread-safe pool of reusable DolphinDB readers.
+
+    Sessions are created lazily up to ``max_size``, handed out LIFO so the
+    warmest session is reused first, and evicted once they have been idle for
+    longer than ``idle_timeout`` (never below ``min_size``). A session that has
+    been idle for more than ``health_check_interval`` seconds, or that was in use
+    when an error was raised, is pinged before it is handed out again.
+
+    Leases are scoped to the current thread or asyncio task: nested calls to
+    ``lease`` in the same context reuse the session that is already checked out.
+
+    When a ``bootstrap`` callable is given it runs once on every new session, and
+    again on checkout whenever ``bootstrap_version()`` no longer matches the
+    version the session was prepared with.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        min_size: int = 1,
+        max_size: int = 16,
+        idle_timeout: float = 300.0,
+        checkout_timeout: float = 30.0,
+        health_check_interval: float = 30.0,
+        ping: Optional[Callable[[Any], Any]] = None,
+        close: Optional[Callable[[Any], Any]] = None,
+        bootstrap: Optional[Callable[[Any], Any]] = None,
+        bootstrap_version: Optional[Callable[[], str]] = None,
+    ):
+        """Initialize the pool."""
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1.")
+        self.factory = factory
+        self.min_size = min(min_size, max_size)
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self.health_check_interval = health_check_interval
+        self._ping = ping
+        self._close = close
+        self._bootstrap = bootstrap
+        self._bootstrap_version = bootstrap_version or (lambda: "")
+        self._idle: List[PooledSession] = []
+        self._size = 0
+        self._cond = threading.Condition()
+        self._current: ContextVar[Optional[PooledSession]] = ContextVar(
+            f"xiaoyuan_session_{id(self)}", default=None
+        )
+        self._stats = {
+            "created": 0,
+            "reused": 0,
+            "bootstrapped": 0,
+            "evicted": 0,
+            "discarded": 0,
+        }
+        self._closed = False
+
+    @property
+    def size(self) -> int:
+        """Return the number of open sessions, idle or leased."""
+        return self._size
+
+    def stats(self) -> Dict[str, int]:
+        """Return a snapshot of the pool counters."""
+        with self._cond:
+            return {
+                **self._stats,
+                "size": self._size,
+                "idle": len(self._idle),
+                "leased": self._size - len(self._idle),
+            }
+
+    def prewarm(self) -> None:
+        """Open sessions until the pool holds at least ``min_size`` of them."""
+        sessions = []
+        try:
+            while self.size < self.min_size:
+                sessions.append(self.acquire())
+        finally:
+            for session in sessions:
+                self.release(session)
+
+    def acquire(self) -> PooledSession:
+        """Check a session out of the pool, opening a new one if allowed."""
+        deadline = time.monotonic() + self.checkout_timeout
+        while True:
+            session, expired = self._checkout(deadline)
+            self._close_all(expired)
+            if session is None:
+                return self._open()
+            if self._is_healthy(session) and self._prepare(session):
+                self._stats["reused"] += 1
+                return session
+            self._discard(session)
+
+    def release(self, session: PooledSession, broken: bool = False) -> None:
+        """Return a session to the pool, or drop it when it is broken."""
+        if broken or self._closed:
+            self._discard(session)
+            return
+        session.last_used = time.monotonic()
+        with self._cond:
+            self._idle.append(session)
+            self._cond.notify()
+
+    @contextmanager
+    def lease(self) -> Iterator[Any]:
+        """Lease a reader for the current thread or task."""
+        current = self._current.get()
+        if current is not None:
+            yield current.reader
+            return
+        session = self.acquire()
+        token = self._current.set(session)
+        try:
+            yield session.reader
+        except Exception:
+            session.suspect = True
+            raise
+        finally:
+            self._current.reset(token)
+            self.release(session)
+
+    def evict_idle(self) -> int:
+        """Close sessions that have been idle for too long."""
+        with self._cond:
+            expired = self._collect_expired()
+        self._close_all(expired)
+        return len(expired)
+
+    def close(self) -> None:
+        """Close every idle session; leased sessions are closed on release."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._closed = True
+        self._close_all(idle)
+
+    def _checkout(
+        self, deadline: float
+    ) -> Tuple[Optional[PooledSession], List[PooledSession]]:
+        """Pop an idle session or reserve a slot for a new one."""
+        with self._cond:
+            while True:
+                expired = self._collect_expired()
+                if self._idle:
+                    return self._idle.pop(), expired
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None, expired
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(
+                        f"No XiaoYuan session became available within {self.checkout_timeout}s."
+                    )
+                self._cond.wait(remaining)
+
+    def _collect_expired(self) -> List[PooledSession]:
+        """Remove idle sessions past their idle timeout. Caller holds the lock."""
+        now = time.monotonic()
+        expired: List[PooledSession] = []
+        for session in list(self._idle):
+            if self._size - len(expired) <= self.min_size:
+                break
+            if now - session.last_used >= self.idle_timeout:
+                expired.append(session)
+        for session in expired:
+            self._idle.remove(session)
+        self._size -= len(expired)
+        self._stats["evicted"] += len(expired)
+        return expired
+
+    def _open(self) -> PooledSession:
+        """Open a new session in a slot reserved by ``_checkout``."""
+        try:
+            session = PooledSession(reader=self.factory())
+        except BaseException:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        self._stats["created"] += 1
+        self._prepare(session, raise_errors=True)
+        return session
+
+    def _prepare(self, session: PooledSession, raise_errors: bool = False) -> bool:
+        """Run the bootstrap script on a session that is not up to date."""
+        version = self._bootstrap_version()
+        if self._bootstrap is None or session.bootstrap_version == version:
+            return True
+        try:
+            self._bootstrap(session.reader)
+        except Exception:  # pylint: disable=broad-except
+            if raise_errors:
+                self._discard(session)
+                raise
+            return False
+        session.bootstrap_version = version
+        self._stats["bootstrapped"] += 1
+        return True
+
+    def _is_healthy(self, session: PooledSession) -> bool:
+        """Ping a session that is suspect or has been idle for a while."""
+        idle_for = time.monotonic() - session.last_used
+        if self._ping is None or (
+            not session.suspect and idle_for < self.health_check_interval
+        ):
+            return True
+        try:
+            self._ping(session.reader)
+        except Exception:  # pylint: disable=broad-except
+            return False
+        session.suspect = False
+        return True
+
+    def _discard(self, session: PooledSession) -> None:
+        """Drop a session and free its slot."""
+        with self._cond:
+            self._size -= 1
+            self._stats["discarded"] += 1
+            self._cond.notify()
+        self._close_all([session])
+
+    def _close_all(self, sessions: List[PooledSession]) -> None:
+        """Close the given sessions, ignoring errors from dead connections."""
+        if self._close is None:
+            return
+        for session in sessions:
+            with suppress(Exception):
+                self._close(session.reader)
+
+
+def _open_reader() -> Any:
+    """Open a new DolphinDB reader."""
+    # pylint: disable=import-outside-toplevel
+    from jinniuai_data_store.reader import get_jindata_reader
+
+    return get_jindata_reader()
+
+
+def _bootstrap_reader(reader: Any) -> None:
+    """Load the modules and helper functions the fetcher scripts rely on."""
+    reader._run_query(
+        script=get_session_bootstrap_script(
+            function_views=get_settings().pool_function_views
+        )
+    )
+
+
+def _ping_reader(reader: Any) -> None:
+    """Run a trivial script to make sure the session is still alive."""
+    reader._run_query(script="1")
+
+
+def _close_reader(reader: Any) -> None:
+    """Close the connection held by a reader."""
+    closer = getattr(reader, "close", None) or getattr(
+        getattr(reader, "session", None), "close", None
+    )
+    if callable(closer):
+        closer()
+
+
+_POOL: Optional[SessionPool] = None
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_POOL_LOCK = threading.RLock()
+
+
+def get_session_pool() -> SessionPool:
+    """Return the session pool shared by every XiaoYuan fetcher."""
+    global _POOL  # noqa: PLW0603  # pylint: disable=global-statement
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                settings = get_settings()
+                _POOL = SessionPool(
+                    factory=_open_reader,
+                    min_size=settings.pool_min_size,
+                    max_size=settings.pool_max_size,
+                    idle_timeout=settings.pool_idle_timeout,
+                    checkout_timeout=settings.pool_checkout_timeout,
+                    health_check_interval=settings.pool_health_check_interval,
+                    ping=_ping_reader,
+                    close=_close_reader,
+                    bootstrap=_bootstrap_reader,
+                    bootstrap_version=get_session_bootstrap_version,
+                )
+    return _POOL
+
+
+@contextmanager
+def lease_reader() -> Iterator[Any]:
+    """Lease a pooled reader for the duration of the ``with`` block."""
+    with get_session_pool().lease() as reader:
+        yield reader
+
+
+def _cached(script: str) -> Tuple[Optional[str], float, Any]:
+    """Return the cache key, the TTL and the cached result of a script."""
+    if not get_settings().cache_enabled:
+        return None, 0.0, None
+    ttl = ttl_for_script(script)
+    if ttl <= 0:
+        return None, ttl, None
+    key = script_cache_key(script)
+    return key, ttl, get_query_cache().get(key)
+
+
+def run_query(script: str) -> Any:
+    """Run a DolphinDB script on a pooled session.
+
+    Results are served from the provider result cache while they are fresh, and
+    identical scripts that are already running are awaited rather than re-run.
+    Callers always receive their own copy and may modify it in place.
+    """
+    key, ttl, result = _cached(script)
+    if result is not None:
+        return result
+    return copy_result(_fetch(script, key, ttl))
+
+
+def _fetch(script: str, key: Optional[str], ttl: float) -> Any:
+    """Run a script, joining an identical call that is already in flight."""
+    if not get_settings().coalesce_queries:
+        return _execute(script, key, ttl)
+    return get_single_flight().do(
+        key or script_cache_key(script), partial(_execute, script, key, ttl)
+    )
+
+
+def _execute(script: str, key: Optional[str], ttl: float) -> Any:
+    """Run a script on a pooled session and cache the result under ``key``."""
+    with lease_reader() as reader:
+        result = reader._run_query(script=script)
+    if key is not None and result is not None:
+        get_query_cache().set(key, result, ttl)
+    return result
+
+
+def get_query_executor() -> ThreadPoolExecutor:
+    """Return the executor that runs blocking DolphinDB calls off the event loop."""
+    global _EXECUTOR  # noqa: PLW0603  # pylint: disable=global-statement
+    if _EXECUTOR is None:
+        with _POOL_LOCK:
+            if _EXECUTOR is None:
+                settings = get_settings()
+                _EXECUTOR = ThreadPoolExecutor(
+                    max_workers=settings.query_concurrency or settings.pool_max_size,
+                    thread_name_prefix="xiaoyuan-query",
+                )
+    return _EXECUTOR
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking callable on the query executor and await its result.
+
+    The executor has a fixed number of workers, so at most that many DolphinDB
+    calls are in flight at once; further calls queue without blocking the loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_query_executor(), partial(func, *args, **kwargs)
+    )
+
+
+async def arun_query(script: str) -> Any:
+    """Run a DolphinDB script on a pooled session without blocking the event loop."""
+    key, ttl, result = _cached(script)
+    if result is not None:
+        return result
+    if not get_settings().coalesce_queries:
+        return copy_result(await run_blocking(_execute, script, key, ttl))
+    result = await get_single_flight().ado(
+        key or script_cache_key(script),
+        partial(run_blocking, _fetch, script, key, ttl),
+    )
+    return copy_result(result)
+
+
+async def arun_with_reader(func: Callable[[Any], T]) -> T:
+    """Call ``func`` with a leased reader on the query executor."""
+
+    def _call() -> T:
+        with lease_reader() as reader:
+            return func(reader)
+
+    return await run_blocking(_call)
@@ -0,0 +1,162 @@
+"""XiaoYuan provider settings."""
+
+import os
+from datetime import date
+from functools import lru_cache
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+ENV_PREFIX = "XIAOYUAN_"
+
+
+class XiaoYuanSettings(BaseModel):
+    """Provider-wide settings for the XiaoYuan provider.
+
+    Every field can be overridden with an environment variable named after the
+    field, upper-cased and prefixed with ``XIAOYUAN_`` (e.g. ``XIAOYUAN_POOL_MAX_SIZE``).
+    """
+
+    pool_min_size: int = Field(
+        default=1, ge=0, description="Sessions kept warm in the pool."
+    )
+    pool_max_size: int = Field(
+        default=16, ge=1, description="Upper bound of concurrently leased sessions."
+    )
+    pool_idle_timeout: float = Field(
+        default=300.0,
+        gt=0,
+        description="Seconds an idle session is kept before it is evicted.",
+    )
+    pool_checkout_timeout: float = Field(
+        default=30.0,
+        gt=0,
+        description="Seconds to wait for a free session before giving up.",
+    )
+    pool_health_check_interval: float = Field(
+        default=30.0,
+        ge=0,
+        description="Sessions idle for longer than this are pinged on checkout.",
+    )
+    query_concurrency: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="DolphinDB calls run concurrently by async fetchers."
+        " Defaults to the pool max size.",
+    )
+    pool_function_views: bool = Field(
+        default=False,
+        description="Also install the session helpers as server-side function views.",
+    )
+    coalesce_queries: bool = Field(
+        default=True,
+        description="Share one execution between identical scripts running concurrently.",
+    )
+    calendar_market: str = Field(
+        default="XSHG", description="Market code passed to getMarketCalendar."
+    )
+    calendar_start: date = Field(
+        default=date(2005, 1, 1), description="First day of the cached trading calendar."
+    )
+    universe_refresh_interval: float = Field(
+        default=3600.0,
+        gt=0,
+        description="Seconds before the cached stock, ETF and index listings are reloaded.",
+    )
+    bulk_transform: bool = Field(
+        default=True,
+        description="Validate fetched rows into Data models one column at a time.",
+    )
+    batch_window_ms: float = Field(
+        default=0.0,
+        ge=0,
+        description="Milliseconds to collect finance factor queries into one batch; 0 disables batching.",
+    )
+    batch_max_symbols: int = Field(
+        default=500,
+        ge=1,
+        description="Symbols in one batched query before it is sent early.",
+    )
+    latest_snapshot_enabled: bool = Field(
+        default=False,
+        description="Answer latest-report lookups from a snapshot table maintained on the server.",
+    )
+    latest_snapshot_refresh_interval: float = Field(
+        default=3600.0,
+        gt=0,
+        description="Seconds before the latest-report snapshot is brought up to date again.",
+    )
+    backend: str = Field(
+        default="dolphindb",
+        description="Backend answering the fetcher requests: dolphindb, mirror, duckdb, or a registered name.",
+    )
+    duckdb_path: Optional[str] = Field(
+        default=None,
+        description="DuckDB database file of the duckdb backend; the database is in memory when unset.",
+    )
+    mirror_path: Optional[str] = Field(
+        default=None,
+        description="Directory of the local Parquet mirror read by the mirror backend.",
+    )
+    wide_finance_enabled: bool = Field(
+        default=False,
+        description="Read finance statement factors from a wide table maintained on the server.",
+    )
+    wide_finance_refresh_interval: float = Field(
+        default=3600.0,
+        gt=0,
+        description="Seconds before the wide finance factor table is brought up to date again.",
+    )
+    cache_enabled: bool = Field(
+        default=True, description="Cache query results in memory."
+    )
+    cache_max_bytes: int = Field(
+        default=256 * 1024 * 1024,
+        ge=0,
+        description="Memory budget of the result cache, in bytes.",
+    )
+    factor_cache_enabled: bool = Field(
+        default=False,
+        description="Cache finance factor rows per symbol and factor, shared across fetchers.",
+    )
+    factor_cache_max_bytes: int = Field(
+        default=64 * 1024 * 1024,
+        ge=0,
+        description="Memory budget of the factor cache, in bytes.",
+    )
+    cache_ttl_finance: float = Field(
+        default=6 * 3600.0,
+        ge=0,
+        description="Seconds results from cn_finance_factors_1Q are cached.",
+    )
+    cache_ttl_daily: float = Field(
+        default=60.0,
+        ge=0,
+        description="Seconds results from cn_factors_1D are cached.",
+    )
+    cache_ttl_reference: float = Field(
+        default=3600.0,
+        ge=0,
+        description="Seconds results from the cn_zvt reference tables are cached.",
+    )
+    cache_ttl_default: float = Field(
+        default=0.0,
+        ge=0,
+        description="Seconds results from any other script are cached.",
+    )
+
+    @classmethod
+    def from_env(cls) -> "XiaoYuanSettings":
+        """Build the settings from the ``XIAOYUAN_*`` environment variables."""
+        values = {
+            name: os.environ[f"{ENV_PREFIX}{name.upper()}"]
+            for name in cls.model_fields
+            if f"{ENV_PREFIX}{name.upper()}" in os.environ
+        }
+        return cls(**values)
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> XiaoYuanSettings:
+    """Return the process-wide XiaoYuan settings."""
+    return XiaoYuanSettings.from_env()
@@ -0,0 +1,117 @@
+"""Latest finance report per symbol and factor, materialized on the DolphinDB server."""
+
+import threading
+import time
+from typing import Optional
+from warnings import warn
+
+from openbb_xiaoyuan.utils.query_builder import (
+    FINANCE_FACTORS_1Q,
+    LATEST_FINANCE_FACTORS,
+    TableRef,
+)
+from openbb_xiaoyuan.utils.session_pool import lease_reader, run_blocking
+from openbb_xiaoyuan.utils.settings import get_settings
+
+# 快照库按代码哈希分区, 按代码查询时只读对应分区
+SNAPSHOT_PARTITIONS = 16
+
+
+def get_snapshot_refresh_sql(
+    source: TableRef = FINANCE_FACTORS_1Q, target: TableRef = LATEST_FINANCE_FACTORS
+) -> str:
+    """Return the script that creates the snapshot if needed and upserts the newer rows.
+
+    The snapshot has the columns of ``source`` and one row per (symbol,
+    factor_name), the one with the latest ``timestamp``. Only source rows at or
+    after the latest timestamp already in the snapshot are read, so a refresh
+    after the first one scans the recent partitions only and rows loaded in
+    several batches with the same timestamp are not missed. The script returns
+    the number of rows upserted.
+    """
+    # 脚本只拼接 TableRef 的库表名与常量, 不含外部输入
+    return f"""
+        src = {source.render()};
+        if (!existsDatabase("{target.database}")) {{
+            database("{target.database}", HASH, [SYMBOL, {SNAPSHOT_PARTITIONS}])
+        }};
+        if (!existsTable("{target.database}", "{target.name}")) {{
+            cols = schema(src).colDefs;
+            database("{target.database}").createPartitionedTable(
+                table(1:0, cols.name, cols.typeString), "{target.name}", `symbol)
+        }};
+        snap = {target.render()};
+        w = exec max(timestamp) from snap;
+        if (isNull(w)) {{
+            new = select * from src where value is not null
+                context by symbol, factor_name order by timestamp limit -1
+        }} else {{
+            new = select * from src where timestamp >= w, value is not null
+                context by symbol, factor_name order by timestamp limit -1
+        }};
+        if (size(new) > 0) {{
+            snap.upsert!(new, keyColNames=`symbol`factor_name)
+        }};
+        size(new)
+        """  # noqa: S608
+
+
+def refresh_latest_snapshot() -> int:
+    """Bring the snapshot up to date and return the number of rows upserted."""
+    # 刷新脚本会写表, 不经过结果缓存与合并
+    with lease_reader() as reader:
+        result = reader._run_query(script=get_snapshot_refresh_sql())  # pylint: disable=protected-access
+    return int(result or 0)
+
+
+_REFRESHED_AT: Optional[float] = None
+_AVAILABLE = False
+_SNAPSHOT_LOCK = threading.Lock()
+
+
+def _is_fresh() -> bool:
+    """Return whether the snapshot was refreshed within the refresh interval."""
+    return (
+        _REFRESHED_AT is not None
+        and time.monotonic() - _REFRESHED_AT < get_settings().latest_snapshot_refresh_interval
+    )
+
+
+def ensure_latest_snapshot() -> bool:
+    """Refresh the snapshot once it is stale and return whether it can be queried.
+
+    Returns ``False`` when the snapshot is disabled, or when it could not be
+    built; callers then scan ``cn_finance_factors_1Q`` instead.
+    """
+    global _REFRESHED_AT, _AVAILABLE  # noqa: PLW0603  # pylint: disable=global-statement
+    if not get_settings().latest_snapshot_enabled:
+        return False
+    if _is_fresh():
+        return _AVAILABLE
+    with _SNAPSHOT_LOCK:
+        if not _is_fresh():
+            try:
+                refresh_latest_snapshot()
+                _AVAILABLE = True
+            except Exception as exc:  # pylint: disable=broad-except
+                # 刷新失败时, 已建好的快照仍可使用, 只是略有滞后
+                warn(f"Could not refresh the latest finance report snapshot: {exc}")
+            _REFRESHED_AT = time.monotonic()
+    return _AVAILABLE
+
+
+async def aensure_latest_snapshot() -> bool:
+    """Return whether the snapshot can be queried, refreshing it off the event loop if needed."""
+    if not get_settings().latest_snapshot_enabled:
+        return False
+    if _is_fresh():
+        return _AVAILABLE
+    return await run_blocking(ensure_latest_snapshot)
+
+
+def reset_latest_snapshot() -> None:
+    """Forget the last refresh, so the next lookup refreshes the snapshot."""
+    global _REFRESHED_AT, _AVAILABLE  # noqa: PLW0603  # pylint: disable=global-statement
+    with _SNAPSHOT_LOCK:
+        _REFRESHED_AT = None
+        _AVAILABLE = False
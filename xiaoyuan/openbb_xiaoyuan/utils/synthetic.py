@@ -0,0 +1,480 @@
+"""Deterministic synthetic A-share tables for load testing the XiaoYuan fetchers offline."""
+
+import argparse
+import sys
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 日频因子: 个股与 ETF 的不复权、前复权行情与估值, 指数行情
+STOCK_PRICE_FACTORS = (
+    "开盘价（不复权）",
+    "最高价（不复权）",
+    "最低价（不复权）",
+    "收盘价（不复权）",
+    "成交量（不复权）",
+    "开盘价（前复权）",
+    "最高价（前复权）",
+    "最低价（前复权）",
+    "收盘价（前复权）",
+)
+VALUATION_FACTORS = (
+    "总市值",
+    "市盈率（静态）",
+    "市净率（静态）",
+    "股息率",
+    "市盈率（滚动）",
+    "市销率（滚动）",
+)
+INDEX_FACTORS = ("开盘价", "最高价", "最低价", "收盘价", "成交量")
+
+# 各财务接口请求的季度财务因子
+FINANCE_FACTORS = (
+    "应收账款",
+    "预付款项",
+    "存货",
+    "其他流动资产",
+    "流动资产合计",
+    "固定资产",
+    "无形资产",
+    "商誉",
+    "其他非流动资产",
+    "非流动资产合计",
+    "资产总计",
+    "应付账款",
+    "应付利息",
+    "其他流动负债",
+    "流动负债合计",
+    "其他非流动负债",
+    "非流动负债合计",
+    "负债合计",
+    "少数股东权益",
+    "股东权益合计",
+    "负债和股东权益合计",
+    "应付股利",
+    "减：库存股",
+    "其他综合收益",
+    "净债务",
+    "经营活动产生的现金流量净额",
+    "投资活动产生的现金流量净额",
+    "发行债券收到的现金",
+    "偿还债务支付的现金",
+    "筹资活动产生的现金流量净额",
+    "折旧与摊销",
+    "营业总收入",
+    "营业总成本",
+    "营业成本",
+    "研发费用",
+    "每股收益",
+    "稀释每股收益",
+    "综合收益总额",
+    "其中：利息收入",
+    "利息支出",
+    "其他收益",
+    "持续经营净利润",
+    "终止经营净利润",
+    "息税折旧摊销前利润",
+    "每股收益EPSTTM（元）",
+    "营运资本",
+    "毛利",
+    "息税前利润",
+    "企业自由现金流量",
+    "总资产同比增长率（百分比）",
+    "净利润同比增长率（百分比）",
+    "经营活动产生的现金流量净额同比增长率（百分比）",
+    "营业总收入同比增长率（百分比）",
+    "营业收入同比增长率",
+    "基本每股收益同比增长率（百分比）",
+    "稀释每股收益同比增长率（百分比）",
+    "流动比率",
+    "速动比率",
+    "固定资产周转率",
+    "总资产周转率",
+    "存货周转率",
+    "存货周转天数",
+    "应收账款周转率（含应收票据）",
+    "应收账款周转天数（含应收票据）",
+    "营业周期",
+    "应付账款周转率",
+    "应付账款周转天数（含应付票据）",
+    "净资产收益率ROE（摊薄）（百分比）",
+    "总资产净利率ROA（百分比）",
+    "投入资本回报率ROIC（百分比）",
+    "投入资本回报率ROIC（TTM）（百分比）",
+    "销售毛利率（百分比）",
+    "净利润比营业总收入（百分比）",
+    "营业利润比营业总收入（百分比）",
+    "净利润比利润总额",
+    "利润总额比息税前利润",
+    "息税前利润比营业总收入",
+    "资产负债率",
+    "产权比率",
+)
+
+# cn_zvt 季度报表的列与同值的财务因子
+STATEMENT_TABLES = {
+    "income_statement_qtr": {
+        "total_op_income": "营业总收入",
+        "total_operating_costs": "营业总成本",
+        "operating_costs": "营业成本",
+        "rd_costs": "研发费用",
+        "eps": "每股收益",
+        "diluted_eps": "稀释每股收益",
+        "total_comprehensive_income": "综合收益总额",
+        "fi_interest_income": "其中：利息收入",
+        "fi_other_income": "其他收益",
+        "fi_net_profit_continuing_operations": "持续经营净利润",
+        "fi_iscontinued_operating_net_profit": "终止经营净利润",
+    },
+    "cash_flow_statement_qtr": {
+        "net_op_cash_flows": "经营活动产生的现金流量净额",
+        "net_investing_cash_flows": "投资活动产生的现金流量净额",
+        "cash_from_issuing_bonds": "发行债券收到的现金",
+        "cash_to_repay_borrowings": "偿还债务支付的现金",
+    },
+    "financial_index_qtr": {
+        "q_yoy_cfo": "经营活动产生的现金流量净额同比增长率（百分比）",
+    },
+}
+
+# 按百分数存储的比例因子
+PERCENT_FACTORS = frozenset(
+    ["资产负债率", "净利润比利润总额", "利润总额比息税前利润", "息税前利润比营业总收入"]
+)
+
+# 各季度报告期后的大致披露天数
+PUBLICATION_LAG_DAYS = {3: 25, 6: 55, 9: 25, 12: 110}
+
+# 各板块的代码段与权重: (交易所, 起始代码, 权重)
+STOCK_BOARDS = (("sh", 600000, 7), ("sh", 688000, 2), ("sz", 1, 4), ("sz", 300000, 6), ("bj", 830000, 1))
+ETF_BOARDS = (("sh", 510000, 1), ("sz", 159000, 1))
+INDEX_BOARDS = (("sh", 1, 1), ("sz", 399001, 1))
+
+
+@dataclass(frozen=True)
+class SyntheticConfig:
+    """Scale and seed of a synthetic dataset.
+
+    Every symbol draws from its own generator seeded by ``seed`` and its
+    position, so a dataset is identical whatever ``chunk_size`` it is produced
+    with, and the first ``n`` stocks of a larger dataset equal a dataset of
+    ``n`` stocks.
+    """
+
+    stocks: int = 5000
+    etfs: int = 300
+    indices: int = 50
+    start: date = date(2020, 1, 1)
+    end: date = date(2024, 12, 31)
+    seed: int = 0
+    chunk_size: int = 100
+
+
+def trading_days(start: Any, end: Any) -> pd.DatetimeIndex:
+    """Return the weekdays between two dates, less New Year, Labour Day and National Day."""
+    days = pd.bdate_range(start, end)
+    holiday = (
+        ((days.month == 1) & (days.day == 1))
+        | ((days.month == 5) & (days.day <= 3))
+        | ((days.month == 10) & (days.day <= 7))
+    )
+    return days[~holiday]
+
+
+def _rng(config: SyntheticConfig, *keys: int) -> np.random.Generator:
+    """Return the generator of one symbol and table."""
+    return np.random.default_rng([config.seed, *keys])
+
+
+def _codes(count: int, boards: Tuple[Tuple[str, int, int], ...]) -> List[Tuple[str, int]]:
+    """Return ``count`` (exchange, code) pairs spread over the boards by weight."""
+    cycle = [board for board in boards for _ in range(board[2])]
+    used = {board: 0 for board in boards}
+    codes = []
+    for i in range(count):
+        board = cycle[i % len(cycle)]
+        codes.append((board[0], board[1] + used[board]))
+        used[board] += 1
+    return codes
+
+
+def make_listings(config: SyntheticConfig) -> pd.DataFrame:
+    """Return the stock, ETF and index listings with an ``asset_type`` column.
+
+    Most securities were listed before ``start``; a fifth of the stocks list
+    during the period and one in fifty is delisted before ``end``.
+    """
+    start, end = pd.Timestamp(config.start), pd.Timestamp(config.end)
+    span = max((end - start).days - 60, 1)
+    rows = []
+    for kind, (asset_type, count, boards, label) in enumerate(
+        (
+            ("stock", config.stocks, STOCK_BOARDS, "样本股份"),
+            ("etf", config.etfs, ETF_BOARDS, "样本ETF"),
+            ("index", config.indices, INDEX_BOARDS, "样本指数"),
+        )
+    ):
+        for i, (exchange, code) in enumerate(_codes(count, boards)):
+            rng = _rng(config, 0, kind, i)
+            if asset_type == "stock" and rng.random() < 0.2:
+                list_date = start + pd.Timedelta(days=int(rng.integers(0, span)))
+            else:
+                list_date = start - pd.Timedelta(days=int(rng.integers(30, 8000)))
+            end_date = pd.NaT
+            if asset_type == "stock" and rng.random() < 0.02 and list_date < end - pd.Timedelta(days=60):
+                end_date = list_date + (end - list_date) * rng.uniform(0.3, 0.9)
+            rows.append(
+                {
+                    "entity_id": f"{asset_type}_{exchange}_{code:06d}",
+                    "symbol": f"{exchange.upper()}{code:06d}",
+                    "name": f"{label}{i:04d}",
+                    "exchange": exchange,
+                    "list_date": list_date.normalize(),
+                    "end_date": pd.Timestamp(end_date).normalize() if pd.notna(end_date) else pd.NaT,
+                    "asset_type": asset_type,
+                }
+            )
+    listings = pd.DataFrame(rows)
+    listings["list_date"] = pd.to_datetime(listings["list_date"])
+    listings["end_date"] = pd.to_datetime(listings["end_date"])
+    return listings
+
+
+def _active_days(days: pd.DatetimeIndex, listing: Dict[str, Any]) -> pd.DatetimeIndex:
+    """Return the trading days on which a security was listed."""
+    active = days >= listing["list_date"]
+    if pd.notna(listing["end_date"]):
+        active &= days < listing["end_date"]
+    return days[active]
+
+
+def _bars(rng: np.random.Generator, days: int, level: float, volatility: float) -> Dict[str, np.ndarray]:
+    """Return a random walk of open, high, low and close prices and a volume."""
+    close = level * np.exp(np.cumsum(rng.normal(0.0002, volatility, days)))
+    open_ = close * np.exp(rng.normal(0, volatility / 3, days))
+    spread = np.abs(rng.normal(0, volatility / 2, days))
+    return {
+        "open": open_,
+        "high": np.maximum(open_, close) * (1 + spread),
+        "low": np.minimum(open_, close) * (1 - spread),
+        "close": close,
+        "volume": np.round(rng.lognormal(15, 0.6, days)),
+    }
+
+
+def _stock_daily(
+    config: SyntheticConfig, i: int, listing: Dict[str, Any], days: pd.DatetimeIndex
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Return the daily factors and dividends of one stock.
+
+    Dividends are paid once a year in June or July; the 前复权 prices follow the
+    random walk and the 不复权 prices are higher before each ex-dividend day by
+    the dividend yield, so the latest prices of both agree.
+    """
+    rng = _rng(config, 1, i)
+    bars = _bars(rng, len(days), rng.lognormal(3, 0.7), rng.uniform(0.012, 0.03))
+    factor = np.ones(len(days))
+    dividends = []
+    for year in sorted(set(days.year)):
+        candidates = np.flatnonzero((days.year == year) & days.month.isin([6, 7]))
+        if len(candidates) < 2 or rng.random() > 0.7:
+            continue
+        ex = candidates[rng.integers(1, len(candidates))]
+        rate = rng.uniform(0.005, 0.04)
+        factor[:ex] *= 1 - rate
+        dividends.append((ex, rate))
+    # 前复权价格 = 不复权价格 × 之后各次分红的复权因子
+    raw = {k: v / factor for k, v in bars.items() if k != "volume"}
+    shares = rng.lognormal(20.5, 1.0)
+    eps, bps = rng.uniform(0.05, 5), rng.uniform(1, 30)
+    noise = rng.normal(1, 0.03, len(days))
+    df = pd.DataFrame(
+        {
+            "timestamp": days,
+            "开盘价（不复权）": raw["open"],
+            "最高价（不复权）": raw["high"],
+            "最低价（不复权）": raw["low"],
+            "收盘价（不复权）": raw["close"],
+            "成交量（不复权）": bars["volume"],
+            "开盘价（前复权）": bars["open"],
+            "最高价（前复权）": bars["high"],
+            "最低价（前复权）": bars["low"],
+            "收盘价（前复权）": bars["close"],
+            "总市值": raw["close"] * shares,
+            "市盈率（静态）": raw["close"] / eps,
+            "市净率（静态）": raw["close"] / bps,
+            "股息率": np.full(len(days), dividends[-1][1] * 100 if dividends else 0.0),
+            "市盈率（滚动）": raw["close"] / eps * noise,
+            "市销率（滚动）": raw["close"] / eps / rng.uniform(3, 20) * noise,
+        }
+    )
+    dividend_rows = pd.DataFrame(
+        {
+            "entity_id": listing["entity_id"],
+            "dividend_per_share_before_tax": [round(rate * raw["close"][ex - 1], 4) for ex, rate in dividends],
+            "record_date": [days[ex - 1] for ex, _ in dividends],
+            "dividend_date": [days[ex] for ex, _ in dividends],
+        }
+    )
+    return df, dividend_rows
+
+
+def _fund_daily(config: SyntheticConfig, i: int, days: pd.DatetimeIndex, index: bool) -> pd.DataFrame:
+    """Return the daily bars of one ETF or index."""
+    rng = _rng(config, 2 if index else 3, i)
+    bars = _bars(rng, len(days), rng.uniform(1000, 5000) if index else rng.uniform(0.5, 5), 0.012)
+    if index:
+        return pd.DataFrame({"timestamp": days, **dict(zip(INDEX_FACTORS, bars.values()))})
+    columns = dict(zip(STOCK_PRICE_FACTORS[:5], bars.values()))
+    # ETF 不分红, 前复权与不复权相同
+    columns.update(zip(STOCK_PRICE_FACTORS[5:], list(bars.values())[:4]))
+    return pd.DataFrame({"timestamp": days, **columns})
+
+
+def _finance_level(name: str, size: float, rng: np.random.Generator) -> Tuple[float, float]:
+    """Return the level and quarterly noise of a finance factor of a company of a given size."""
+    if "百分比" in name or name.endswith("增长率") or name in PERCENT_FACTORS:
+        return rng.uniform(-5, 60), 0.25
+    if "天数" in name or name == "营业周期":
+        return rng.uniform(15, 240), 0.1
+    if "率" in name or "比" in name:
+        return rng.uniform(0.2, 8), 0.1
+    if "每股" in name:
+        return rng.uniform(0.05, 4), 0.2
+    return size * rng.lognormal(0, 0.8), 0.15
+
+
+def _stock_finance(
+    config: SyntheticConfig, i: int, listing: Dict[str, Any]
+) -> Tuple[pd.DataFrame, Dict[str, pd.DataFrame]]:
+    """Return the quarterly finance factors of one stock and its cn_zvt statement rows.
+
+    Reports cover the year before ``start`` on, and are published some weeks
+    after each quarter, later for the annual report; reports not yet published
+    at ``end`` are left out. A few factors are missing in each report.
+    """
+    rng = _rng(config, 4, i)
+    first = max(pd.Timestamp(config.start) - pd.DateOffset(years=1), listing["list_date"] - pd.DateOffset(years=1))
+    reports = pd.date_range(first, config.end, freq="QE")
+    lags = np.array([PUBLICATION_LAG_DAYS[d.month] for d in reports]) + rng.integers(0, 10, len(reports))
+    published = reports + pd.to_timedelta(lags, unit="D")
+    keep = published <= pd.Timestamp(config.end)
+    reports, published = reports[keep], published[keep]
+    size = rng.lognormal(20, 1.2)
+    growth = rng.normal(0.02, 0.03)
+    trend = (1 + growth) ** np.arange(len(reports))
+    columns = {}
+    for name in FINANCE_FACTORS:
+        level, noise = _finance_level(name, size, rng)
+        values = level * trend * rng.normal(1, noise, len(reports))
+        values[rng.random(len(reports)) < 0.02] = np.nan
+        columns[name] = values
+    wide = pd.DataFrame({"timestamp": published, "报告期": reports, **columns})
+    statements = {
+        table: pd.DataFrame(
+            {
+                "entity_id": listing["entity_id"],
+                "timestamp": published,
+                "report_date": reports,
+                **{column: columns[name] for column, name in mapping.items()},
+            }
+        )
+        for table, mapping in STATEMENT_TABLES.items()
+    }
+    return wide, statements
+
+
+def _long(frames: List[pd.DataFrame], keys: List[str]) -> pd.DataFrame:
+    """Return wide per-symbol frames as long ``factor_name``/``value`` rows without missing values."""
+    if not frames:
+        return pd.DataFrame(columns=keys + ["factor_name", "value"])
+    wide = pd.concat(frames, ignore_index=True)
+    rows = wide.melt(id_vars=keys, var_name="factor_name", value_name="value")
+    return rows.dropna(subset=["value"]).reset_index(drop=True)
+
+
+def generate(config: SyntheticConfig) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """Yield ``(table, rows)`` pairs of the dataset, to be appended to the named tables.
+
+    The listings come first, then the daily factors of the indices and ETFs,
+    then per chunk of ``chunk_size`` stocks their daily factors, finance
+    factors, dividends and cn_zvt statements. Tables keep the DolphinDB names
+    and columns.
+    """
+    listings = make_listings(config)
+    for asset_type, rows in listings.groupby("asset_type", sort=False):
+        yield asset_type, rows.drop(columns=["symbol", "asset_type"]).reset_index(drop=True)
+    days = trading_days(config.start, config.end)
+
+    funds = listings[listings["asset_type"] != "stock"].to_dict(orient="records")
+    for begin in range(0, len(funds), config.chunk_size):
+        frames = []
+        for position, listing in enumerate(funds[begin : begin + config.chunk_size], start=begin):
+            df = _fund_daily(config, position, _active_days(days, listing), listing["asset_type"] == "index")
+            frames.append(df.assign(symbol=listing["symbol"]))
+        yield "cn_factors_1D", _long(frames, ["timestamp", "symbol"])
+
+    stocks = listings[listings["asset_type"] == "stock"].to_dict(orient="records")
+    for begin in range(0, len(stocks), config.chunk_size):
+        daily, finance, dividends = [], [], []
+        statements: Dict[str, List[pd.DataFrame]] = {table: [] for table in STATEMENT_TABLES}
+        for i, listing in enumerate(stocks[begin : begin + config.chunk_size], start=begin):
+            bars, paid = _stock_daily(config, i, listing, _active_days(days, listing))
+            daily.append(bars.assign(symbol=listing["symbol"]))
+            if not paid.empty:
+                dividends.append(paid)
+            reports, tables = _stock_finance(config, i, listing)
+            finance.append(reports.assign(symbol=listing["symbol"]))
+            for table, rows in tables.items():
+                statements[table].append(rows)
+        yield "cn_factors_1D", _long(daily, ["timestamp", "symbol"])
+        yield "cn_finance_factors_1Q", _long(finance, ["timestamp", "报告期", "symbol"])
+        if dividends:
+            yield "dividend_detail", pd.concat(dividends, ignore_index=True)
+        for table, frames in statements.items():
+            yield table, pd.concat(frames, ignore_index=True)
+
+
+def load_synthetic(store: Any, config: Optional[SyntheticConfig] = None) -> Dict[str, int]:
+    """Generate a dataset into a store with a ``load(table, rows)`` method and return the rows per table.
+
+    ``store`` is typically a ``DuckDBBackend``.
+    """
+    counts: Dict[str, int] = {}
+    for table, rows in generate(config or SyntheticConfig()):
+        counts[table] = counts.get(table, 0) + store.load(table, rows)
+    return counts
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Write a synthetic dataset to a DuckDB database from the command line."""
+    # pylint: disable=import-outside-toplevel
+    from openbb_xiaoyuan.utils.duckdb_store import DuckDBBackend
+
+    defaults = SyntheticConfig()
+    parser = argparse.ArgumentParser(
+        prog="xiaoyuan-synthetic", description="Write a synthetic A-share dataset to a DuckDB database."
+    )
+    parser.add_argument("path", help="DuckDB database file; existing tables are appended to.")
+    parser.add_argument("--stocks", type=int, default=defaults.stocks)
+    parser.add_argument("--etfs", type=int, default=defaults.etfs)
+    parser.add_argument("--indices", type=int, default=defaults.indices)
+    parser.add_argument("--start", type=date.fromisoformat, default=defaults.start)
+    parser.add_argument("--end", type=date.fromisoformat, default=defaults.end)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    args = parser.parse_args(argv)
+
+    config = SyntheticConfig(args.stocks, args.etfs, args.indices, args.start, args.end, args.seed)
+    store = DuckDBBackend(args.path)
+    try:
+        for table, count in load_synthetic(store, config).items():
+            sys.stdout.write(f"{table}: {count} rows\n")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
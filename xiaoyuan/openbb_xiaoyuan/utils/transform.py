@@ -0,0 +1,246 @@
+"""Column-at-a-time validation of XiaoYuan query results into Data models."""
+
+import datetime
+import inspect
+from functools import cache
+from typing import Any, Callable, Dict, List, Optional, Type, TypeVar, Union
+
+import pandas as pd
+from openbb_core.provider.abstract.data import Data
+from openbb_xiaoyuan.utils.settings import get_settings
+from pydantic import ConfigDict, PydanticUserError, TypeAdapter, ValidationError
+
+D = TypeVar("D", bound=Data)
+
+Columns = Dict[str, List[Any]]
+
+# 影响单个字段取值的模型配置项, 按列校验时需要沿用
+FIELD_CONFIG_KEYS = (
+    "strict",
+    "str_strip_whitespace",
+    "str_to_lower",
+    "str_to_upper",
+    "str_min_length",
+    "str_max_length",
+    "coerce_numbers_to_str",
+    "arbitrary_types_allowed",
+    "allow_inf_nan",
+    "ser_json_timedelta",
+    "val_json_bytes",
+)
+
+
+# 这些类型的值与 0 比较恒为 False, 无需逐个比较
+_NEVER_ZERO = (str, type(None), pd.Timestamp, type(pd.NaT))
+
+
+def _is_zero(value: Any) -> bool:
+    """Return whether ``value == 0`` holds, as the row validators test it."""
+    if isinstance(value, _NEVER_ZERO):
+        return False
+    try:
+        return bool(value == 0)
+    except (TypeError, ValueError):
+        return False
+
+
+def _has_zero(values: List[Any]) -> bool:
+    """Return whether any value equals zero, comparing in C where possible."""
+    try:
+        return 0 in values
+    except (TypeError, ValueError):
+        return True
+
+
+def replace_zero_columns(columns: Columns) -> Columns:
+    """Replace zero values with None in every column, like the ``replace_zero`` validators."""
+    return {
+        name: [None if _is_zero(v) else v for v in values] if _has_zero(values) else values
+        for name, values in columns.items()
+    }
+
+
+# 模型级校验器的按列等价实现; 含其他模型级校验器的模型仍逐行校验
+COLUMN_MODEL_VALIDATORS: Dict[str, Optional[Callable[[Columns], Columns]]] = {
+    "_use_alias": None,
+    "replace_zero": replace_zero_columns,
+}
+
+
+class _ColumnPlan:
+    """How one model field is validated as a column."""
+
+    def __init__(self, adapter: TypeAdapter, before: List[Callable], after: List[Callable]):
+        """Initialize the plan."""
+        self.adapter = adapter
+        self.before = before
+        self.after = after
+
+    def validate(self, values: List[Any]) -> List[Any]:
+        """Run the field validators and the type coercion over a whole column."""
+        for func in self.before:
+            values = _map_unique(func, values)
+        values = self.adapter.validate_python(values)
+        for func in self.after:
+            values = _map_unique(func, values)
+        return values
+
+
+# 不可变的标量类型, 校验结果可以在相同取值的行之间共用
+_SCALAR_TYPES = (str, int, float, bool, datetime.date, datetime.time, type(None))
+
+
+def _map_unique(func: Callable[[Any], Any], values: List[Any]) -> List[Any]:
+    """Apply a field validator once per distinct scalar value of a column."""
+    seen: Dict[Any, Any] = {}
+    results = []
+    for value in values:
+        if not isinstance(value, _SCALAR_TYPES):
+            results.append(func(value))
+            continue
+        key = (type(value), value)
+        if key not in seen:
+            result = func(value)
+            if not isinstance(result, _SCALAR_TYPES):
+                results.append(result)
+                continue
+            seen[key] = result
+        results.append(seen[key])
+    return results
+
+
+@cache
+def _column_plans(model: Type[Data]) -> Optional[Dict[str, _ColumnPlan]]:
+    """Return per-field column validators, or None when a model needs row validation."""
+    decorators = model.__pydantic_decorators__
+    if any(name not in COLUMN_MODEL_VALIDATORS for name in decorators.model_validators):
+        return None
+    if model.__private_attributes__ or model.__pydantic_post_init__:
+        return None
+    if any(not isinstance(_input_alias(field), str) for field in model.model_fields.values()):
+        return None
+    validators: Dict[str, Dict[str, List[Callable]]] = {
+        name: {"before": [], "after": []} for name in model.model_fields
+    }
+    for decorator in decorators.field_validators.values():
+        func = getattr(model, decorator.cls_var_name)
+        if decorator.info.mode not in ("before", "after") or "*" in decorator.info.fields:
+            return None
+        if len(inspect.signature(func).parameters) != 1:
+            return None
+        for name in decorator.info.fields:
+            if name in validators:
+                validators[name][decorator.info.mode].append(func)
+    config = ConfigDict(
+        **{k: v for k, v in model.model_config.items() if k in FIELD_CONFIG_KEYS}
+    )
+    try:
+        return {
+            name: _ColumnPlan(
+                TypeAdapter(List[field.rebuild_annotation()], config=config),
+                # 与逐行校验一致, 后定义的 before 校验器先执行
+                list(reversed(validators[name]["before"])),
+                validators[name]["after"],
+            )
+            for name, field in model.model_fields.items()
+        }
+    except PydanticUserError:
+        return None
+
+
+def _input_alias(field: Any) -> Any:
+    """Return the key a field is populated from besides its name."""
+    return field.validation_alias or field.alias or ""
+
+
+def _to_columns(data: Union[pd.DataFrame, List[Dict]]) -> Optional[Columns]:
+    """Return the data as column lists, or None when rows differ in their keys."""
+    if isinstance(data, pd.DataFrame):
+        if data.columns.duplicated().any():
+            return None
+        return {name: data[name].tolist() for name in data.columns}
+    if not data:
+        return {}
+    keys = list(data[0])
+    key_set = set(keys)
+    if any(len(d) != len(keys) or d.keys() != key_set for d in data):
+        return None
+    return {key: [d[key] for d in data] for key in keys}
+
+
+_object_setattr = object.__setattr__
+
+
+def _validate_rows(model: Type[D], data: Union[pd.DataFrame, List[Dict]]) -> List[D]:
+    """Validate each row on its own."""
+    if isinstance(data, pd.DataFrame):
+        data = data.to_dict(orient="records")
+    return [model.model_validate(d) for d in data]
+
+
+def validate_frame(model: Type[D], data: Union[pd.DataFrame, List[Dict]]) -> List[D]:
+    """Validate query results into ``model`` instances one column at a time.
+
+    Aliases are renamed and the model-level validators are applied per column;
+    each field is then coerced with a single list validation, and the instances
+    are built from the validated columns without validating them again. Models
+    and inputs the column path cannot reproduce exactly fall back to
+    ``model_validate`` per row, so both paths return identical objects.
+    """
+    plans = _column_plans(model) if get_settings().bulk_transform else None
+    columns = _to_columns(data) if plans is not None else None
+    if columns is None:
+        return _validate_rows(model, data)
+    if not columns:
+        return []
+
+    aliases = {alias: name for name, alias in model.__alias_dict__.items()}
+    renamed = [aliases.get(name, name) for name in columns]
+    if len(set(renamed)) != len(renamed):
+        return _validate_rows(model, data)
+    columns = dict(zip(renamed, columns.values()))
+    for name in model.__pydantic_decorators__.model_validators:
+        column_validator = COLUMN_MODEL_VALIDATORS[name]
+        if column_validator is not None:
+            columns = column_validator(columns)
+
+    mapping: Dict[str, str] = {}
+    for name, field in model.model_fields.items():
+        keys = {k for k in (_input_alias(field), name) if k in columns}
+        if len(keys) > 1:
+            return _validate_rows(model, data)
+        if keys:
+            mapping[name] = keys.pop()
+        elif field.is_required():
+            return _validate_rows(model, data)
+
+    rows = len(next(iter(columns.values())))
+    try:
+        fields = {
+            name: plans[name].validate(columns[column])
+            for name, column in mapping.items()
+        }
+    except (ValidationError, TypeError, ValueError):
+        # 交给逐行校验, 报错信息与原来一致
+        return _validate_rows(model, data)
+    for name, field in model.model_fields.items():
+        if name not in fields:
+            fields[name] = [field.get_default(call_default_factory=True) for _ in range(rows)]
+
+    used = set(mapping.values())
+    extras = {name: values for name, values in columns.items() if name not in used}
+    names = list(model.model_fields)
+    field_rows = zip(*(fields[name] for name in names))
+    extra_rows = zip(*extras.values()) if extras else ((),) * rows
+    # 与 model_validate 一致, 额外字段也记入 fields_set
+    fields_set = set(mapping) | set(extras)
+    new = model.__new__
+    results = []
+    for values, extra in zip(field_rows, extra_rows):
+        obj = new(model)
+        _object_setattr(obj, "__dict__", dict(zip(names, values)))
+        _object_setattr(obj, "__pydantic_fields_set__", set(fields_set))
+        _object_setattr(obj, "__pydantic_extra__", dict(zip(extras, extra)))
+        _object_setattr(obj, "__pydantic_private__", None)
+        results.append(obj)
+    return results
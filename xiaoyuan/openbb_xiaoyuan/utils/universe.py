@@ -0,0 +1,129 @@
+"""Listed symbol universe cached in process for the XiaoYuan fetchers."""
+
+import threading
+import time
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional
+from warnings import warn
+
+import pandas as pd
+from openbb_xiaoyuan.utils.backend import get_backend
+from openbb_xiaoyuan.utils.references import ASSET_TABLES
+from openbb_xiaoyuan.utils.session_pool import run_blocking
+from openbb_xiaoyuan.utils.settings import get_settings
+
+UNIVERSE_COLUMNS = ["symbol", "name", "exchange", "list_date", "end_date", "asset_type"]
+
+
+class SymbolUniverse:
+    """Stocks, ETFs and indices with constant-time membership checks.
+
+    Symbols use the internal ``SH600519`` format. Membership covers every symbol
+    in the reference tables, delisted ones included; use ``is_listed`` to check
+    whether a symbol was trading on a given date.
+    """
+
+    def __init__(self, listings: pd.DataFrame):
+        """Initialize the universe from the rows of the cn_zvt listing tables."""
+        listings = listings.reindex(columns=UNIVERSE_COLUMNS)
+        listings["list_date"] = pd.to_datetime(listings["list_date"])
+        listings["end_date"] = pd.to_datetime(listings["end_date"])
+        self.listings = listings.drop_duplicates(
+            subset=["asset_type", "symbol"]
+        ).reset_index(drop=True)
+        self._members: Dict[str, FrozenSet[str]] = {
+            asset_type: frozenset(group["symbol"])
+            for asset_type, group in self.listings.groupby("asset_type")
+        }
+        self._all = frozenset(self.listings["symbol"])
+        # 同一代码可能同时是指数与股票, 按类型顺序取第一条
+        self._rows = {
+            row["symbol"]: row
+            for row in reversed(self.listings.to_dict(orient="records"))
+        }
+
+    def __len__(self) -> int:
+        """Return the number of symbols."""
+        return len(self._all)
+
+    def __contains__(self, symbol: str) -> bool:
+        """Return whether the symbol is known."""
+        return symbol in self._all
+
+    def members(self, asset_type: Optional[str] = None) -> FrozenSet[str]:
+        """Return the symbols of one asset type, or of all of them."""
+        if asset_type is None:
+            return self._all
+        return self._members.get(asset_type, frozenset())
+
+    def contains(self, symbol: str, asset_type: Optional[str] = None) -> bool:
+        """Return whether the symbol is known, optionally as a given asset type."""
+        return symbol in self.members(asset_type)
+
+    def filter(self, symbols: Iterable[str], asset_type: Optional[str] = None) -> List[str]:
+        """Return the known symbols, keeping the requested order."""
+        members = self.members(asset_type)
+        return [s for s in symbols if s in members]
+
+    def info(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Return the name, exchange, listing and delisting dates of a symbol."""
+        row = self._rows.get(symbol)
+        return dict(row) if row is not None else None
+
+    def is_listed(self, symbol: str, on: Any = None) -> bool:
+        """Return whether the symbol was listed and not yet delisted on a date."""
+        row = self._rows.get(symbol)
+        if row is None:
+            return False
+        on = pd.Timestamp(on) if on is not None else pd.Timestamp.now()
+        listed = pd.isna(row["list_date"]) or row["list_date"] <= on
+        return listed and (pd.isna(row["end_date"]) or row["end_date"] > on)
+
+
+def load_symbol_universe() -> SymbolUniverse:
+    """Load the stock, ETF and index listings from the configured backend."""
+    backend = get_backend()
+    frames = []
+    for asset_type in ASSET_TABLES:
+        df = backend.load_listings(asset_type)
+        if df is not None and not df.empty:
+            frames.append(df.assign(asset_type=asset_type))
+    listings = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    return SymbolUniverse(listings)
+
+
+_UNIVERSE: Optional[SymbolUniverse] = None
+_LOADED_AT: Optional[float] = None
+_UNIVERSE_LOCK = threading.Lock()
+
+
+def _is_fresh() -> bool:
+    """Return whether the cached universe is younger than the refresh interval."""
+    return (
+        _UNIVERSE is not None
+        and time.monotonic() - _LOADED_AT < get_settings().universe_refresh_interval
+    )
+
+
+def get_symbol_universe() -> SymbolUniverse:
+    """Return the cached symbol universe, reloading it once it is stale."""
+    global _UNIVERSE, _LOADED_AT  # noqa: PLW0603  # pylint: disable=global-statement
+    if _is_fresh():
+        return _UNIVERSE
+    with _UNIVERSE_LOCK:
+        if not _is_fresh():
+            try:
+                _UNIVERSE = load_symbol_universe()
+            except Exception as exc:  # pylint: disable=broad-except
+                if _UNIVERSE is None:
+                    raise
+                # 刷新失败时继续使用上一次的代码表
+                warn(f"Could not refresh the symbol universe: {exc}")
+            _LOADED_AT = time.monotonic()
+    return _UNIVERSE
+
+
+async def aget_symbol_universe() -> SymbolUniverse:
+    """Return the cached symbol universe, loading it off the event loop if needed."""
+    if _is_fresh():
+        return _UNIVERSE
+    return await run_blocking(get_symbol_universe)
@@ -0,0 +1,135 @@
+"""Wide materialization of the finance factor table, read by the statement fetchers without a pivot."""
+
+import threading
+import time
+from typing import FrozenSet, Optional
+from warnings import warn
+
+from openbb_xiaoyuan.utils.query_builder import (
+    FINANCE_FACTORS_1Q,
+    WIDE_FINANCE_FACTORS,
+    FactorQuery,
+    TableRef,
+)
+from openbb_xiaoyuan.utils.session_pool import lease_reader, run_blocking
+from openbb_xiaoyuan.utils.settings import get_settings
+from openbb_xiaoyuan.utils.snapshot import SNAPSHOT_PARTITIONS
+
+WIDE_KEYS = ("timestamp", "symbol", "报告期")
+
+
+def get_wide_refresh_sql(
+    source: TableRef = FINANCE_FACTORS_1Q, target: TableRef = WIDE_FINANCE_FACTORS
+) -> str:
+    """Return the script that creates the wide table if needed and upserts the newer rows.
+
+    The wide table has one row per (timestamp, symbol, 报告期) and one column per
+    factor_name of ``source``; factors seen for the first time get a new column.
+    Only source rows at or after the latest timestamp already in the table are
+    pivoted, so rows loaded in several batches with the same timestamp are
+    completed rather than missed. The script returns the column names.
+    """
+    keys = "`" + "`".join(WIDE_KEYS)
+    # 库表名来自 TableRef, 主键列为常量, 脚本中没有外部输入
+    return f"""
+        src = {source.render()};
+        types = dict(schema(src).colDefs.name, schema(src).colDefs.typeString);
+        if (!existsDatabase("{target.database}")) {{
+            database("{target.database}", HASH, [SYMBOL, {SNAPSHOT_PARTITIONS}])
+        }};
+        if (!existsTable("{target.database}", "{target.name}")) {{
+            database("{target.database}").createPartitionedTable(
+                table(1:0, {keys}, types[{keys}]), "{target.name}", `symbol)
+        }};
+        wide = {target.render()};
+        w = exec max(timestamp) from wide;
+        if (isNull(w)) {{
+            new = select value from src where value is not null
+                pivot by timestamp, symbol, 报告期, factor_name
+        }} else {{
+            new = select value from src where timestamp >= w, value is not null
+                pivot by timestamp, symbol, 报告期, factor_name
+        }};
+        added = columnNames(new)[!(columnNames(new) in columnNames(wide))];
+        if (size(added) > 0) {{
+            addColumn(wide, added, take(types["value"], size(added)));
+            wide = {target.render()}
+        }};
+        if (size(new) > 0) {{
+            for (c in columnNames(wide)) {{
+                if (!(c in columnNames(new))) new[c] = take(00F, size(new))
+            }};
+            reorderColumns!(new, columnNames(wide));
+            wide.upsert!(new, keyColNames={keys})
+        }};
+        columnNames(wide)
+        """  # noqa: S608
+
+
+def refresh_wide_table() -> FrozenSet[str]:
+    """Bring the wide table up to date and return the factors it holds."""
+    # 刷新脚本会写表, 不经过结果缓存与合并
+    with lease_reader() as reader:
+        columns = reader._run_query(script=get_wide_refresh_sql())  # pylint: disable=protected-access
+    return frozenset(columns) - set(WIDE_KEYS)
+
+
+_REFRESHED_AT: Optional[float] = None
+_FACTORS: FrozenSet[str] = frozenset()
+_WIDE_LOCK = threading.Lock()
+
+
+def _is_fresh() -> bool:
+    """Return whether the wide table was refreshed within the refresh interval."""
+    return (
+        _REFRESHED_AT is not None
+        and time.monotonic() - _REFRESHED_AT < get_settings().wide_finance_refresh_interval
+    )
+
+
+def ensure_wide_table() -> FrozenSet[str]:
+    """Refresh the wide table once it is stale and return the factors that can be read from it.
+
+    The set is empty when the wide table is disabled or was never built.
+    """
+    global _REFRESHED_AT, _FACTORS  # noqa: PLW0603  # pylint: disable=global-statement
+    if not get_settings().wide_finance_enabled:
+        return frozenset()
+    if _is_fresh():
+        return _FACTORS
+    with _WIDE_LOCK:
+        if not _is_fresh():
+            try:
+                _FACTORS = refresh_wide_table()
+            except Exception as exc:  # pylint: disable=broad-except
+                # 刷新失败时继续读已建好的宽表, 只是略有滞后
+                warn(f"Could not refresh the wide finance factor table: {exc}")
+            _REFRESHED_AT = time.monotonic()
+    return _FACTORS
+
+
+async def aensure_wide_table() -> FrozenSet[str]:
+    """Return the factors of the wide table, refreshing it off the event loop if needed."""
+    if not get_settings().wide_finance_enabled:
+        return frozenset()
+    if _is_fresh():
+        return _FACTORS
+    return await run_blocking(ensure_wide_table)
+
+
+def reset_wide_table() -> None:
+    """Forget the last refresh, so the next lookup refreshes the wide table."""
+    global _REFRESHED_AT, _FACTORS  # noqa: PLW0603  # pylint: disable=global-statement
+    with _WIDE_LOCK:
+        _REFRESHED_AT = None
+        _FACTORS = frozenset()
+
+
+def reads_wide(query: FactorQuery, factors: FrozenSet[str]) -> bool:
+    """Return whether ``query`` can be answered from a wide table holding ``factors``."""
+    return (
+        query.table == FINANCE_FACTORS_1Q
+        and set(query.pivot_by) <= set(WIDE_KEYS)
+        and bool(query.factors)
+        and set(query.factors) <= factors
+    )
@@ -4,6 +4,7 @@ from datetime import date
 
 import pytest
 from openbb_core.app.service.user_service import UserService
+from openbb_core.provider.utils.helpers import run_async
 from openbb_xiaoyuan import (
     XiaoYuanEquitySearchFetcher,
     XiaoYuanEquityValuationMultiplesFetcher,
@@ -34,6 +35,7 @@ from openbb_xiaoyuan.models.historical_market_cap import (
 from openbb_xiaoyuan.models.income_statement_growth import (
     XiaoYuanIncomeStatementGrowthFetcher,
 )
+from openbb_xiaoyuan.utils.columnar import fetch_columnar
 
 from xiaoyuan.openbb_xiaoyuan import XiaoYuanIncomeStatementFetcher
 
@@ -104,6 +106,15 @@ def test_xiaoyuan_balance_sheet_fetcher(credentials=test_credentials):
     assert result is None
 
 
+def test_xiaoyuan_balance_sheet_multiple_symbols_fetcher(credentials=test_credentials):
+    """Test XiaoYuanBalanceSheetFetcher with a batch of symbols."""
+    params = {"symbol": "600519.SS,002415.SZ,000001.SZ", "period": "annual", "limit": 2}
+
+    fetcher = XiaoYuanBalanceSheetFetcher()
+    result = fetcher.test(params, credentials)
+    assert result is None
+
+
 def test_xiaoyuan_income_statement_fetcher(credentials=test_credentials):
     """Test XiaoYuanIncomeStatementFetcher."""
     params = {"symbol": "600519.SS", "period": "annual"}
@@ -145,6 +156,22 @@ def test_xiao_yuan_equity_historical_fetcher(credentials=test_credentials):
     assert result is None
 
 
+def test_xiao_yuan_equity_historical_columnar(credentials=test_credentials):
+    """Test XiaoYuanEquityHistoricalFetcher in columnar mode."""
+    params = {
+        "symbol": "600519.SS",
+        "start_date": date(2023, 1, 1),
+        "end_date": date(2023, 1, 10),
+        "interval": "1d",
+    }
+
+    result = run_async(
+        fetch_columnar, XiaoYuanEquityHistoricalFetcher, params, credentials
+    )
+    assert not result.empty
+    assert list(result.columns[:5]) == ["date", "open", "high", "low", "close"]
+
+
 def test_xiao_yuan_historical_market_cap_fetcher(credentials=test_credentials):
     """Test XiaoYuanHistoricalMarketCapFetcher."""
     params = {
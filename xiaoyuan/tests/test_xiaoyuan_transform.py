@@ -0,0 +1,118 @@
+"""Equivalence tests for the XiaoYuan column-at-a-time validation path."""
+
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+from openbb_xiaoyuan import openbb_xiaoyuan_provider
+from openbb_xiaoyuan.models.balance_sheet import XiaoYuanBalanceSheetData
+from openbb_xiaoyuan.models.equity_historical import XiaoYuanEquityHistoricalData
+from openbb_xiaoyuan.models.index_historical import XiaoYuanIndexHistoricalData
+from openbb_xiaoyuan.models.key_metrics import XiaoYuanKeyMetricsFetcher
+from openbb_xiaoyuan.utils.transform import _column_plans, validate_frame
+
+MODELS = sorted(
+    {fetcher.data_type for fetcher in openbb_xiaoyuan_provider.fetcher_dict.values()},
+    key=lambda model: model.__name__,
+)
+
+ROWS = 4
+
+
+def _sample(annotation, timestamps: bool):
+    """Return a column of sample values for a field annotation."""
+    name = str(annotation)
+    if "date" in name:
+        days = pd.date_range("2024-03-29", periods=ROWS, freq="D")
+        return days if timestamps else days.strftime("%Y-%m-%d").tolist()
+    if "bool" in name:
+        return [True, False] * (ROWS // 2)
+    if "float" in name:
+        return [1.5, 0.0, np.nan, -2.0]
+    if "int" in name:
+        return [2024, 0, 2023, 2022]
+    if "str" in name:
+        return ["600519.SS", "000001.SZ", "", "510300.SS"]
+    return [None] * ROWS
+
+
+def _frame(model, timestamps: bool) -> pd.DataFrame:
+    """Return a frame shaped like the XiaoYuan query results for ``model``."""
+    columns = {
+        model.__alias_dict__.get(name, name): _sample(field.annotation, timestamps)
+        for name, field in model.model_fields.items()
+    }
+    columns["extra_value"] = [0, 1, 2, 0]
+    return pd.DataFrame(columns)
+
+
+def _outcome(func):
+    """Return a comparable summary of the validated models or of the error raised."""
+    try:
+        return [
+            (type(m), repr(m.model_dump()), m.model_fields_set, repr(m.__pydantic_extra__))
+            for m in func()
+        ]
+    except Exception as exc:  # pylint: disable=broad-except
+        return type(exc)
+
+
+@pytest.mark.parametrize("timestamps", [False, True])
+@pytest.mark.parametrize("model", MODELS, ids=lambda model: model.__name__)
+def test_validate_frame_matches_model_validate(model, timestamps):
+    """Test that the column path returns the same objects as per-row validation."""
+    df = _frame(model, timestamps)
+    records = df.to_dict(orient="records")
+
+    expected = _outcome(lambda: [model.model_validate(d) for d in records])
+
+    assert _outcome(lambda: validate_frame(model, records)) == expected
+    assert _outcome(lambda: validate_frame(model, df)) == expected
+
+
+@pytest.mark.parametrize(
+    "model",
+    [XiaoYuanBalanceSheetData, XiaoYuanEquityHistoricalData, XiaoYuanIndexHistoricalData],
+)
+def test_validate_frame_uses_column_path(model):
+    """Test that the large statement and history models take the column path."""
+    assert _column_plans(model) is not None
+
+
+def test_validate_frame_replaces_zero_and_keeps_extras():
+    """Test zero replacement, alias renaming and extra columns on the column path."""
+    records = [
+        {
+            "symbol": "600519.SS",
+            "报告期": datetime.date(2024, 3, 31),
+            "应收账款": 0.0,
+            "存货": 1.0,
+            "fiscal_period": "q1",
+        }
+    ]
+
+    (result,) = validate_frame(XiaoYuanBalanceSheetData, records)
+
+    assert result.period_ending == datetime.date(2024, 3, 31)
+    assert result.accounts_receivable is None
+    assert result.inventory == 1.0
+    assert result.fiscal_period == "q1"
+
+
+def test_key_metrics_drops_only_dict_cells():
+    """Test that a dict in one row clears that cell and keeps the column for other symbols."""
+    data = pd.DataFrame(
+        {
+            "symbol": ["SH600519", "SZ000001"],
+            "报告期": ["2024-03-31", "2024-03-31"],
+            "总市值": [2.0e12, 2.0e11],
+            "流动比率": [{"error": "bad"}, 1.5],
+        }
+    )
+
+    first, second = XiaoYuanKeyMetricsFetcher.transform_data(None, data)
+
+    assert first.symbol == "600519.SS"
+    assert first.current_ratio is None
+    assert second.current_ratio == 1.5
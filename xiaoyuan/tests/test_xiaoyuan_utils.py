@@ -0,0 +1,1054 @@
+"""Tests for the XiaoYuan provider utilities."""
+
+import asyncio
+import itertools
+import threading
+import time
+from datetime import date
+
+import pandas as pd
+import pytest
+from openbb_xiaoyuan.models.balance_sheet import XiaoYuanBalanceSheetData
+from openbb_xiaoyuan.models.equity_historical import XiaoYuanEquityHistoricalFetcher
+from openbb_xiaoyuan.models.equity_search import XiaoYuanEquitySearchFetcher
+from openbb_xiaoyuan.models.financial_ratios import XiaoYuanFinancialRatiosFetcher
+from openbb_xiaoyuan.models.historical_market_cap import XiaoYuanHistoricalMarketCapFetcher
+from openbb_xiaoyuan.utils import (
+    backend,
+    batching,
+    calendar,
+    factor_cache,
+    snapshot,
+    wide_table,
+)
+from openbb_xiaoyuan.utils.batching import BatchLoader
+from openbb_xiaoyuan.utils.cache import QueryCache, SingleFlight, script_cache_key
+from openbb_xiaoyuan.utils.calendar import TradingCalendar
+from openbb_xiaoyuan.utils.columnar import to_columnar
+from openbb_xiaoyuan.utils.factor_cache import FactorCache
+from openbb_xiaoyuan.utils.mirror import ParquetMirror
+from openbb_xiaoyuan.utils.postprocess import PostProcessSpec
+from openbb_xiaoyuan.utils.query_builder import DAILY_FACTORS, FactorQuery
+from openbb_xiaoyuan.utils.references import (
+    get_asof_daily_sql,
+    get_dividend_sql,
+    get_finance_query,
+    get_query_cnzvt_sql,
+    get_query_finance_sql,
+    get_recent_1q_daily_sql,
+    get_recent_1q_query,
+    get_recent_1q_query_finance_sql,
+    get_report_month,
+    to_entity_ids,
+)
+from openbb_xiaoyuan.utils.session_pool import SessionPool, run_blocking
+from openbb_xiaoyuan.utils.settings import get_settings
+from openbb_xiaoyuan.utils.snapshot import get_snapshot_refresh_sql
+from openbb_xiaoyuan.utils.synthetic import SyntheticConfig, generate, load_synthetic
+from openbb_xiaoyuan.utils.universe import SymbolUniverse
+from openbb_xiaoyuan.utils.wide_table import get_wide_refresh_sql
+
+
+def test_session_pool_reuses_and_nests_leases():
+    """Test that nested leases share a session and released sessions are reused."""
+    counter = itertools.count()
+    pool = SessionPool(factory=lambda: next(counter), max_size=2)
+
+    with pool.lease() as outer, pool.lease() as inner:
+        assert outer == inner
+    with pool.lease() as again:
+        assert again == outer
+
+    assert pool.stats()["created"] == 1
+
+
+def test_session_pool_blocks_at_max_size():
+    """Test that checkout times out once every session is leased."""
+    pool = SessionPool(factory=object, max_size=1, checkout_timeout=0.05)
+    session = pool.acquire()
+    errors = []
+
+    def _checkout():
+        try:
+            pool.acquire()
+        except TimeoutError as exc:
+            errors.append(exc)
+
+    thread = threading.Thread(target=_checkout)
+    thread.start()
+    thread.join()
+    pool.release(session)
+
+    assert len(errors) == 1
+
+
+def test_session_pool_discards_unhealthy_sessions():
+    """Test that a session failing its health check is replaced."""
+    counter = itertools.count()
+    closed = []
+
+    def _ping(reader):
+        if reader == 0:
+            raise ConnectionError
+
+    pool = SessionPool(
+        factory=lambda: next(counter),
+        health_check_interval=0,
+        ping=_ping,
+        close=closed.append,
+    )
+    with pytest.raises(RuntimeError), pool.lease():
+        raise RuntimeError
+    with pool.lease() as reader:
+        assert reader == 1
+
+    assert closed == [0]
+
+
+def test_session_pool_reinstalls_changed_bootstrap():
+    """Test that sessions are bootstrapped once and again after a version bump."""
+    installed = []
+    version = {"value": "v1"}
+    pool = SessionPool(
+        factory=object,
+        bootstrap=lambda reader: installed.append(version["value"]),
+        bootstrap_version=lambda: version["value"],
+    )
+
+    with pool.lease():
+        pass
+    with pool.lease():
+        pass
+    version["value"] = "v2"
+    with pool.lease():
+        pass
+
+    assert installed == ["v1", "v2"]
+
+
+def test_run_blocking_leaves_the_event_loop_free():
+    """Test that blocking calls run on the query executor, not the loop thread."""
+    async def _main():
+        loop_thread = threading.get_ident()
+        ticks = []
+
+        async def _tick():
+            for _ in range(3):
+                ticks.append(threading.get_ident())
+                await asyncio.sleep(0.01)
+
+        worker, _ = await asyncio.gather(
+            run_blocking(lambda: time.sleep(0.05) or threading.get_ident()), _tick()
+        )
+        return loop_thread, worker, ticks
+
+    loop_thread, worker, ticks = asyncio.run(_main())
+
+    assert worker != loop_thread
+    assert len(ticks) == 3
+
+
+def test_query_cache_expires_and_evicts_by_size():
+    """Test TTL expiry, LRU eviction by byte budget and copy-on-read."""
+    frame = pd.DataFrame({"value": range(100)})
+    size = int(frame.memory_usage(deep=True).sum())
+    cache = QueryCache(max_bytes=2 * size)
+
+    cache.set("a", frame, ttl=60)
+    cache.set("b", frame, ttl=60)
+    cache.get("a")["value"] = 0
+    cache.set("c", frame, ttl=60)
+
+    assert cache.get("a")["value"].sum() == frame["value"].sum()
+    assert cache.get("b") is None
+    assert cache.stats()["evictions"] == 1
+
+    cache.set("c", frame, ttl=0.01)
+    time.sleep(0.02)
+
+    assert cache.get("c") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_script_cache_key_ignores_formatting():
+    """Test that scripts differing only in whitespace share a cache key."""
+    assert script_cache_key("select *\n    from t") == script_cache_key(
+        "select * from t"
+    )
+
+
+def test_single_flight_shares_concurrent_calls():
+    """Test that identical calls in flight on other threads run only once."""
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def _query():
+        calls.append(1)
+        started.set()
+        release.wait()
+        return pd.DataFrame({"value": [1]})
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("k", _query)))
+    leader.start()
+    started.wait()
+    waiters = [
+        threading.Thread(target=lambda: results.append(flight.do("k", _query)))
+        for _ in range(3)
+    ]
+    for waiter in waiters:
+        waiter.start()
+    while flight.stats()["shared"] < 3:
+        time.sleep(0.001)
+    release.set()
+    for thread in [leader, *waiters]:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len(results) == 4
+    assert flight.stats() == {"calls": 1, "shared": 3}
+
+
+def test_single_flight_shares_awaited_calls_and_errors():
+    """Test that concurrent awaits share one call, including its exception."""
+    flight = SingleFlight()
+    calls = []
+
+    async def _fail():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ConnectionError
+
+    async def _main():
+        return await asyncio.gather(
+            *(flight.ado("k", _fail) for _ in range(5)), return_exceptions=True
+        )
+
+    results = asyncio.run(_main())
+
+    assert len(calls) == 1
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+
+def test_trading_calendar_vectorized_lookups():
+    """Test adjacent-trading-day lookups over a week with a holiday and a weekend."""
+    calendar = TradingCalendar(
+        ["2024-01-02", "2024-01-03", "2024-01-05", "2024-01-08"],
+        start="2024-01-01",
+        end="2024-01-10",
+    )
+    dates = ["2024-01-03", "2024-01-04", "2024-01-06"]
+
+    assert calendar.on_or_before(dates).strftime("%Y-%m-%d").tolist() == [
+        "2024-01-03",
+        "2024-01-03",
+        "2024-01-05",
+    ]
+    assert calendar.on_or_after(dates).strftime("%Y-%m-%d").tolist() == [
+        "2024-01-03",
+        "2024-01-05",
+        "2024-01-08",
+    ]
+    assert calendar.previous(dates).strftime("%Y-%m-%d").tolist() == [
+        "2024-01-02",
+        "2024-01-03",
+        "2024-01-05",
+    ]
+    assert calendar.next("2024-01-03", n=2) == pd.Timestamp("2024-01-08")
+    assert calendar.is_trading_day(dates).tolist() == [True, False, False]
+    assert pd.isna(calendar.previous("2024-01-02"))
+    assert pd.isna(calendar.on_or_after("2024-01-09"))
+
+
+def test_symbol_universe_membership_and_listing_dates():
+    """Test membership by asset type, request-order filtering and listing dates."""
+    universe = SymbolUniverse(
+        pd.DataFrame(
+            {
+                "symbol": ["SH600519", "SZ000001", "SH510300", "SH000001"],
+                "name": ["贵州茅台", "平安银行", "沪深300ETF", "上证指数"],
+                "exchange": ["sh", "sz", "sh", "sh"],
+                "list_date": ["2001-08-27", "1991-04-03", "2012-05-28", "1991-07-15"],
+                "end_date": [None, "2020-01-01", None, None],
+                "asset_type": ["stock", "stock", "etf", "index"],
+            }
+        )
+    )
+
+    assert universe.filter(["SH510300", "SZ000001", "SH600519", "SH000002"], "stock") == [
+        "SZ000001",
+        "SH600519",
+    ]
+    assert "SH510300" in universe
+    assert not universe.contains("SH510300", "stock")
+    assert universe.info("SH000001")["asset_type"] == "index"
+    assert universe.is_listed("SZ000001", on="2019-12-31")
+    assert not universe.is_listed("SZ000001", on="2020-06-30")
+
+
+def test_to_columnar_maps_aliases_without_row_objects():
+    """Test alias renaming, symbol reverting and zero replacement on a raw frame."""
+    raw = pd.DataFrame(
+        {
+            "symbol": ["SH600519", "SZ000001"],
+            "fiscal_year": [2024, 2024],
+            "存货": [1.0, 0.0],
+            "报告期": pd.to_datetime(["2024-03-31", "2024-03-31"]),
+            "update_flag": [1, 1],
+        }
+    )
+
+    df = to_columnar(XiaoYuanBalanceSheetData, raw)
+
+    assert list(df.columns) == [
+        "period_ending",
+        "fiscal_year",
+        "symbol",
+        "inventory",
+        "update_flag",
+    ]
+    assert df["symbol"].tolist() == ["600519.SS", "000001.SZ"]
+    assert df["inventory"].isna().tolist() == [False, True]
+    assert pd.api.types.is_datetime64_any_dtype(df["period_ending"])
+
+
+def test_symbol_predicates_use_stored_entity_ids():
+    """Test that symbols are matched on the stored entity id instead of a computed one."""
+    assert to_entity_ids(["SH600519", "SZ000001"]) == ["stock_sh_600519", "stock_sz_000001"]
+    assert to_entity_ids(["SH510300"], "etf") == ["etf_sh_510300"]
+
+    script = get_query_cnzvt_sql({"inventories": "存货"}, ["SH600519"], "balance_sheet_qtr", -4)
+    assert "entity_id in ['stock_sh_600519']" in script
+    assert 'split(id,"_")[1])+split(id,"_")[2]) in' not in script
+    assert "unpivot" not in script and "pivot by" not in script
+    assert "context by entity_id order by report_date limit -4" in script
+    script = get_dividend_sql(date(2024, 1, 1), date(2024, 12, 31), "SZ000001")
+    assert 'entity_id in ["stock_sz_000001"]' in script
+    assert "dividend_date between 2024.01.01 and 2024.12.31" in script
+
+
+def test_post_process_spec_compiles_into_the_script_tail():
+    """Test that percent scaling, date casting and symbol ordering run server-side."""
+    spec = PostProcessSpec(percent_columns=("资产负债率",), date_text_columns=("timestamp",))
+    script = get_query_finance_sql(
+        ["资产负债率"], ["SZ000001", "SH600519"], get_report_month("ytd"), spec
+    )
+
+    tail = script[script.index("fiscal_year"):]
+    assert "replaceColumn!(t, c, t[c] / 100)" in tail
+    assert "for (c in ['报告期'])" in tail and "date(t[c])" in tail
+    assert 'temporalFormat(t[c], "yyyy-MM-dd")' in tail
+    assert "find(['SZ000001', 'SH600519'], symbol)" in tail
+    assert (
+        """if ("报告期" in columnNames(t)) { sortBy!(t, ['_symbol_order', '报告期'], [1, 0]) } """
+        "else { sortBy!(t, ['_symbol_order'], [1]) };"
+    ) in tail
+    assert tail.rstrip().endswith("t")
+    # 没有代码顺序时, 缺少排序列则不排序
+    no_symbols = PostProcessSpec(date_columns=(), order_by="timestamp").compile()
+    assert no_symbols == """if ("timestamp" in columnNames(t)) { sortBy!(t, ['timestamp'], [0]) };"""
+    assert "replaceColumn!" not in get_query_finance_sql(
+        ["资产负债率"], ["SZ000001"], get_report_month("ytd")
+    )
+
+
+def test_financial_ratios_keep_period_ending_as_text(monkeypatch):
+    """Test that the ratios post-processing formats 报告期 as text, as the data model expects."""
+    queries = []
+
+    class _RecordingBackend(backend.DolphinDBBackend):
+        async def finance_factors(self, query):
+            queries.append(query)
+            rows = pd.DataFrame(
+                {
+                    "timestamp": pd.to_datetime(["2024-04-30"]),
+                    "报告期": pd.to_datetime(["2023-12-31"]),
+                    "symbol": ["SH600519"],
+                    "factor_name": ["资产负债率"],
+                    "value": [20.0],
+                }
+            )
+            return factor_cache.pivot_factor_rows(query, rows)
+
+    backend.register_backend("recording", _RecordingBackend)
+    monkeypatch.setenv("XIAOYUAN_BACKEND", "recording")
+    get_settings.cache_clear()
+    try:
+        ratios = XiaoYuanFinancialRatiosFetcher.transform_query({"symbol": "600519.SS", "limit": 1})
+        data = asyncio.run(XiaoYuanFinancialRatiosFetcher.aextract_data(ratios, None))
+        (result,) = XiaoYuanFinancialRatiosFetcher.transform_data(ratios, data)
+    finally:
+        monkeypatch.delenv("XIAOYUAN_BACKEND")
+        get_settings.cache_clear()
+        backend.BACKENDS.pop("recording")
+
+    (query,) = queries
+    assert query.post_process.date_columns == () and query.post_process.date_text_columns == ("报告期",)
+    assert 'temporalFormat(t[c], "yyyy-MM-dd")' in query.render()
+    assert result.period_ending == "2023-12-31"
+    assert result.debt_ratio == 0.2
+
+
+def test_factor_query_renders_canonical_scripts():
+    """Test that factor and symbol order and repetition do not change the script."""
+    report_month = get_report_month("annual", -4)
+    first = get_finance_query(["流动比率", "资产负债率"], ["SZ000001", "SH600519"], report_month)
+    second = get_finance_query(
+        ["资产负债率", "流动比率", "资产负债率"], ["SH600519", "SZ000001", "SH600519"], report_month
+    )
+
+    assert first.render() == second.render()
+    assert first.cache_key() == second.cache_key()
+    script = first.render()
+    # 代码过滤在前, 逐行计算的月份条件在最后
+    assert script.index("symbol in") < script.index("factor_name in") < script.index("monthOfYear")
+    assert "limit -4" in script
+
+
+def test_factor_query_merges_only_when_results_are_unchanged():
+    """Test merging factor lists and symbols of queries with the same shape."""
+    report_month = get_report_month("ytd", -4)
+    first = get_finance_query(["流动比率"], ["SH600519"], report_month)
+    second = get_finance_query(["资产负债率"], ["SZ000001"], report_month)
+
+    merged = first.merge(second)
+    assert merged.factors == ("流动比率", "资产负债率")
+    assert merged.symbols == ("SH600519", "SZ000001")
+    assert not first.can_merge(get_finance_query(["流动比率"], ["SH600519"], get_report_month("annual")))
+
+    # 每个代码只取一行时, 合并因子会改变结果
+    latest = FactorQuery(DAILY_FACTORS, ["a"], ["SH600519"], context_by=("symbol",), limit=-1)
+    assert not latest.can_merge(FactorQuery(DAILY_FACTORS, ["b"], ["SH600519"], context_by=("symbol",), limit=-1))
+    with pytest.raises(ValueError):
+        latest.merge(FactorQuery(DAILY_FACTORS, ["b"], ["SH600519"]))
+
+
+def test_asof_daily_script_joins_reports_by_symbol_in_one_round_trip():
+    """Test that the daily factors are joined to the reports on the server, keyed on the symbol."""
+    spec = PostProcessSpec(date_columns=(), date_text_columns=("报告期",))
+    script = get_asof_daily_sql(
+        ["每股收益", "总市值"], ["SZ000001", "SH600519"], get_report_month("annual", -4), spec
+    )
+
+    assert script.count("loadTable") == 2
+    assert "cn_finance_factors_1Q" in script and "cn_factors_1D" in script
+    assert "t = aj(t, d, `symbol`_asof)" in script
+    # 日频数据只读报告期前的回看窗口
+    assert "timestamp in datetime(days)" in script
+    assert script.index("aj(") < script.index("sortBy!")
+    assert script.rstrip().endswith("t")
+
+
+def test_recent_report_script_aligns_to_the_next_trading_day():
+    """Test that the latest report is joined to its first trading day within the same script."""
+    script = get_recent_1q_daily_sql(["市盈率（滚动）"], ["SH600519"], date(2024, 5, 1))
+
+    assert script.count("loadTable") == 2
+    assert "timestamp <= 2024.05.01" in script
+    assert "cross(add, distinct(date(t.报告期)), 0..15)" in script
+    # 取负后的 aj 匹配报告期当日或之后的第一个交易日
+    assert "-int(date(报告期)) as _asof" in script and "t = aj(t, d, `symbol`_asof)" in script
+
+
+def test_latest_snapshot_is_refreshed_incrementally_and_falls_back(monkeypatch):
+    """Test the snapshot refresh script, the snapshot lookup and the fallback to the full scan."""
+    script = get_snapshot_refresh_sql()
+    assert "timestamp >= w" in script
+    assert "context by symbol, factor_name order by timestamp limit -1" in script
+    assert "upsert!(new, keyColNames=`symbol`factor_name)" in script
+    lookup = get_recent_1q_query_finance_sql(["市盈率（滚动）"], ["SH600519"], date(2024, 5, 1), True)
+    assert "cn_finance_factors_latest" in lookup
+    assert "value is not null" in lookup and "context by symbol order by timestamp limit -1" in lookup
+
+    calls = []
+
+    def _refresh():
+        calls.append(1)
+        if len(calls) > 1:
+            raise RuntimeError("no write access")
+        return 3
+
+    monkeypatch.setattr(snapshot, "refresh_latest_snapshot", _refresh)
+    monkeypatch.setenv("XIAOYUAN_LATEST_SNAPSHOT_ENABLED", "true")
+    get_settings.cache_clear()
+    snapshot.reset_latest_snapshot()
+    try:
+        assert snapshot.ensure_latest_snapshot() is True
+        assert asyncio.run(snapshot.aensure_latest_snapshot()) is True
+        assert len(calls) == 1
+        snapshot.reset_latest_snapshot()
+        with pytest.warns(UserWarning, match="no write access"):
+            assert snapshot.ensure_latest_snapshot() is False
+    finally:
+        monkeypatch.delenv("XIAOYUAN_LATEST_SNAPSHOT_ENABLED")
+        get_settings.cache_clear()
+        snapshot.reset_latest_snapshot()
+    assert snapshot.ensure_latest_snapshot() is False
+
+
+def test_latest_snapshot_lookup_agrees_with_the_full_scan():
+    """Test that both latest-report paths give each symbol one row, from its latest report."""
+    source = pd.DataFrame(
+        {
+            "timestamp": pd.to_datetime(["2023-10-28", "2024-03-20", "2024-04-28", "2024-04-29"]),
+            "报告期": pd.to_datetime(["2023-09-30", "2023-12-31", "2024-03-31", "2024-03-31"]),
+            "symbol": ["SH600519"] * 4,
+            "factor_name": ["市销率（滚动）", "市销率（滚动）", "市盈率（滚动）", "市销率（滚动）"],
+            "value": [1.0, 2.0, 3.0, None],
+        }
+    )
+    # 快照刷新脚本: 每个 (symbol, factor_name) 最新一行非空值
+    latest = (
+        source.dropna(subset=["value"])
+        .sort_values("timestamp", kind="stable")
+        .groupby(["symbol", "factor_name"])
+        .tail(1)
+        .reset_index(drop=True)
+    )
+    factors = ["市盈率（滚动）", "市销率（滚动）"]
+    results = []
+    # 两个因子最新一期的报告期不同, 空值不算最新
+    for snapshot_lookup, rows in ((False, source), (True, latest)):
+        query = get_recent_1q_query(factors, ["SH600519"], date(2024, 5, 1), snapshot_lookup)
+        results.append(factor_cache.pivot_factor_rows(query, query.evaluate_long(rows)))
+
+    scan, snap = results
+    pd.testing.assert_frame_equal(scan, snap)
+    assert scan[["报告期", "市盈率（滚动）"]].values.tolist() == [[pd.Timestamp("2024-03-31"), 3.0]]
+
+
+def test_statement_queries_read_the_wide_table_without_a_pivot(monkeypatch):
+    """Test that finance queries are read from the wide table when it holds all their factors."""
+    script = get_wide_refresh_sql()
+    assert "timestamp >= w" in script and "addColumn(wide, added" in script
+    assert "upsert!(new, keyColNames=`timestamp`symbol`报告期)" in script
+
+    scripts = []
+
+    async def _fake_arun_query(script):
+        scripts.append(script)
+        return pd.DataFrame()
+
+    monkeypatch.setattr(batching, "arun_query", _fake_arun_query)
+    monkeypatch.setattr(wide_table, "refresh_wide_table", lambda: frozenset(["存货", "资产负债率"]))
+    monkeypatch.setenv("XIAOYUAN_WIDE_FINANCE_ENABLED", "true")
+    monkeypatch.setenv("XIAOYUAN_FACTOR_CACHE_ENABLED", "false")
+    get_settings.cache_clear()
+    wide_table.reset_wide_table()
+    report_month = get_report_month("annual", -4)
+    try:
+        asyncio.run(batching.aload_factor_query(get_finance_query(["存货"], ["SH600519"], report_month)))
+        asyncio.run(batching.aload_factor_query(get_finance_query(["流动比率"], ["SH600519"], report_month)))
+    finally:
+        monkeypatch.delenv("XIAOYUAN_WIDE_FINANCE_ENABLED")
+        monkeypatch.delenv("XIAOYUAN_FACTOR_CACHE_ENABLED")
+        get_settings.cache_clear()
+        wide_table.reset_wide_table()
+
+    assert "cn_finance_factors_wide" in scripts[0] and "pivot by" not in scripts[0]
+    assert 'rowCount(_"存货") > 0' in scripts[0]
+    assert "context by symbol, extractMonthDayFromTime(报告期) order by 报告期 limit -4" in scripts[0]
+    # 宽表中没有的因子仍查长表
+    assert "cn_finance_factors_1Q" in scripts[1] and "pivot by" in scripts[1]
+
+
+def test_batch_loader_merges_concurrent_single_symbol_queries(monkeypatch):
+    """Test that concurrent queries of one shape run once and each caller gets its own rows."""
+    scripts = []
+
+    async def _fake_arun_query(script):
+        scripts.append(script)
+        return pd.DataFrame(
+            {
+                "timestamp": pd.to_datetime(["2024-04-30"] * 3),
+                "symbol": ["SH600519", "SZ000001", "SZ000002"],
+                "报告期": pd.to_datetime(["2024-03-31"] * 3),
+                "存货": [1.0, 2.0, None],
+                "资产负债率": [None, 0.5, 0.6],
+            }
+        )
+
+    monkeypatch.setattr(batching, "arun_query", _fake_arun_query)
+    loader = BatchLoader(window=0.01)
+    report_month = get_report_month("annual", -4)
+
+    async def _load_all():
+        return await asyncio.gather(
+            loader.load(get_finance_query(["存货"], ["SH600519"], report_month)),
+            loader.load(get_finance_query(["资产负债率"], ["SZ000001"], report_month)),
+            loader.load(get_finance_query(["存货"], ["SZ000002"], report_month)),
+        )
+
+    first, second, third = asyncio.run(_load_all())
+
+    assert len(scripts) == 1
+    assert 'symbol in ["SH600519", "SZ000001", "SZ000002"]' in scripts[0]
+    assert loader.stats() == {"requests": 3, "queries": 1}
+    assert first["symbol"].tolist() == ["SH600519"] and "资产负债率" not in first.columns
+    assert second["资产负债率"].tolist() == [0.5] and "存货" not in second.columns
+    # 只因其他请求的因子而存在的行被去掉
+    assert third.empty
+
+
+def test_batch_loader_cancels_the_timer_of_a_full_batch(monkeypatch):
+    """Test that a batch sent early when full does not cut short the window of the next batch."""
+    sent = []
+
+    async def _fake_arun_query(script):
+        sent.append(time.perf_counter())
+        return pd.DataFrame()
+
+    monkeypatch.setattr(batching, "arun_query", _fake_arun_query)
+    loader = BatchLoader(window=0.2, max_symbols=2)
+    report_month = get_report_month("annual", -4)
+
+    async def _load_twice():
+        await loader.load(get_finance_query(["存货"], ["SH600519", "SZ000001"], report_month))
+        await asyncio.sleep(0.1)
+        started = time.perf_counter()
+        await loader.load(get_finance_query(["存货"], ["SZ000002"], report_month))
+        return started
+
+    started = asyncio.run(_load_twice())
+
+    assert len(sent) == 2
+    # 第二批等满自己的窗口, 不被第一批的定时器提前发送
+    assert sent[1] - started >= 0.18
+
+
+def test_factor_cache_fetches_only_missing_factors(monkeypatch):
+    """Test that overlapping factor lists share cached rows and only the delta is queried."""
+    long_rows = pd.DataFrame(
+        {
+            "timestamp": pd.to_datetime(["2024-04-30", "2024-04-30", "2024-04-30", "2023-08-30"]),
+            "报告期": pd.to_datetime(["2024-03-31", "2024-03-31", "2024-03-31", "2023-06-30"]),
+            "symbol": ["SH600519"] * 4,
+            "factor_name": ["流动比率", "资产负债率", "速动比率", "流动比率"],
+            "value": [2.0, 40.0, 1.5, 1.8],
+        }
+    )
+    scripts = []
+
+    async def _fake_arun_query(script):
+        scripts.append(script)
+        wanted = [f for f in long_rows["factor_name"].unique() if f'"{f}"' in script]
+        return long_rows[long_rows["factor_name"].isin(wanted)].reset_index(drop=True)
+
+    monkeypatch.setattr(factor_cache, "arun_query", _fake_arun_query)
+    cache = FactorCache(max_bytes=1 << 20)
+    report_month = get_report_month("ytd", -4)
+    key_metrics = get_finance_query(["流动比率", "资产负债率"], ["SH600519"], report_month)
+    ratios = get_finance_query(
+        ["流动比率", "速动比率", "资产负债率"],
+        ["SH600519"],
+        report_month,
+        PostProcessSpec(percent_columns=("资产负债率",)),
+    )
+
+    first = asyncio.run(cache.load(key_metrics))
+    second = asyncio.run(cache.load(ratios))
+    again = asyncio.run(cache.load(ratios))
+
+    assert len(scripts) == 2
+    assert '"速动比率"' in scripts[1] and '"流动比率"' not in scripts[1]
+    assert "pivot by" not in scripts[0]
+    assert first["流动比率"].tolist() == [1.8, 2.0]
+    assert first["fiscal_period"].tolist() == ["q2", "q1"]
+    # 比率接口按报告期倒序, 百分比列已换算
+    assert second["报告期"].tolist() == list(pd.to_datetime(["2024-03-31", "2023-06-30"]))
+    assert second["资产负债率"].iloc[0] == 0.4
+    assert second["速动比率"].iloc[0] == 1.5
+    pd.testing.assert_frame_equal(second, again)
+    assert cache.stats()["delta_queries"] == 2
+
+
+FINANCE_ROWS = pd.DataFrame(
+    {
+        "timestamp": pd.to_datetime(["2023-04-30", "2024-04-30", "2022-04-30", "2024-04-30", "2023-08-30"]),
+        "报告期": pd.to_datetime(["2022-12-31", "2023-12-31", "2021-12-31", "2023-12-31", "2023-06-30"]),
+        "symbol": ["SH600519", "SH600519", "SH600519", "SZ000001", "SH600519"],
+        "factor_name": ["存货"] * 5,
+        "value": [1.0, 2.0, 3.0, 4.0, 5.0],
+    }
+)
+
+
+def test_factor_cache_returns_the_frame_of_the_server_script(monkeypatch):
+    """Test that the factor cache path returns the server result, including column order and dtypes."""
+    long_rows = pd.DataFrame(
+        {
+            "timestamp": pd.to_datetime(["2024-04-30", "2024-04-30", "2023-08-30", "2023-08-30"]),
+            "报告期": pd.to_datetime(["2024-03-31", "2024-03-31", "2023-06-30", "2023-06-30"]),
+            "symbol": ["SH600519"] * 4,
+            "factor_name": ["资产负债率", "流动比率", "资产负债率", "流动比率"],
+            "value": [40.0, 2.0, 30.0, 1.8],
+        }
+    ).astype({"timestamp": "datetime64[ns]", "报告期": "datetime64[ns]"})
+    # DolphinDB 脚本的结果: 按因子名排序的透视列, 报告期季度与年份, 百分比换算后按报告期倒序
+    server = pd.DataFrame(
+        {
+            "timestamp": pd.to_datetime(["2024-04-30", "2023-08-30"]).astype("datetime64[ns]"),
+            "symbol": ["SH600519"] * 2,
+            "报告期": pd.to_datetime(["2024-03-31", "2023-06-30"]).astype("datetime64[ns]"),
+            "流动比率": [2.0, 1.8],
+            "资产负债率": [0.4, 0.3],
+            "fiscal_period": ["q1", "q2"],
+            "fiscal_year": pd.array([2024, 2023], dtype="int32"),
+        }
+    )
+
+    async def _fake_arun_query(script):
+        if "pivot by" in script:
+            return server
+        wanted = [f for f in long_rows["factor_name"].unique() if f'"{f}"' in script]
+        return long_rows[long_rows["factor_name"].isin(wanted)].reset_index(drop=True)
+
+    monkeypatch.setattr(batching, "arun_query", _fake_arun_query)
+    monkeypatch.setattr(factor_cache, "_FACTOR_CACHE", FactorCache(max_bytes=1 << 20))
+    report_month = get_report_month("ytd", -4)
+    ratios = get_finance_query(
+        ["资产负债率", "流动比率"], ["SH600519"], report_month, PostProcessSpec(percent_columns=("资产负债率",))
+    )
+    results = {}
+    try:
+        for enabled in ("true", "false"):
+            monkeypatch.setenv("XIAOYUAN_FACTOR_CACHE_ENABLED", enabled)
+            get_settings.cache_clear()
+            # 先缓存其中一个因子, 结果不应取决于缓存了哪些组合
+            warm = get_finance_query(["流动比率"], ["SH600519"], report_month)
+            asyncio.run(backend.DolphinDBBackend().finance_factors(warm))
+            results[enabled] = asyncio.run(backend.DolphinDBBackend().finance_factors(ratios))
+    finally:
+        monkeypatch.delenv("XIAOYUAN_FACTOR_CACHE_ENABLED")
+        get_settings.cache_clear()
+
+    assert not get_settings().factor_cache_enabled
+    assert factor_cache.get_factor_cache().stats()["delta_queries"] == 2
+    pd.testing.assert_frame_equal(results["true"], server)
+    pd.testing.assert_frame_equal(results["false"], server)
+
+
+def test_asof_reports_share_the_factor_cache_with_other_fetchers(monkeypatch):
+    """Test that key metrics load reports through the factor cache, so ratios only query the delta."""
+    long_rows = pd.DataFrame(
+        {
+            "timestamp": pd.to_datetime(["2024-03-30", "2024-03-30"]),
+            "报告期": pd.to_datetime(["2023-12-31", "2023-12-31"]),
+            "symbol": ["SH600519"] * 2,
+            "factor_name": ["流动比率", "资产负债率"],
+            "value": [2.0, 40.0],
+        }
+    )
+    finance_scripts, server_scripts = [], []
+
+    async def _fake_finance_query(script):
+        finance_scripts.append(script)
+        wanted = [f for f in long_rows["factor_name"].unique() if f'"{f}"' in script]
+        return long_rows[long_rows["factor_name"].isin(wanted)].reset_index(drop=True)
+
+    async def _fake_server_query(script):
+        server_scripts.append(script)
+        return pd.DataFrame(
+            {
+                "timestamp": pd.to_datetime(["2023-12-28", "2023-12-29"]),
+                "symbol": ["SH600519"] * 2,
+                "factor_name": ["总市值"] * 2,
+                "value": [1.0, None],
+            }
+        )
+
+    monkeypatch.setattr(batching, "arun_query", _fake_finance_query)
+    monkeypatch.setattr(backend, "arun_query", _fake_server_query)
+    monkeypatch.setattr(factor_cache, "_FACTOR_CACHE", FactorCache(max_bytes=1 << 20))
+    monkeypatch.setenv("XIAOYUAN_FACTOR_CACHE_ENABLED", "true")
+    get_settings.cache_clear()
+    report_month = get_report_month("annual", -4)
+    store = backend.DolphinDBBackend()
+    try:
+        key_metrics = asyncio.run(
+            store.daily_asof(
+                get_finance_query(["流动比率", "总市值"], ["SH600519"], report_month),
+                PostProcessSpec(date_columns=(), date_text_columns=("报告期",)),
+            )
+        )
+        ratios = asyncio.run(
+            store.finance_factors(get_finance_query(["流动比率", "资产负债率"], ["SH600519"], report_month))
+        )
+        # 每个代码只取最新一期的查询不可分, 仍在一个脚本内连接
+        asyncio.run(store.daily_asof(get_recent_1q_query(["总市值"], ["SH600519"], date(2024, 5, 1)), forward=True))
+    finally:
+        monkeypatch.delenv("XIAOYUAN_FACTOR_CACHE_ENABLED")
+        get_settings.cache_clear()
+
+    assert factor_cache.get_factor_cache().stats()["delta_queries"] == 2
+    assert '"资产负债率"' in finance_scripts[1] and '"流动比率"' not in finance_scripts[1]
+    # 日频只读报告期前的候选日, 空值不参与连接
+    assert "timestamp in datetime([2023.12.16" in server_scripts[0] and "2023.12.30])" in server_scripts[0]
+    assert "aj(" not in server_scripts[0] and "aj(" in server_scripts[1]
+    assert key_metrics[["报告期", "流动比率", "总市值"]].values.tolist() == [["2023-12-31", 2.0, 1.0]]
+    assert ratios["资产负债率"].tolist() == [40.0]
+
+
+def test_factor_query_evaluates_long_rows_like_the_script():
+    """Test that filters, per-group ordering and limits run in pandas as in DolphinDB."""
+    annual = get_finance_query(["存货"], ["SH600519"], get_report_month("annual", -2))
+    rows = annual.evaluate_long(FINANCE_ROWS)
+    assert rows["value"].tolist() == [1.0, 2.0]
+    assert list(rows.columns) == ["timestamp", "报告期", "symbol", "factor_name", "value"]
+
+    recent = get_recent_1q_query(["存货"], ["SH600519", "SZ000001"], date(2024, 1, 1))
+    assert recent.evaluate_long(FINANCE_ROWS)["value"].tolist() == [5.0]
+
+
+def test_parquet_mirror_syncs_incrementally_and_reads_with_filters(tmp_path):
+    """Test that syncs only pull rows from the watermark on and that reads prune and deduplicate."""
+    pytest.importorskip("pyarrow")
+    fetched = []
+
+    def _fetch(table, columns, factors, start, end):
+        fetched.append((start, end))
+        mask = (FINANCE_ROWS["timestamp"] >= start) & (FINANCE_ROWS["timestamp"] < end)
+        return FINANCE_ROWS[mask].reset_index(drop=True)
+
+    mirror = ParquetMirror(tmp_path)
+    assert mirror.sync("cn_finance_factors_1Q", start="2022-01-01", fetch=_fetch) == 5
+    assert mirror.state("cn_finance_factors_1Q")["watermark"].startswith("2024-04-30")
+    assert (tmp_path / "cn_finance_factors_1Q" / "symbol=SH600519" / "year=2023").is_dir()
+
+    fetched.clear()
+    # 水位线当天的行会重新读取, 读出时去重
+    assert mirror.sync("cn_finance_factors_1Q", fetch=_fetch) == 2
+    assert fetched[0][0] == pd.Timestamp("2024-04-30")
+    rows = mirror.read("cn_finance_factors_1Q", ["SH600519"], start="2023-01-01")
+    assert sorted(rows["value"].tolist()) == [1.0, 2.0, 5.0]
+
+    df = mirror.load(get_finance_query(["存货"], ["SH600519"], get_report_month("annual", -2)))
+    assert df["存货"].tolist() == [1.0, 2.0]
+    assert df["fiscal_period"].tolist() == ["q4", "q4"]
+
+
+def test_parquet_mirror_reuses_its_dataset_and_compacts_partitions(tmp_path):
+    """Test that reads reuse the discovered files until a write and that compaction keeps the latest rows."""
+    pytest.importorskip("pyarrow")
+    table = "cn_finance_factors_1Q"
+    mirror = ParquetMirror(tmp_path)
+    mirror.write(table, FINANCE_ROWS)
+    updated = FINANCE_ROWS.iloc[[1]].assign(value=20.0)
+    mirror.write(table, updated)
+
+    expected = mirror.read(table, ["SH600519"])
+    dataset = mirror._dataset(table)  # pylint: disable=protected-access
+    assert mirror._dataset(table) is dataset  # pylint: disable=protected-access
+    partition = tmp_path / table / "symbol=SH600519" / "year=2024"
+    assert len(list(partition.glob("*.parquet"))) == 2
+
+    assert mirror.compact(table) == 2
+    assert [f.name for f in partition.glob("*.parquet")] == ["part-000003-0.parquet"]
+    assert mirror._dataset(table) is not dataset  # pylint: disable=protected-access
+    pd.testing.assert_frame_equal(mirror.read(table, ["SH600519"]), expected)
+    assert 20.0 in expected["value"].tolist() and 2.0 not in expected["value"].tolist()
+
+    # 压缩后写入的批次仍覆盖旧行
+    mirror.write(table, updated.assign(value=30.0))
+    assert 30.0 in mirror.read(table, ["SH600519"])["value"].tolist()
+    assert mirror.compact(table) == 2 and mirror.state(table)["sequence"] == 5
+
+
+
+def test_fetchers_read_through_the_configured_backend(monkeypatch):
+    """Test that fetchers send typed requests to the backend named in the settings."""
+    requests = []
+
+    class _RecordingBackend(backend.DolphinDBBackend):
+        async def daily_factors(self, symbols, factors, start, end, change_of=None, after=None):
+            requests.append((list(symbols), list(factors), start, end))
+            return pd.DataFrame({"timestamp": pd.to_datetime(["2024-01-02"]), "symbol": ["SH600519"], "总市值": [1.0]})
+
+    backend.register_backend("recording", _RecordingBackend)
+    monkeypatch.setenv("XIAOYUAN_BACKEND", "recording")
+    get_settings.cache_clear()
+    try:
+        query = XiaoYuanHistoricalMarketCapFetcher.transform_query(
+            {"symbol": "600519.SS", "start_date": date(2024, 1, 1), "end_date": date(2024, 1, 31)}
+        )
+        df = asyncio.run(XiaoYuanHistoricalMarketCapFetcher.aextract_data(query, None))
+        monkeypatch.setenv("XIAOYUAN_BACKEND", "unknown")
+        get_settings.cache_clear()
+        with pytest.raises(ValueError, match="Unknown XiaoYuan backend"):
+            backend.get_backend()
+    finally:
+        monkeypatch.delenv("XIAOYUAN_BACKEND")
+        get_settings.cache_clear()
+        backend.BACKENDS.pop("recording")
+
+    assert requests == [(["SH600519"], ["总市值"], date(2024, 1, 1), date(2024, 1, 31))]
+    assert df["总市值"].tolist() == [1.0]
+    assert isinstance(backend.get_backend(), backend.DolphinDBBackend)
+
+
+def test_mirror_backend_computes_daily_changes_and_asof_joins(monkeypatch, tmp_path):
+    """Test that the mirror backend answers daily and as-of requests like the scripts do."""
+    pytest.importorskip("pyarrow")
+    close = "收盘价（不复权）"
+    mirror = ParquetMirror(tmp_path)
+    mirror.write("cn_finance_factors_1Q", FINANCE_ROWS)
+    mirror.write(
+        "cn_factors_1D",
+        pd.DataFrame(
+            {
+                "timestamp": pd.to_datetime(["2023-12-27", "2023-12-28", "2023-12-29", "2024-01-02", "2024-01-03"]),
+                "symbol": ["SH600519"] * 5,
+                "factor_name": [close] * 5,
+                "value": [10.0, 11.0, 12.0, 9.0, 9.9],
+            }
+        ),
+    )
+    monkeypatch.setenv("XIAOYUAN_BACKEND", "mirror")
+    monkeypatch.setenv("XIAOYUAN_MIRROR_PATH", str(tmp_path))
+    get_settings.cache_clear()
+    try:
+        source = backend.get_backend()
+        daily = asyncio.run(
+            source.daily_factors(["SH600519"], [close], "2023-12-27", "2024-01-03", change_of=close, after="2023-12-28")
+        )
+        annual = get_finance_query(["存货", close], ["SH600519"], get_report_month("annual", -2))
+        before = asyncio.run(source.daily_asof(annual))
+        recent = get_recent_1q_query(["存货", close], ["SH600519"], date(2024, 5, 1))
+        after = asyncio.run(source.daily_asof(recent, forward=True))
+    finally:
+        monkeypatch.delenv("XIAOYUAN_BACKEND")
+        monkeypatch.delenv("XIAOYUAN_MIRROR_PATH")
+        get_settings.cache_clear()
+
+    assert daily["timestamp"].tolist() == list(pd.to_datetime(["2023-12-29", "2024-01-02", "2024-01-03"]))
+    assert daily["change"].tolist() == pytest.approx([1.0, -3.0, 0.9])
+    assert daily["changeOverTime"].iloc[0] == pytest.approx(1 / 11)
+    # 报告期前最后一个交易日; 2022 年报前后没有日频数据
+    assert before["存货"].tolist() == [1.0, 2.0]
+    assert before[close].isna().tolist() == [True, False] and before[close].iloc[1] == 12.0
+    # 报告期当日或之后的第一个交易日
+    assert after[close].tolist() == [9.0]
+
+
+def test_duckdb_backend_answers_fetchers_like_the_scripts(monkeypatch):
+    """Test that the DuckDB backend answers factor, price, listing and dividend requests in process."""
+    pytest.importorskip("duckdb")
+    close = "收盘价（不复权）"
+    # 报告期按日期存储, 读出的精度与日频 timestamp 不同
+    finance_rows = FINANCE_ROWS.astype({"报告期": "datetime64[s]"})
+    monkeypatch.setenv("XIAOYUAN_BACKEND", "duckdb")
+    get_settings.cache_clear()
+    monkeypatch.setattr(calendar, "_CALENDAR", None)
+    try:
+        store = backend.get_backend()
+        store.load("cn_finance_factors_1Q", finance_rows)
+        store.load(
+            "cn_factors_1D",
+            pd.DataFrame(
+                {
+                    "timestamp": pd.to_datetime(["2023-12-27", "2023-12-28", "2023-12-29", "2024-01-02"]),
+                    "symbol": ["SH600519"] * 4,
+                    "factor_name": [close] * 4,
+                    "value": [10.0, 11.0, 12.0, 9.0],
+                }
+            ),
+        )
+        store.load(
+            "stock",
+            pd.DataFrame(
+                {
+                    "entity_id": ["stock_sh_600519", "stock_bj_830799"],
+                    "name": ["贵州茅台", "艾融软件"],
+                    "exchange": ["sh", "bj"],
+                    "list_date": pd.to_datetime(["2001-08-27", "2021-11-15"]),
+                    "end_date": pd.to_datetime([None, None]),
+                }
+            ),
+        )
+        store.load(
+            "dividend_detail",
+            pd.DataFrame(
+                {
+                    "entity_id": ["stock_sh_600519"],
+                    "dividend_per_share_before_tax": [30.876],
+                    "record_date": pd.to_datetime(["2024-06-18"]),
+                    "dividend_date": pd.to_datetime(["2024-06-19"]),
+                }
+            ),
+        )
+        for query in (
+            get_finance_query(["存货"], ["SH600519", "SZ000001"], get_report_month("annual", -2)),
+            get_recent_1q_query(["存货"], ["SH600519", "SZ000001"], date(2024, 5, 1)),
+        ):
+            expected = factor_cache.pivot_factor_rows(query, query.evaluate_long(finance_rows))
+            pd.testing.assert_frame_equal(store.load_factor_query(query), expected)
+
+        prices = XiaoYuanEquityHistoricalFetcher.transform_query(
+            {"symbol": "600519.SS", "start_date": date(2023, 12, 28), "end_date": date(2024, 1, 3)}
+        )
+        bars = asyncio.run(XiaoYuanEquityHistoricalFetcher.aextract_data(prices, None))
+        search = XiaoYuanEquitySearchFetcher.transform_query({"query": "", "is_symbol": False})
+        stocks = asyncio.run(XiaoYuanEquitySearchFetcher.aextract_data(search, None))
+        dividends = asyncio.run(store.dividends(date(2024, 1, 1), date(2024, 12, 31), ["SH600519"]))
+        # 估值倍数: 最新报告期向后连接首个交易日
+        valuation = asyncio.run(
+            store.daily_asof(get_recent_1q_query(["存货", close], ["SH600519"], date(2024, 5, 1)), forward=True)
+        )
+    finally:
+        monkeypatch.delenv("XIAOYUAN_BACKEND")
+        get_settings.cache_clear()
+        backend._INSTANCES.pop("duckdb").close()  # pylint: disable=protected-access
+
+    # 开始日前一个交易日只作涨跌基准, 不返回
+    assert bars["timestamp"].tolist() == list(pd.to_datetime(["2023-12-29", "2024-01-02"]))
+    assert bars["change"].tolist() == [1.0, -3.0]
+    # 只返回沪深两市
+    assert stocks["symbol"].tolist() == ["SH600519"] and stocks["list_date"].tolist() == ["2001-08-27"]
+    assert dividends[["symbol", "dividend"]].values.tolist() == [["SH600519", 30.876]]
+    assert valuation[["报告期", "存货", close]].values.tolist() == [[pd.Timestamp("2023-12-31"), 2.0, 9.0]]
+
+
+def test_synthetic_dataset_is_deterministic_and_serves_fetchers(monkeypatch):
+    """Test that the synthetic dataset ignores chunking, adjusts prices and loads into DuckDB."""
+    pytest.importorskip("duckdb")
+    config = SyntheticConfig(stocks=12, etfs=2, indices=2, start=date(2023, 1, 1), end=date(2023, 12, 31))
+
+    def tables(chunk_size):
+        frames = {}
+        for table, rows in generate(SyntheticConfig(**{**config.__dict__, "chunk_size": chunk_size})):
+            frames.setdefault(table, []).append(rows)
+        return {
+            table: pd.concat(rows).sort_values(list(rows[0].columns[:3])).reset_index(drop=True)
+            for table, rows in frames.items()
+        }
+
+    whole, chunked = tables(100), tables(5)
+    assert whole.keys() == chunked.keys()
+    for table, rows in whole.items():
+        pd.testing.assert_frame_equal(rows, chunked[table])
+
+    daily = whole["cn_factors_1D"].pivot_table(
+        index=["symbol", "timestamp"], columns="factor_name", values="value"
+    )
+    stocks = daily.dropna(subset=["收盘价（前复权）"])
+    # 前复权价格不高于不复权价格, 最后一个交易日两者相同
+    assert (stocks["收盘价（前复权）"] <= stocks["收盘价（不复权）"] * (1 + 1e-9)).all()
+    last = stocks.groupby(level="symbol").tail(1)
+    assert (last["收盘价（前复权）"] - last["收盘价（不复权）"]).abs().max() < 1e-6
+
+    monkeypatch.setenv("XIAOYUAN_BACKEND", "duckdb")
+    get_settings.cache_clear()
+    try:
+        counts = load_synthetic(backend.get_backend(), config)
+        ratios = XiaoYuanFinancialRatiosFetcher.transform_query({"symbol": "600000.SS", "limit": 1})
+        data = asyncio.run(XiaoYuanFinancialRatiosFetcher.aextract_data(ratios, None))
+        results = XiaoYuanFinancialRatiosFetcher.transform_data(ratios, data)
+    finally:
+        monkeypatch.delenv("XIAOYUAN_BACKEND")
+        get_settings.cache_clear()
+        backend._INSTANCES.pop("duckdb").close()  # pylint: disable=protected-access
+
+    assert counts["stock"] == 12 and counts["cn_factors_1D"] == len(whole["cn_factors_1D"])
+    assert [r.period_ending for r in results] == ["2022-12-31"]